@@ -0,0 +1,179 @@
+// Ephemeral room signals over the backend's /_signals WebSocket: presence
+// pings and typing. None of it goes through Reflex state.
+//
+// Renders who else is typing. Typing is read from the input with id
+// `inputId`.
+import { createElement, useEffect, useRef, useState } from "react";
+import env from "$/env.json";
+import { getBackendURL, getToken } from "$/utils/state";
+
+// Keep presence fresh well inside the server's TTL (180 s).
+const PRESENCE_INTERVAL_MS = 60000;
+// Activity refreshes presence at most this often.
+const ACTIVITY_THROTTLE_MS = 20000;
+// While keystrokes continue, repeat "typing" this often. The server TTL is 6 s.
+const TYPING_REPEAT_MS = 3000;
+const RETRY_MAX_MS = 30000;
+
+function signalsURL() {
+  const url = getBackendURL(env.EVENT);
+  url.pathname = "/_signals";
+  url.search = `?token=${encodeURIComponent(getToken())}`;
+  return url.toString();
+}
+
+function typingText(names) {
+  if (names.length === 0) {
+    return "";
+  }
+  if (names.length === 1) {
+    return `${names[0]} is typing…`;
+  }
+  if (names.length === 2) {
+    return `${names[0]} and ${names[1]} are typing…`;
+  }
+  return "Several people are typing…";
+}
+
+export function SignalChannel({ room, inputId, className }) {
+  const [signals, setSignals] = useState({ you: "", byKey: {} });
+  const socketRef = useRef(null);
+
+  // One connection per room; reconnects with backoff (also while the join is still landing).
+  useEffect(() => {
+    if (!room || typeof window === "undefined") {
+      return undefined;
+    }
+    let closed = false;
+    let retryMs = 1000;
+    let retryTimer = null;
+
+    const connect = () => {
+      const socket = new WebSocket(signalsURL());
+      socketRef.current = socket;
+      socket.onopen = () => {
+        retryMs = 1000;
+      };
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        setSignals((current) => {
+          if (message.op === "reset") {
+            const byKey = {};
+            for (const signal of message.signals) {
+              byKey[`${signal.kind}:${signal.user}`] = signal;
+            }
+            return { you: message.you, byKey };
+          }
+          const byKey = { ...current.byKey };
+          const key = `${message.kind}:${message.user}`;
+          if (message.op === "set") {
+            byKey[key] = message;
+          } else {
+            delete byKey[key];
+          }
+          return { ...current, byKey };
+        });
+      };
+      socket.onclose = () => {
+        socketRef.current = null;
+        if (!closed) {
+          retryTimer = setTimeout(connect, retryMs);
+          retryMs = Math.min(retryMs * 2, RETRY_MAX_MS);
+        }
+      };
+    };
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      socketRef.current?.close();
+      socketRef.current = null;
+      setSignals({ you: "", byKey: {} });
+    };
+  }, [room]);
+
+  // Presence: on an interval and on (throttled) activity.
+  useEffect(() => {
+    if (!room || typeof window === "undefined") {
+      return undefined;
+    }
+    let lastPing = 0;
+    const send = (kind, value) => {
+      const socket = socketRef.current;
+      if (socket && socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ kind, value }));
+        return true;
+      }
+      return false;
+    };
+    const ping = (force) => {
+      const now = Date.now();
+      if (document.hidden || (!force && now - lastPing < ACTIVITY_THROTTLE_MS)) {
+        return;
+      }
+      if (send("presence", true)) {
+        lastPing = now;
+      }
+    };
+    const onActivity = () => ping(false);
+    const interval = setInterval(() => ping(true), PRESENCE_INTERVAL_MS);
+    window.addEventListener("pointermove", onActivity, { passive: true });
+    window.addEventListener("keydown", onActivity);
+    document.addEventListener("visibilitychange", onActivity);
+    return () => {
+      clearInterval(interval);
+      window.removeEventListener("pointermove", onActivity);
+      window.removeEventListener("keydown", onActivity);
+      document.removeEventListener("visibilitychange", onActivity);
+    };
+  }, [room]);
+
+  // Typing: repeated while keystrokes continue; cleared on submit or blur.
+  useEffect(() => {
+    const input = inputId ? document.getElementById(inputId) : null;
+    if (!room || !input) {
+      return undefined;
+    }
+    let lastTyping = 0;
+    const send = (value) => {
+      const socket = socketRef.current;
+      if (socket && socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ kind: "typing", value }));
+      }
+    };
+    const stop = () => {
+      if (lastTyping) {
+        lastTyping = 0;
+        send(false);
+      }
+    };
+    const onInput = () => {
+      const now = Date.now();
+      if (!input.value) {
+        stop();
+      } else if (now - lastTyping >= TYPING_REPEAT_MS) {
+        lastTyping = now;
+        send(true);
+      }
+    };
+    const form = input.form;
+    input.addEventListener("input", onInput);
+    input.addEventListener("blur", stop);
+    form?.addEventListener("submit", stop);
+    return () => {
+      input.removeEventListener("input", onInput);
+      input.removeEventListener("blur", stop);
+      form?.removeEventListener("submit", stop);
+    };
+  }, [room, inputId]);
+
+  const typing = Object.values(signals.byKey)
+    .filter((signal) => signal.kind === "typing" && signal.user !== signals.you)
+    .map((signal) => signal.name || signal.user)
+    .sort();
+  return createElement(
+    "div",
+    { className, "aria-live": "polite" },
+    typingText(typing),
+  );
+}
@@ -0,0 +1,242 @@
+// Windowed list for long chat histories: only rows inside the viewport (plus
+// `overscan` pixels either side) are mounted; the rest is represented by two
+// spacers sized from measured (or estimated) row heights.
+//
+// Rows are identified by their React key, so the list keeps the reader's place
+// when older rows are prepended or rows above change height, and follows the
+// bottom while the reader is already there.
+import {
+  Children,
+  createElement,
+  useCallback,
+  useEffect,
+  useLayoutEffect,
+  useMemo,
+  useRef,
+  useState,
+} from "react";
+
+// Within this distance of the bottom the list sticks to new rows.
+const STICKY_BOTTOM_PX = 48;
+// Ask for older history once the reader is this close to the top.
+const LOAD_OLDER_PX = 400;
+
+// First index whose row ends below `y` (offsets has length rows + 1).
+function rowAt(offsets, y) {
+  let low = 0;
+  let high = offsets.length - 1;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (offsets[mid + 1] > y) {
+      high = mid;
+    } else {
+      low = mid + 1;
+    }
+  }
+  return low;
+}
+
+export function VirtualList({
+  children,
+  className,
+  estimatedItemHeight = 72,
+  overscan = 600,
+  hasMore = false,
+  onReachTop,
+  freshItemClassName = "",
+}) {
+  const rows = Children.toArray(children);
+  const keys = rows.map((row) => row.key);
+
+  const scrollerRef = useRef(null);
+  const listRef = useRef(null);
+  const heightsRef = useRef(new Map());
+  const observerRef = useRef(null);
+  // Mounted row node and its callback ref, per key; rows are unobserved on unmount.
+  const rowNodesRef = useRef(new Map());
+  const rowRefsRef = useRef(new Map());
+  const stickyRef = useRef(true);
+  // { key, delta }: first visible row and how far the viewport top sits below it.
+  const anchorRef = useRef(null);
+  // Last key of the previous render; rows after it were appended since.
+  const lastKeyRef = useRef(null);
+  // Appended rows keep their entry animation class until it has played once.
+  const freshKeysRef = useRef(new Set());
+  const requestedAtRef = useRef(-1);
+  const [viewport, setViewport] = useState({ top: 0, height: 0 });
+  const [measured, setMeasured] = useState(0);
+
+  const offsets = useMemo(() => {
+    const result = new Array(keys.length + 1);
+    result[0] = 0;
+    for (let i = 0; i < keys.length; i++) {
+      result[i + 1] = result[i] + (heightsRef.current.get(keys[i]) ?? estimatedItemHeight);
+    }
+    return result;
+    // `measured` changes whenever a row height does.
+  }, [keys.join("\n"), measured, estimatedItemHeight]);
+
+  const total = offsets[keys.length];
+  const start = rowAt(offsets, Math.max(0, viewport.top - overscan));
+  const end = Math.min(keys.length, rowAt(offsets, viewport.top + viewport.height + overscan) + 1);
+
+  const listTop = () => {
+    const scroller = scrollerRef.current;
+    const list = listRef.current;
+    if (!scroller || !list) return 0;
+    return list.getBoundingClientRect().top - scroller.getBoundingClientRect().top + scroller.scrollTop;
+  };
+
+  const syncViewport = useCallback(() => {
+    const scroller = scrollerRef.current;
+    if (!scroller) return;
+    const top = scroller.scrollTop - listTop();
+    stickyRef.current =
+      scroller.scrollHeight - scroller.scrollTop - scroller.clientHeight <= STICKY_BOTTOM_PX;
+    setViewport((current) =>
+      current.top === top && current.height === scroller.clientHeight
+        ? current
+        : { top, height: scroller.clientHeight },
+    );
+  }, []);
+
+  const onScroll = () => {
+    syncViewport();
+    const top = scrollerRef.current.scrollTop - listTop();
+    const first = rowAt(offsets, Math.max(0, top));
+    anchorRef.current =
+      first < keys.length ? { key: keys[first], delta: top - offsets[first] } : null;
+  };
+
+  // One ResizeObserver for every mounted row; heights are cached by key.
+  if (observerRef.current === null && typeof ResizeObserver !== "undefined") {
+    observerRef.current = new ResizeObserver((entries) => {
+      let changed = false;
+      for (const entry of entries) {
+        const key = entry.target.dataset.rowKey;
+        const height = entry.target.offsetHeight;
+        if (key && height && heightsRef.current.get(key) !== height) {
+          heightsRef.current.set(key, height);
+          changed = true;
+        }
+      }
+      if (changed) setMeasured((version) => version + 1);
+    });
+  }
+  useEffect(() => () => observerRef.current?.disconnect(), []);
+
+  const observeRow = (key) => {
+    let ref = rowRefsRef.current.get(key);
+    if (!ref) {
+      ref = (node) => {
+        const prev = rowNodesRef.current.get(key);
+        if (prev && prev !== node) observerRef.current?.unobserve(prev);
+        if (node) {
+          rowNodesRef.current.set(key, node);
+          observerRef.current?.observe(node);
+        } else {
+          rowNodesRef.current.delete(key);
+          rowRefsRef.current.delete(key);
+        }
+      };
+      rowRefsRef.current.set(key, ref);
+    }
+    return ref;
+  };
+
+  useEffect(() => {
+    const scroller = scrollerRef.current;
+    if (!scroller || typeof ResizeObserver === "undefined") return undefined;
+    const observer = new ResizeObserver(syncViewport);
+    observer.observe(scroller);
+    return () => observer.disconnect();
+  }, [syncViewport]);
+
+  // Keep the reader's place before the browser paints.
+  useLayoutEffect(() => {
+    const scroller = scrollerRef.current;
+    if (!scroller) return;
+    const index = anchorRef.current ? keys.indexOf(anchorRef.current.key) : -1;
+    if (!stickyRef.current && index >= 0) {
+      const wanted = listTop() + offsets[index] + anchorRef.current.delta;
+      if (Math.abs(wanted - scroller.scrollTop) > 1) scroller.scrollTop = wanted;
+    } else {
+      // At the bottom already, or the list was replaced (another room): follow the end.
+      stickyRef.current = true;
+      scroller.scrollTop = scroller.scrollHeight;
+    }
+    syncViewport();
+  });
+
+  useEffect(() => {
+    lastKeyRef.current = keys.length ? keys[keys.length - 1] : null;
+    // Rows appended out of view simply appear when scrolled to.
+    for (const key of freshKeysRef.current) {
+      const index = keys.indexOf(key);
+      if (index < start || index >= end) freshKeysRef.current.delete(key);
+    }
+    // Forget heights of rows that are gone (e.g. after switching rooms).
+    if (heightsRef.current.size > 2 * keys.length) {
+      const current = new Set(keys);
+      for (const key of heightsRef.current.keys()) {
+        if (!current.has(key)) heightsRef.current.delete(key);
+      }
+    }
+  });
+
+  // Incremental history: one request per list length, while the top is close.
+  useEffect(() => {
+    if (!hasMore || !onReachTop || viewport.height === 0) return;
+    if (viewport.top > LOAD_OLDER_PX || requestedAtRef.current === keys.length) return;
+    requestedAtRef.current = keys.length;
+    onReachTop();
+  }, [hasMore, onReachTop, viewport.top, viewport.height, keys.length]);
+
+  // Only rows appended to the list we already showed animate in; not the initial
+  // page, prepended history, or rows remounted by scrolling.
+  if (freshItemClassName && lastKeyRef.current !== null) {
+    const appendedFrom = keys.lastIndexOf(lastKeyRef.current) + 1;
+    if (appendedFrom > 0) {
+      for (let i = appendedFrom; i < keys.length; i++) freshKeysRef.current.add(keys[i]);
+    }
+  }
+
+  const mounted = [];
+  for (let i = start; i < end; i++) {
+    const key = keys[i];
+    const fresh = freshKeysRef.current.has(key);
+    mounted.push(
+      createElement(
+        "div",
+        {
+          key,
+          ref: observeRow(key),
+          "data-row-key": key,
+          className: fresh ? freshItemClassName : undefined,
+          onAnimationEnd: fresh ? () => freshKeysRef.current.delete(key) : undefined,
+          // flow-root keeps child margins inside the measured box.
+          style: { display: "flow-root" },
+        },
+        rows[i],
+      ),
+    );
+  }
+
+  return createElement(
+    "div",
+    {
+      ref: scrollerRef,
+      className,
+      onScroll,
+      // Anchoring is handled above; the browser's own would double-correct.
+      style: { overflowAnchor: "none" },
+    },
+    createElement(
+      "div",
+      { ref: listRef, style: { width: "100%", flexShrink: 0 } },
+      createElement("div", { style: { height: offsets[start] } }),
+      ...mounted,
+      createElement("div", { style: { height: total - offsets[end] } }),
+    ),
+  );
+}
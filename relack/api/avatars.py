@@ -0,0 +1,31 @@
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from relack.services.avatars import AVATAR_VERSION, normalize_seed, render_avatar
+
+AVATAR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+async def avatar_svg(request: Request) -> Response:
+    """Serve a locally generated avatar; the URL is versioned so it never changes."""
+
+    body, etag = render_avatar(normalize_seed(request.path_params["seed"]))
+    headers = {"ETag": etag, "Cache-Control": AVATAR_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="image/svg+xml", headers=headers)
+
+
+routes = [
+    # ``path``: seeds may contain "/" (sent as %2F, which the server decodes).
+    Route(f"/avatar/{AVATAR_VERSION}/{{seed:path}}.svg", avatar_svg, methods=["GET", "HEAD"]),
+]
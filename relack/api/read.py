@@ -0,0 +1,171 @@
+import json
+import os
+import secrets
+from bisect import bisect_left
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from relack.api.avatars import _etag_matches
+from relack.models import StoredMessage, UserProfile
+from relack.services.presence import presence
+from relack.services.profile_directory import profile_directory
+from relack.services.response_cache import api_cache
+from relack.states.shared_state import _room_token, read_lobby
+
+API_PREFIX = "/api/v1"
+# Like guest access, the read API needs no login; 0 removes the routes.
+READ_API_ENABLED = os.getenv("RELACK_READ_API", "1") != "0"
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+# Clients may reuse a response only after revalidating it (ETag / If-None-Match).
+API_CACHE_CONTROL = "no-cache"
+# State version counters restart with the process and differ per worker; tags
+# carry this so a tag from another process never matches.
+_PROCESS_TAG = secrets.token_hex(4)
+
+
+class _NotFound(Exception):
+    pass
+
+
+def _etag(*versions: Any) -> str:
+    return f'"{_PROCESS_TAG}-{".".join(str(version) for version in versions)}"'
+
+
+def _encode(payload: dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _message_json(msg: StoredMessage, profiles: dict[str, UserProfile]) -> dict[str, Any]:
+    profile = profiles.get(msg.sender)
+    return {
+        # Snowflake IDs exceed JavaScript's safe integer range.
+        "id": str(msg.id),
+        "sender": msg.sender,
+        "display_name": (profile.nickname if profile else "") or msg.sender,
+        "content": msg.content,
+        "timestamp": msg.timestamp,
+        "is_system": msg.is_system,
+    }
+
+
+async def _respond(request: Request, load) -> Response:
+    """Serve ``load``'s response through ``api_cache``, answering 304 on a matching ETag."""
+
+    try:
+        etag, body = await api_cache.serve(f"{request.url.path}?{request.url.query}", load)
+    except _NotFound:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    headers = {"ETag": etag, "Cache-Control": API_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        api_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def list_rooms(request: Request) -> Response:
+    """The room directory with live participant counts and messages sent so far."""
+
+    async def load():
+        lobby = await read_lobby()
+
+        def build() -> bytes:
+            rooms = [
+                {
+                    "name": room_name,
+                    "description": room.description,
+                    "created_by": room.created_by,
+                    "participant_count": presence.participant_count(_room_token(room_name)),
+                    "message_count": lobby._room_seq.get(room_name, 0),
+                }
+                for room_name, room in lobby._rooms.items()
+            ]
+            return _encode({"rooms": rooms})
+
+        return _etag(lobby._rooms_version, presence.version, sum(lobby._room_seq.values())), build
+
+    return await _respond(request, load)
+
+
+async def room_messages(request: Request) -> Response:
+    """One page of a room's history, oldest first; ``?before=<id>`` pages backwards."""
+
+    room_name = request.path_params["room"]
+    try:
+        limit = int(request.query_params.get("limit", HISTORY_PAGE_SIZE))
+        before = int(request.query_params.get("before", 0))
+    except ValueError:
+        return JSONResponse({"error": "limit and before must be integers"}, status_code=400)
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+
+    async def load():
+        lobby = await read_lobby()
+        if room_name not in lobby._rooms:
+            raise _NotFound
+        hot = lobby._messages_by_room.get(room_name) or ()
+        # New messages bump the sequence; retention moves the oldest ID; clear and
+        # import bump _rooms_version. Display names follow profile edits.
+        etag = _etag(
+            lobby._rooms_version,
+            lobby._room_seq.get(room_name, 0),
+            hot[0].id if hot else 0,
+            profile_directory.version,
+        )
+
+        def build() -> bytes:
+            history = lobby._room_history(room_name)
+            end = bisect_left(history, before, key=lambda msg: msg.id) if before else len(history)
+            page = history[max(end - limit, 0) : end]
+            profiles = profile_directory.get_many(msg.sender for msg in page)
+            return _encode(
+                {
+                    "room": room_name,
+                    "messages": [_message_json(msg, profiles) for msg in page],
+                    "next_before": str(page[0].id) if end > len(page) else None,
+                }
+            )
+
+        return etag, build
+
+    return await _respond(request, load)
+
+
+async def get_profile(request: Request) -> Response:
+    """A user's public profile (no email or auth token)."""
+
+    username = request.path_params["username"]
+
+    async def load():
+        profile = profile_directory.get(username)
+        if profile is None:
+            raise _NotFound
+
+        def build() -> bytes:
+            return _encode(
+                {
+                    "username": profile.username,
+                    "nickname": profile.nickname,
+                    "bio": profile.bio,
+                    "avatar_seed": profile.avatar_seed or profile.username,
+                    "is_guest": profile.is_guest,
+                    "created_at": profile.created_at,
+                }
+            )
+
+        return _etag(profile_directory.version), build
+
+    return await _respond(request, load)
+
+
+routes = (
+    [
+        Route(f"{API_PREFIX}/rooms", list_rooms, methods=["GET", "HEAD"]),
+        Route(f"{API_PREFIX}/rooms/{{room}}/messages", room_messages, methods=["GET", "HEAD"]),
+        Route(f"{API_PREFIX}/profiles/{{username}}", get_profile, methods=["GET", "HEAD"]),
+    ]
+    if READ_API_ENABLED
+    else []
+)
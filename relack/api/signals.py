@@ -0,0 +1,56 @@
+import asyncio
+import json
+import logging
+
+from starlette.routing import WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from relack.services.signals import signal_hub
+
+SIGNALS_PATH = "/_signals"
+# Frames larger than this are not signals; the connection is closed.
+MAX_FRAME_BYTES = 512
+# Close code telling the client its session is not in a room (yet); it retries.
+CLOSE_NOT_IN_ROOM = 4404
+
+
+async def _forward(websocket: WebSocket, queue: asyncio.Queue):
+    while True:
+        await websocket.send_text(json.dumps(await queue.get()))
+
+
+async def signal_socket(websocket: WebSocket):
+    """Publish/subscribe endpoint for ephemeral room signals (``relack.services.signals``).
+
+    The client authenticates with its Reflex client token; it never touches
+    Reflex state, so signals add no load to the state manager.
+    """
+
+    await websocket.accept()
+    client_token = websocket.query_params.get("token", "")
+    queue = signal_hub.attach(client_token)
+    if queue is None:
+        await websocket.close(code=CLOSE_NOT_IN_ROOM)
+        return
+    sender = asyncio.create_task(_forward(websocket, queue))
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            if len(frame) > MAX_FRAME_BYTES:
+                await websocket.close(code=1009)
+                return
+            try:
+                message = json.loads(frame)
+                signal_hub.publish(client_token, str(message["kind"]), message.get("value"))
+            except (ValueError, KeyError, TypeError):
+                logging.debug("Ignoring malformed signal frame")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        signal_hub.detach(client_token, queue)
+
+
+routes = [
+    WebSocketRoute(SIGNALS_PATH, signal_socket),
+]
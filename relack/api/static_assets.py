@@ -0,0 +1,102 @@
+import functools
+import json
+import logging
+from pathlib import Path
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.routing import Route
+
+from relack.api.avatars import _etag_matches
+from relack.services.asset_pipeline import ENCODINGS, MANIFEST_NAME, OUTPUT_DIR
+
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_PREFIX = "/static"
+_MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".woff2": "font/woff2",
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _manifest() -> dict[str, dict]:
+    try:
+        return json.loads((OUTPUT_DIR / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        logging.warning("No static asset manifest at %s; run python -m relack.services.asset_pipeline", OUTPUT_DIR)
+        return {}
+
+
+@functools.lru_cache(maxsize=1)
+def _files() -> dict[str, dict]:
+    # Only files listed in the manifest are served, keyed by their hashed name.
+    return {entry["file"]: entry for entry in _manifest().values()}
+
+
+def asset_path(logical_name: str) -> str | None:
+    """Backend-relative URL of the current build of ``logical_name`` (e.g. "fonts.css")."""
+
+    entry = _manifest().get(logical_name)
+    return f"{STATIC_PREFIX}/{entry['file']}" if entry else None
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted: set[str] = set()
+    for token in accept_encoding.split(","):
+        name, *params = (part.strip() for part in token.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def _choose_encoding(accept_encoding: str, available: dict[str, int]) -> str | None:
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in available and encoding in accepted:
+            return encoding
+    return None
+
+
+async def static_asset(request: Request) -> Response:
+    """Serve a content-hashed build output, precompressed when the client accepts it."""
+
+    filename = request.path_params["name"]
+    entry = _files().get(filename)
+    if entry is None:
+        return Response(status_code=404)
+    encoding = _choose_encoding(request.headers.get("accept-encoding", ""), entry["encodings"])
+    content_hash = Path(filename).stem.rsplit(".", 1)[-1]
+    # Each encoding is a different body, so it gets its own strong validator.
+    etag = f'"{content_hash}-{ENCODINGS[encoding].lstrip(".")}"' if encoding else f'"{content_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": STATIC_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        # Fonts are fetched cross-origin from the frontend and need CORS.
+        "Access-Control-Allow-Origin": "*",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    path = OUTPUT_DIR / filename
+    if encoding:
+        path = path.with_name(path.name + ENCODINGS[encoding])
+        headers["Content-Encoding"] = encoding
+    # FileResponse reads the file in a worker thread; our ETag takes precedence over its own.
+    return FileResponse(
+        path,
+        media_type=_MEDIA_TYPES.get(Path(filename).suffix, "application/octet-stream"),
+        headers=headers,
+    )
+
+
+routes = [
+    Route(f"{STATIC_PREFIX}/{{name}}", static_asset, methods=["GET", "HEAD"]),
+]
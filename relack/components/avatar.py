@@ -0,0 +1,31 @@
+from reflex.constants import Dirs
+from reflex.utils.imports import ImportVar
+from reflex.vars.base import Var, VarData
+from relack.services.avatars import AVATAR_VERSION
+
+# Same backend URL resolution Reflex uses for uploaded files.
+_backend_origin = Var(
+    _js_expr="getBackendURL(env.UPLOAD).origin",
+    _var_data=VarData(
+        imports={
+            f"$/{Dirs.STATE_PATH}": "getBackendURL",
+            "$/env.json": ImportVar(tag="env", is_default=True),
+        }
+    ),
+).to(str)
+
+
+def avatar_src(seed: str | Var[str], fallback: str | Var[str] = "anonymous") -> Var[str]:
+    """URL of the locally generated avatar for ``seed`` (served by relack.api.avatars).
+
+    An empty seed uses ``fallback`` (usually the username) instead.
+    """
+
+    seed_var = Var.create(seed).to(str)
+    fallback_var = Var.create(fallback).to(str)
+    encoded = Var(
+        _js_expr=f"encodeURIComponent(({seed_var!s}) || ({fallback_var!s}))",
+        _var_data=VarData.merge(seed_var._get_all_var_data(), fallback_var._get_all_var_data()),
+    ).to(str)
+    return Var.create(f"{_backend_origin}/avatar/{AVATAR_VERSION}/{encoded}.svg")
+
@@ -1,7 +1,14 @@
 import reflex as rx
-from relack.states.shared_state import GlobalLobbyState, RoomState, TabSessionState
+from relack.states.shared_state import GlobalLobbyState, RoomState
 from relack.states.auth_state import AuthState
 from relack.models import RoomInfo, ChatMessage, UserProfile
+from relack.components.avatar import avatar_src
+from relack.components.formatting import local_time
+from relack.components.signal_channel import signal_channel
+from relack.components.virtual_list import virtual_list
+
+# Fresh per submit: evaluated in the browser when the event is queued.
+SEND_KEY = rx.Var("Date.now().toString(36) + Math.random().toString(36).slice(2, 10)", _var_type=str)
 
 
 class CreateRoomState(rx.State):
@@ -37,12 +44,20 @@ def room_card(room: RoomInfo) -> rx.Component:
                 rx.el.div(
                     rx.el.div(
                         rx.el.h3(room.name, class_name="font-semibold text-gray-900"),
+                        rx.cond(
+                            room.participant_count > 0,
+                            rx.el.span(
+                                rx.icon("users", class_name="h-3 w-3"),
+                                room.participant_count,
+                                class_name="flex items-center gap-0.5 text-xs text-gray-400 ml-1",
+                            ),
+                        ),
                         class_name="flex items-center gap-1",
                     ),
                     rx.cond(
-                        TabSessionState.unread_counts[room.name] > 0,
+                        GlobalLobbyState.unread_counts[room.name] > 0,
                         rx.el.span(
-                            TabSessionState.unread_counts[room.name],
+                            GlobalLobbyState.unread_counts[room.name],
                             class_name="bg-violet-600 text-white text-xs font-bold px-2 py-0.5 rounded-full ml-2",
                         ),
                     ),
@@ -166,11 +181,7 @@ def message_bubble(msg: ChatMessage) -> rx.Component:
     is_me = (msg.sender == AuthState.user.username) | (
         msg.sender == AuthState.user.nickname
     )
-    display_name = rx.cond(
-        msg.display_name != "",
-        msg.display_name,
-        msg.sender,
-    )
+    display_name = RoomState.display_name_map.get(msg.sender, msg.sender)
     avatar_seed = rx.cond(
         RoomState.avatar_seed_map.get(msg.sender, "") != "",
         RoomState.avatar_seed_map.get(msg.sender, ""),
@@ -191,7 +202,7 @@ def message_bubble(msg: ChatMessage) -> rx.Component:
                     ~is_me,
                     rx.el.a(
                         rx.image(
-                                src=f"https://api.dicebear.com/9.x/notionists/svg?seed={avatar_seed}",
+                            src=avatar_src(avatar_seed),
                             class_name="size-8 rounded-full bg-white border border-gray-100 shadow-sm hover:scale-105 transition-transform",
                         ),
                         href=f"/profile/{msg.sender}",
@@ -210,7 +221,7 @@ def message_bubble(msg: ChatMessage) -> rx.Component:
                         rx.el.div(
                             rx.el.p(msg.content, class_name="text-sm leading-relaxed"),
                             rx.el.span(
-                                msg.timestamp,
+                                local_time(msg.timestamp),
                                 class_name=rx.cond(
                                     is_me,
                                     "text-[10px] text-violet-200 mt-1 block text-right opacity-80",
@@ -233,7 +244,9 @@ def message_bubble(msg: ChatMessage) -> rx.Component:
                 ),
             ),
         ),
-        class_name="w-full animate-in fade-in slide-in-from-bottom-2 duration-300",
+        # Keyed by the (string) id so the virtual list keeps rows (and their heights) across prepends.
+        key=msg.id,
+        class_name="w-full",
     )
 
 
@@ -241,7 +254,7 @@ def user_list_item(user: UserProfile) -> rx.Component:
     return rx.el.a(
         rx.el.div(
             rx.image(
-                src=f"https://api.dicebear.com/9.x/notionists/svg?seed={user.avatar_seed}",
+                src=avatar_src(user.avatar_seed, user.username),
                 class_name="size-8 rounded-full bg-violet-100",
             ),
             rx.el.div(
@@ -342,16 +355,25 @@ def chat_area() -> rx.Component:
         ),
         rx.el.div(
             rx.el.div(
-                rx.el.div(
+                virtual_list(
                     rx.foreach(RoomState.messages, message_bubble),
+                    has_more=RoomState.has_older_messages,
+                    on_reach_top=RoomState.load_older_messages,
+                    fresh_item_class_name="animate-in fade-in slide-in-from-bottom-2 duration-300",
                     class_name="flex-1 overflow-y-auto p-6 flex flex-col",
                 ),
                 rx.el.div(
+                    signal_channel(
+                        room=RoomState.room_name,
+                        input_id="message-input",
+                        class_name="w-full max-w-4xl mx-auto h-5 px-2 mb-1 text-xs text-gray-500 truncate",
+                    ),
                     rx.el.form(
                         rx.el.div(
                             rx.el.input(
                                 placeholder="Type a message...",
                                 name="message",
+                                id="message-input",
                                 autocomplete="off",
                                 class_name="flex-1 bg-gray-50 border-0 focus:ring-0 rounded-xl px-4 py-3 text-gray-900 placeholder:text-gray-400",
                             ),
@@ -362,11 +384,13 @@ def chat_area() -> rx.Component:
                             ),
                             class_name="flex items-center gap-3 bg-white p-2 rounded-2xl border border-gray-200 shadow-sm focus-within:ring-2 focus-within:ring-violet-500/20 focus-within:border-violet-500 transition-all",
                         ),
-                        on_submit=RoomState.send_message,
+                        # The idempotency key is generated when the submit event is created,
+                        # so a replay after a reconnect carries the same key.
+                        on_submit=lambda form_data: RoomState.send_message(form_data, SEND_KEY),
                         reset_on_submit=True,
                         class_name="w-full max-w-4xl mx-auto",
                     ),
-                    class_name="p-6 bg-white border-t border-gray-200",
+                    class_name="px-6 pt-2 pb-6 bg-white border-t border-gray-200",
                 ),
                 class_name="flex-1 flex flex-col h-full overflow-hidden bg-[#FAFAFA] min-w-0",
             ),
@@ -399,10 +423,9 @@ def chat_dashboard() -> rx.Component:
         sidebar(),
         rx.cond(RoomState.in_room, chat_area(), empty_state()),
         class_name="flex h-[calc(100vh-73px)] overflow-hidden bg-gray-50/50",
-        # Ensure lobby link exists so room list is populated even after reloads.
-        on_mount=[GlobalLobbyState.join_lobby, RoomState.rejoin_last_room, RoomState.heartbeat, RoomState.seed_all_room_read_counts],
+        # One bootstrap event links the lobby, seeds unread counts, and rejoins the last room.
+        on_mount=RoomState.bootstrap,
+        # Presence pings between focus events go over the signal channel, not state.
         on_focus=RoomState.heartbeat,
-        on_mouse_enter=RoomState.heartbeat,
-        on_mouse_move=RoomState.heartbeat,
         tab_index=0,
     )
\ No newline at end of file
@@ -0,0 +1,16 @@
+from reflex.vars.base import Var
+
+_TIME_OPTIONS = "{hour: '2-digit', minute: '2-digit'}"
+_DATE_TIME_OPTIONS = "{year: 'numeric', month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit'}"
+
+
+def local_time(epoch_ms: Var, with_date: bool = False) -> Var[str]:
+    """Format UTC epoch milliseconds in the viewer's locale and timezone (in the browser)."""
+
+    method, options = (
+        ("toLocaleString", _DATE_TIME_OPTIONS) if with_date else ("toLocaleTimeString", _TIME_OPTIONS)
+    )
+    return Var(
+        _js_expr=f"new Date({epoch_ms!s}).{method}([], {options})",
+        _var_data=epoch_ms._get_all_var_data(),
+    ).to(str)
@@ -2,6 +2,7 @@ import reflex as rx
 from relack.states.auth_state import AuthState
 from relack.states.shared_state import GlobalLobbyState
 from relack.states.admin_state import AdminState
+from relack.components.avatar import avatar_src
 
 
 def navbar() -> rx.Component:
@@ -47,7 +48,7 @@ def navbar() -> rx.Component:
                         rx.el.a(
                             rx.el.div(
                                 rx.image(
-                                    src=f"https://api.dicebear.com/9.x/notionists/svg?seed={AuthState.user.avatar_seed}",
+                                    src=avatar_src(AuthState.user.avatar_seed, AuthState.user.username),
                                     class_name="h-8 w-8 rounded-full bg-violet-100",
                                 ),
                                 rx.el.div(
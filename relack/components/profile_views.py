@@ -1,5 +1,6 @@
 import reflex as rx
 from relack.states.auth_state import AuthState
+from relack.components.avatar import avatar_src
 
 
 def profile_detail_item(label: str, value: str) -> rx.Component:
@@ -65,7 +66,7 @@ def profile_view() -> rx.Component:
                         ),
                         rx.el.div(
                             rx.image(
-                                src=f"https://api.dicebear.com/9.x/notionists/svg?seed={user.avatar_seed}",
+                                src=avatar_src(user.avatar_seed, user.username),
                                 class_name="h-32 w-32 rounded-full border-4 border-white shadow-lg bg-white",
                             ),
                             class_name="absolute -bottom-16 left-8",
@@ -0,0 +1,21 @@
+import reflex as rx
+from reflex.vars.base import Var
+
+
+class SignalChannel(rx.Component):
+    """Ephemeral room signals (``assets/signal_channel.js``); shows who is typing.
+
+    Talks to ``relack.api.signals`` over its own WebSocket, so presence pings
+    and typing never go through Reflex state.
+    """
+
+    library = "$/public/signal_channel.js"
+    tag = "SignalChannel"
+
+    # Room the client has joined; the channel reconnects when it changes.
+    room: Var[str]
+    # id of the message input whose keystrokes publish "typing".
+    input_id: Var[str]
+
+
+signal_channel = SignalChannel.create
@@ -0,0 +1,28 @@
+import reflex as rx
+from reflex.vars.base import Var
+
+
+class VirtualList(rx.Component):
+    """Scroll container that only mounts the children in view (``assets/virtual_list.js``).
+
+    Children must have stable keys (e.g. a message id) so heights, scroll
+    position and entry animations follow the row rather than its index.
+    """
+
+    library = "$/public/virtual_list.js"
+    tag = "VirtualList"
+
+    # Height assumed for rows that have not been measured yet.
+    estimated_item_height: Var[int]
+    # Extra pixels above and below the viewport to keep mounted.
+    overscan: Var[int]
+    # Whether older rows can be requested through on_reach_top.
+    has_more: Var[bool]
+    # Applied to rows appended while the list is on screen (e.g. new messages).
+    fresh_item_class_name: Var[str]
+
+    # Fired (once per list length) when the reader scrolls near the top.
+    on_reach_top: rx.EventHandler[rx.event.no_args_event_spec]
+
+
+virtual_list = VirtualList.create
@@ -1,5 +1,6 @@
 import reflex as rx
-from typing import Optional
+import sys
+from typing import Any, NamedTuple, Optional
 from pydantic import BaseModel
 import datetime
 
@@ -16,14 +17,63 @@ class UserProfile(BaseModel):
 
 
 class ChatMessage(BaseModel):
+    # Snowflake ID (relack.services.ids) as a string: it exceeds JavaScript's
+    # safe integer range, so a number would be rounded in the browser.
     id: str
     sender: str
     display_name: str = ""
     content: str
-    timestamp: str
+    timestamp: int  # UTC epoch milliseconds; formatted client-side
     is_system: bool = False
 
 
+class StoredMessage(NamedTuple):
+    """Compact record used for stored chat history.
+
+    Tuple-backed (no per-instance dict, never wrapped by Reflex's mutation
+    proxy); sender names are interned and display names are not copied per
+    message but resolved from profiles when read. Convert to ChatMessage only
+    at the serialization boundary.
+    """
+
+    id: int
+    sender: str
+    content: str
+    timestamp: int
+    is_system: bool = False
+
+    @classmethod
+    def create(
+        cls, id: int, sender: str, content: str, timestamp: int, is_system: bool = False
+    ) -> "StoredMessage":
+        return cls(id, sys.intern(sender), content, timestamp, is_system)
+
+    @classmethod
+    def from_payload(cls, data: dict[str, Any]) -> "StoredMessage":
+        """Build from an exported/ChatMessage-shaped dict (display_name is ignored)."""
+
+        return cls.create(
+            id=int(data["id"]),
+            sender=str(data["sender"]),
+            content=str(data["content"]),
+            timestamp=int(data["timestamp"]),
+            is_system=bool(data.get("is_system", False)),
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        return self._asdict()
+
+    def to_chat_message(self, display_name: str = "") -> ChatMessage:
+        return ChatMessage(
+            id=str(self.id),
+            sender=self.sender,
+            display_name=display_name,
+            content=self.content,
+            timestamp=self.timestamp,
+            is_system=self.is_system,
+        )
+
+
 class ChatMessageLog(BaseModel):
     """Wraps a chat message with its room origin for admin viewing."""
 
@@ -38,6 +88,36 @@ class RoomInfo(BaseModel):
     created_by: str = "System"
 
 
+class AdminUserRow(BaseModel):
+    """User listing row for the admin dashboard (a profile without its auth token)."""
+
+    username: str
+    email: str = ""
+    nickname: str = ""
+    is_guest: bool = False
+    created_at: str = ""
+
+    @classmethod
+    def from_profile(cls, profile: UserProfile) -> "AdminUserRow":
+        return cls(
+            username=profile.username,
+            email=profile.email,
+            nickname=profile.nickname,
+            is_guest=profile.is_guest,
+            created_at=profile.created_at,
+        )
+
+
+class AdminRoomRow(BaseModel):
+    """Room listing row for the admin dashboard."""
+
+    name: str
+    description: str = ""
+    created_by: str = ""
+    message_count: int = 0
+    last_activity: int = 0  # epoch ms of the newest message; 0 if none
+
+
 class PermissionConfig(BaseModel):
     """Snapshot of admin permissions toggles for backup/restore."""
 
@@ -48,4 +128,40 @@ class PermissionConfig(BaseModel):
     guest_can_view_profiles: bool = False
     google_can_create_room: bool = False
     google_can_mention_users: bool = False
-    google_can_view_profiles: bool = False
\ No newline at end of file
+    google_can_view_profiles: bool = False
+    # Rate limits per role (0 = unlimited); see relack.services.rate_limit.
+    guest_messages_per_minute: int = 30
+    google_messages_per_minute: int = 60
+    guest_rooms_per_hour: int = 3
+    google_rooms_per_hour: int = 10
+    guest_joins_per_minute: int = 20
+    google_joins_per_minute: int = 30
+
+
+class RetentionPolicy(BaseModel):
+    """Per-room history limits enforced by the background compactor (0 = unlimited)."""
+
+    max_count: int = 200
+    max_age_hours: int = 0
+    max_bytes: int = 0
+    archive_expired: bool = True  # move to the cold archive instead of dropping
+
+    def summary(self) -> str:
+        parts = [f"{self.max_count} msgs" if self.max_count else "any count"]
+        if self.max_age_hours:
+            parts.append(f"{self.max_age_hours} h")
+        if self.max_bytes:
+            parts.append(f"{self.max_bytes // 1024} KB")
+        parts.append("archive" if self.archive_expired else "drop")
+        return " · ".join(parts)
+
+
+class RoomStorageInfo(BaseModel):
+    """Hot-history footprint of a room plus its effective retention policy."""
+
+    room_name: str
+    message_count: int = 0
+    memory_kb: float = 0.0
+    archived_count: int = 0
+    policy_summary: str = ""
+    has_custom_policy: bool = False
@@ -1,10 +1,14 @@
 import reflex as rx
 from relack.states.admin_state import AdminState
+from relack.states.admin_table_state import AdminTableState
 from relack.states.shared_state import GlobalLobbyState
 from relack.states.profile_state import ProfileState
 from relack.states.permission_state import PermissionState
+from relack.states.retention_state import RetentionState
+from relack.states.metrics_state import MetricsState
 from relack.components.profile_views import profile_view
 from relack.components.navbar import navbar
+from relack.components.formatting import local_time
 
 def login_panel():
     return rx.el.div(
@@ -43,24 +47,86 @@ def login_panel():
         class_name="min-h-[calc(100vh-80px)] flex items-center justify-center p-4 relative",
     )
 
+def table_toolbar(table: str, placeholder: str, filter_value):
+    return rx.el.div(
+        rx.input(
+            value=filter_value,
+            on_change=lambda value: AdminTableState.set_filter(table, value),
+            debounce_timeout=300,
+            placeholder=placeholder,
+            class_name="w-72",
+        ),
+        rx.el.button(
+            rx.icon("refresh-cw", class_name="h-4 w-4"),
+            on_click=AdminTableState.refresh(table),
+            class_name="p-2 text-gray-500 hover:text-violet-600 hover:bg-gray-50 rounded-lg border border-gray-200",
+        ),
+        class_name="flex items-center gap-2",
+    )
+
+
+def sortable_header(label: str, table: str, column: str, sort_var, desc_var):
+    return rx.table.column_header_cell(
+        rx.el.button(
+            label,
+            rx.cond(sort_var == column, rx.cond(desc_var, " ↓", " ↑"), ""),
+            on_click=AdminTableState.sort_by(table, column),
+            class_name="font-semibold hover:text-violet-700",
+        )
+    )
+
+
+def table_pager(table: str, page_var, page_count_var, total_var):
+    return rx.el.div(
+        rx.el.span(
+            total_var.to_string(),
+            " total · page ",
+            (page_var + 1).to_string(),
+            " of ",
+            page_count_var.to_string(),
+            class_name="text-sm text-gray-500",
+        ),
+        rx.el.div(
+            rx.el.button(
+                "Previous",
+                on_click=AdminTableState.change_page(table, -1),
+                disabled=page_var == 0,
+                class_name="px-3 py-1.5 text-sm font-medium text-gray-700 border border-gray-200 rounded-lg hover:bg-gray-50 disabled:opacity-40",
+            ),
+            rx.el.button(
+                "Next",
+                on_click=AdminTableState.change_page(table, 1),
+                disabled=page_var + 1 >= page_count_var,
+                class_name="px-3 py-1.5 text-sm font-medium text-gray-700 border border-gray-200 rounded-lg hover:bg-gray-50 disabled:opacity-40",
+            ),
+            class_name="flex gap-2",
+        ),
+        class_name="flex items-center justify-between",
+    )
+
+
 def users_table():
     return rx.el.div(
-        rx.el.h2("User Profiles", class_name="text-xl font-bold text-gray-800 mb-4"),
+        rx.el.div(
+            rx.el.h2("User Profiles", class_name="text-xl font-bold text-gray-800"),
+            table_toolbar("users", "Filter by username, nickname, or email", AdminTableState.users_filter),
+            class_name="flex items-center justify-between mb-4",
+        ),
         rx.el.div(
             rx.table.root(
                 rx.table.header(
                     rx.table.row(
-                        rx.table.column_header_cell("Username"),
+                        sortable_header("Username", "users", "username", AdminTableState.users_sort, AdminTableState.users_desc),
                         rx.table.column_header_cell("Nickname"),
                         rx.table.column_header_cell("Email"),
                         rx.table.column_header_cell("Is Guest"),
-                        rx.table.column_header_cell("Created At"),
+                        sortable_header("Created At", "users", "created_at", AdminTableState.users_sort, AdminTableState.users_desc),
                         rx.table.column_header_cell("More"),
                     )
                 ),
                 rx.table.body(
                     rx.foreach(
-                        GlobalLobbyState.all_profiles,
+                        AdminTableState.user_rows,
                         lambda user: rx.table.row(
                             rx.table.cell(user.username),
                             rx.table.cell(user.nickname),
@@ -84,6 +150,7 @@ def users_table():
             ),
             class_name="bg-white rounded-xl shadow-sm border border-gray-100 overflow-hidden",
         ),
+        table_pager("users", AdminTableState.users_page, AdminTableState.users_page_count, AdminTableState.users_total),
         rx.dialog.root(
             rx.dialog.content(
                 profile_view(),
@@ -97,23 +164,33 @@ def users_table():
 
 def rooms_table():
     return rx.el.div(
-        rx.el.h2("Active Rooms", class_name="text-xl font-bold text-gray-800 mb-4"),
+        rx.el.div(
+            rx.el.h2("Active Rooms", class_name="text-xl font-bold text-gray-800"),
+            table_toolbar("rooms", "Filter by name, description, or creator", AdminTableState.rooms_filter),
+            class_name="flex items-center justify-between mb-4",
+        ),
         rx.el.div(
             rx.table.root(
                 rx.table.header(
                     rx.table.row(
-                        rx.table.column_header_cell("Name"),
+                        sortable_header("Name", "rooms", "name", AdminTableState.rooms_sort, AdminTableState.rooms_desc),
                         rx.table.column_header_cell("Description"),
                         rx.table.column_header_cell("Created By"),
+                        sortable_header("Messages", "rooms", "message_count", AdminTableState.rooms_sort, AdminTableState.rooms_desc),
+                        sortable_header("Last Activity", "rooms", "activity", AdminTableState.rooms_sort, AdminTableState.rooms_desc),
                     )
                 ),
                 rx.table.body(
                     rx.foreach(
-                        GlobalLobbyState.room_list,
+                        AdminTableState.room_rows,
                         lambda room: rx.table.row(
                             rx.table.cell(room.name),
                             rx.table.cell(room.description),
                             rx.table.cell(room.created_by),
+                            rx.table.cell(room.message_count),
+                            rx.table.cell(
+                                rx.cond(room.last_activity > 0, local_time(room.last_activity, with_date=True), "—")
+                            ),
                         ),
                     )
                 ),
@@ -122,32 +199,37 @@ def rooms_table():
             ),
             class_name="bg-white rounded-xl shadow-sm border border-gray-100 overflow-hidden",
         ),
+        table_pager("rooms", AdminTableState.rooms_page, AdminTableState.rooms_page_count, AdminTableState.rooms_total),
         class_name="space-y-4",
     )
 
 
 def messages_table():
     return rx.el.div(
-        rx.el.h2("Recent Messages", class_name="text-xl font-bold text-gray-800 mb-4"),
+        rx.el.div(
+            rx.el.h2("Recent Messages", class_name="text-xl font-bold text-gray-800"),
+            table_toolbar("messages", "Filter by room, sender, or content", AdminTableState.messages_filter),
+            class_name="flex items-center justify-between mb-4",
+        ),
         rx.el.div(
             rx.table.root(
                 rx.table.header(
                     rx.table.row(
-                        rx.table.column_header_cell("Room"),
+                        sortable_header("Room", "messages", "room", AdminTableState.messages_sort, AdminTableState.messages_desc),
                         rx.table.column_header_cell("Sender"),
                         rx.table.column_header_cell("Content"),
-                        rx.table.column_header_cell("Time"),
+                        sortable_header("Time", "messages", "time", AdminTableState.messages_sort, AdminTableState.messages_desc),
                         rx.table.column_header_cell("Type"),
                     )
                 ),
                 rx.table.body(
                     rx.foreach(
-                        GlobalLobbyState.recent_message_logs,
+                        AdminTableState.message_rows,
                         lambda log: rx.table.row(
                             rx.table.cell(log.room_name),
                             rx.table.cell(log.message.sender),
                             rx.table.cell(log.message.content),
-                            rx.table.cell(log.message.timestamp),
+                            rx.table.cell(local_time(log.message.timestamp, with_date=True)),
                             rx.table.cell(rx.cond(log.message.is_system, "System", "User")),
                         ),
                     )
@@ -157,17 +239,298 @@ def messages_table():
             ),
             class_name="bg-white rounded-xl shadow-sm border border-gray-100 overflow-hidden",
         ),
+        table_pager("messages", AdminTableState.messages_page, AdminTableState.messages_page_count, AdminTableState.messages_total),
+        class_name="space-y-4",
+    )
+
+
+def stat_tile(label: str, value):
+    return rx.el.div(
+        rx.el.span(label, class_name="text-xs font-medium text-gray-500 uppercase tracking-wide"),
+        rx.el.span(value, class_name="text-2xl font-bold text-gray-900"),
+        class_name="flex flex-col gap-1 bg-white p-4 rounded-xl border border-gray-100 shadow-sm",
+    )
+
+
+def analytics_panel():
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h2("Activity", class_name="text-xl font-bold text-gray-800"),
+            rx.el.div(
+                rx.segmented_control.root(
+                    rx.segmented_control.item("Last 2 min", value="1s"),
+                    rx.segmented_control.item("Last 2 h", value="1m"),
+                    rx.segmented_control.item("Last 7 days", value="1h"),
+                    value=MetricsState.resolution,
+                    on_change=MetricsState.set_resolution,
+                ),
+                rx.el.button(
+                    rx.icon("refresh-cw", class_name="h-4 w-4"),
+                    on_click=MetricsState.load_metrics,
+                    class_name="p-2 text-gray-500 hover:text-violet-600 hover:bg-gray-50 rounded-lg border border-gray-200",
+                ),
+                class_name="flex items-center gap-2",
+            ),
+            class_name="flex items-center justify-between mb-4",
+        ),
+        rx.el.div(
+            stat_tile("Messages", MetricsState.summary["messages_total"]),
+            stat_tile("Peak / p95 per bucket", rx.el.span(MetricsState.summary["messages_peak"], " / ", MetricsState.summary["messages_p95"])),
+            stat_tile("Joins / Leaves", rx.el.span(MetricsState.summary["joins_total"], " / ", MetricsState.summary["leaves_total"])),
+            stat_tile("Active users (now / peak)", rx.el.span(MetricsState.summary["active_users_now"], " / ", MetricsState.summary["active_users_peak"])),
+            class_name="grid grid-cols-2 lg:grid-cols-4 gap-4",
+        ),
+        rx.el.div(
+            stat_tile("Rate-limited sends", MetricsState.rate_limits["send_message_rejected"]),
+            stat_tile("Rate-limited joins", MetricsState.rate_limits["join_room_rejected"]),
+            stat_tile("Rate-limited room creations", MetricsState.rate_limits["create_room_rejected"]),
+            stat_tile("Rejections guest / Google", rx.el.span(MetricsState.rate_limits["guest_rejected"], " / ", MetricsState.rate_limits["google_rejected"])),
+            class_name="grid grid-cols-2 lg:grid-cols-4 gap-4",
+        ),
+        rx.el.div(
+            stat_tile("Send queue depth (max now / peak)", rx.el.span(MetricsState.outbound["max_queue_depth"], " / ", MetricsState.outbound["peak_queue_depth"])),
+            stat_tile("Lagging sessions", MetricsState.outbound["lagging_sessions"]),
+            stat_tile("Forced resyncs / collapsed updates", rx.el.span(MetricsState.outbound["forced_resyncs"], " / ", MetricsState.outbound["collapsed_updates"])),
+            stat_tile("Shared frames (encoded / sent)", rx.el.span(MetricsState.outbound["frames_encoded"], " / ", MetricsState.outbound["frame_sends"])),
+            class_name="grid grid-cols-2 lg:grid-cols-4 gap-4",
+        ),
+        rx.el.div(
+            stat_tile("Room flush window (ms)", MetricsState.flush["window_ms"]),
+            stat_tile("Changes per flush (p50 / max)", rx.el.span(MetricsState.flush["batch_size_p50"], " / ", MetricsState.flush["batch_size_max"])),
+            stat_tile("Client updates (sent / coalesced)", rx.el.span(MetricsState.flush["client_updates"], " / ", MetricsState.flush["coalesced_updates"])),
+            stat_tile("Added latency ms (p95 / max)", rx.el.span(MetricsState.flush["flush_delay_p95_ms"], " / ", MetricsState.flush["flush_delay_max_ms"])),
+            class_name="grid grid-cols-2 lg:grid-cols-4 gap-4",
+        ),
+        rx.el.div(
+            stat_tile("Signal connections", MetricsState.signals["connections"]),
+            stat_tile("Live signals (typing, presence)", MetricsState.signals["live_signals"]),
+            stat_tile("Signals (published / delivered)", rx.el.span(MetricsState.signals["signals_published"], " / ", MetricsState.signals["signals_delivered"])),
+            stat_tile("Signals (expired / dropped)", rx.el.span(MetricsState.signals["signals_expired"], " / ", MetricsState.signals["signals_dropped"])),
+            class_name="grid grid-cols-2 lg:grid-cols-4 gap-4",
+        ),
+        rx.el.div(
+            stat_tile("Read API requests", MetricsState.read_api["requests"]),
+            stat_tile("Not modified (304)", MetricsState.read_api["not_modified"]),
+            stat_tile("Cache (fresh / revalidated)", rx.el.span(MetricsState.read_api["fresh_hits"], " / ", MetricsState.read_api["revalidated"])),
+            stat_tile("Responses built", MetricsState.read_api["built"]),
+            class_name="grid grid-cols-2 lg:grid-cols-4 gap-4",
+        ),
+        rx.el.div(
+            rx.el.h3("Messages, joins and leaves", class_name="font-semibold text-gray-800 mb-2"),
+            rx.recharts.bar_chart(
+                rx.recharts.bar(data_key="messages", fill="#7c3aed", is_animation_active=False),
+                rx.recharts.bar(data_key="joins", fill="#10b981", is_animation_active=False),
+                rx.recharts.bar(data_key="leaves", fill="#f59e0b", is_animation_active=False),
+                rx.recharts.x_axis(data_key="label", min_tick_gap=24),
+                rx.recharts.y_axis(allow_decimals=False),
+                rx.recharts.graphing_tooltip(),
+                rx.recharts.legend(),
+                data=MetricsState.chart_rows,
+                width="100%",
+                height=260,
+            ),
+            class_name="bg-white p-4 rounded-xl border border-gray-100 shadow-sm",
+        ),
+        rx.el.div(
+            rx.el.div(
+                rx.el.h3("Active users", class_name="font-semibold text-gray-800 mb-2"),
+                rx.recharts.line_chart(
+                    rx.recharts.line(data_key="active_users", stroke="#4f46e5", dot=False, is_animation_active=False),
+                    rx.recharts.x_axis(data_key="label", min_tick_gap=24),
+                    rx.recharts.y_axis(allow_decimals=False),
+                    rx.recharts.graphing_tooltip(),
+                    data=MetricsState.chart_rows,
+                    width="100%",
+                    height=220,
+                ),
+                class_name="bg-white p-4 rounded-xl border border-gray-100 shadow-sm",
+            ),
+            rx.el.div(
+                rx.el.h3("Busiest rooms", class_name="font-semibold text-gray-800 mb-2"),
+                rx.recharts.bar_chart(
+                    rx.recharts.bar(data_key="messages", fill="#7c3aed", is_animation_active=False),
+                    rx.recharts.bar(data_key="joins", fill="#10b981", is_animation_active=False),
+                    rx.recharts.bar(data_key="leaves", fill="#f59e0b", is_animation_active=False),
+                    rx.recharts.bar(data_key="active_users", name="peak active users", fill="#4f46e5", is_animation_active=False),
+                    rx.recharts.x_axis(type_="number", allow_decimals=False),
+                    rx.recharts.y_axis(data_key="room", type_="category", width=100),
+                    rx.recharts.graphing_tooltip(),
+                    rx.recharts.legend(),
+                    data=MetricsState.top_rooms,
+                    layout="vertical",
+                    width="100%",
+                    height=220,
+                ),
+                class_name="bg-white p-4 rounded-xl border border-gray-100 shadow-sm",
+            ),
+            class_name="grid gap-4 lg:grid-cols-2",
+        ),
+        rx.cond(
+            MetricsState.slow_sessions.length() > 0,
+            rx.el.div(
+                rx.el.h3("Slowest sessions", class_name="font-semibold text-gray-800 mb-2"),
+                rx.table.root(
+                    rx.table.header(
+                        rx.table.row(
+                            rx.table.column_header_cell("Session"),
+                            rx.table.column_header_cell("Queued updates"),
+                            rx.table.column_header_cell("Queued bytes"),
+                        )
+                    ),
+                    rx.table.body(
+                        rx.foreach(
+                            MetricsState.slow_sessions,
+                            lambda row: rx.table.row(
+                                rx.table.cell(row["session"]),
+                                rx.table.cell(row["depth"]),
+                                rx.table.cell(row["bytes"]),
+                            ),
+                        )
+                    ),
+                    variant="surface",
+                    width="100%",
+                ),
+                class_name="bg-white p-4 rounded-xl border border-gray-100 shadow-sm",
+            ),
+        ),
         class_name="space-y-4",
     )
 
 
+def retention_input(label: str, value, on_change):
+    return rx.el.label(
+        rx.el.span(label, class_name="text-xs font-medium text-gray-600"),
+        rx.el.input(
+            input_mode="numeric",
+            value=value,
+            on_change=on_change,
+            class_name="w-full px-3 py-2 border border-gray-200 rounded-lg text-sm",
+        ),
+        class_name="flex flex-col gap-1",
+    )
+
+
+def retention_editor():
+    return rx.cond(
+        RetentionState.editing_room != "",
+        rx.el.div(
+            rx.el.span(
+                "Editing: ",
+                rx.cond(RetentionState.editing_room == "*", "Default (all rooms)", RetentionState.editing_room),
+                class_name="text-sm font-medium text-gray-800",
+            ),
+            rx.el.div(
+                retention_input("Max messages (0 = no limit)", RetentionState.max_count, RetentionState.set_max_count),
+                retention_input("Max age, hours (0 = no limit)", RetentionState.max_age_hours, RetentionState.set_max_age_hours),
+                retention_input("Max memory, KB (0 = no limit)", RetentionState.max_kb, RetentionState.set_max_kb),
+                class_name="grid grid-cols-3 gap-3",
+            ),
+            permission_toggle(
+                "Archive expired messages",
+                "If off, expired messages are dropped instead of written to the cold archive.",
+                RetentionState.archive_expired,
+                RetentionState.set_archive_expired,
+            ),
+            rx.el.div(
+                rx.el.button(
+                    "Save policy",
+                    on_click=RetentionState.save_policy,
+                    class_name="px-4 py-2 bg-violet-600 hover:bg-violet-700 text-white rounded-lg font-medium transition-colors shadow-sm",
+                ),
+                rx.el.button(
+                    "Cancel",
+                    on_click=RetentionState.cancel_edit,
+                    class_name="px-3 py-2 text-sm font-medium text-gray-600 hover:text-gray-900 hover:bg-gray-50 rounded-lg border border-gray-200",
+                ),
+                class_name="flex items-center gap-3",
+            ),
+            class_name="space-y-3 p-3 bg-gray-50 rounded-lg border border-gray-200",
+        ),
+    )
+
+
+def retention_section():
+    return rx.el.div(
+        rx.el.div(
+            rx.el.div(
+                rx.el.h4("Retention", class_name="font-semibold text-gray-800"),
+                rx.el.button(
+                    rx.icon("refresh-cw", class_name="h-4 w-4"),
+                    on_click=RetentionState.load_storage,
+                    class_name="p-2 text-gray-500 hover:text-violet-600 hover:bg-gray-50 rounded-lg border border-gray-200",
+                ),
+                class_name="flex items-center justify-between",
+            ),
+            rx.el.p(
+                "Per-room history limits. Expired messages are compacted in the background; memory figures are as of the last refresh.",
+                class_name="text-sm text-gray-500",
+            ),
+            rx.table.root(
+                rx.table.header(
+                    rx.table.row(
+                        rx.table.column_header_cell("Room"),
+                        rx.table.column_header_cell("Messages"),
+                        rx.table.column_header_cell("Memory (KB)"),
+                        rx.table.column_header_cell("Archived"),
+                        rx.table.column_header_cell("Policy"),
+                        rx.table.column_header_cell(""),
+                    )
+                ),
+                rx.table.body(
+                    rx.foreach(
+                        RetentionState.storage_rows,
+                        lambda row: rx.table.row(
+                            rx.table.cell(rx.cond(row.room_name == "*", "Default", row.room_name)),
+                            rx.table.cell(rx.cond(row.room_name == "*", "", row.message_count)),
+                            rx.table.cell(rx.cond(row.room_name == "*", "", row.memory_kb)),
+                            rx.table.cell(rx.cond(row.room_name == "*", "", row.archived_count)),
+                            rx.table.cell(
+                                row.policy_summary,
+                                class_name=rx.cond(row.has_custom_policy, "font-medium", "text-gray-500"),
+                            ),
+                            rx.table.cell(
+                                rx.el.div(
+                                    rx.el.button(
+                                        "Edit",
+                                        on_click=RetentionState.edit_room(row.room_name),
+                                        class_name="text-sm text-violet-600 hover:text-violet-800",
+                                    ),
+                                    rx.cond(
+                                        row.has_custom_policy,
+                                        rx.el.button(
+                                            "Reset",
+                                            on_click=RetentionState.clear_policy(row.room_name),
+                                            class_name="text-sm text-gray-500 hover:text-gray-800",
+                                        ),
+                                    ),
+                                    class_name="flex gap-3",
+                                )
+                            ),
+                        ),
+                    )
+                ),
+                variant="surface",
+                width="100%",
+            ),
+            retention_editor(),
+            rx.el.button(
+                "Compact now",
+                on_click=RetentionState.compact_now,
+                class_name="px-4 py-2 bg-gray-800 hover:bg-black text-white rounded-lg font-medium transition-colors shadow-sm w-fit",
+            ),
+            class_name="space-y-3",
+        ),
+        class_name="py-4",
+    )
+
+
 def data_maintenance_card():
     return rx.el.div(
         rx.el.div(
             rx.el.div(
                 rx.el.h3("Data Maintenance", class_name="text-lg font-semibold text-gray-900"),
                 rx.el.p(
-                    "Import, export, and clear data in one place.",
+                    "Retention, import, export, and clearing of data in one place.",
                     class_name="text-sm text-gray-500",
                 ),
                 class_name="space-y-1",
@@ -175,6 +538,7 @@ def data_maintenance_card():
             class_name="flex items-start justify-between",
         ),
         rx.el.div(
+            retention_section(),
             rx.el.div(
                 rx.el.div(
                     rx.el.h4("Clear Data", class_name="font-semibold text-gray-800"),
@@ -189,7 +553,7 @@ def data_maintenance_card():
                     ),
                     class_name="space-y-3",
                 ),
-                class_name="py-4",
+                class_name="py-4 border-t border-gray-100",
             ),
             rx.el.div(
                 rx.el.div(
@@ -207,7 +571,7 @@ def data_maintenance_card():
                         class_name="flex items-center gap-3",
                     ),
                     rx.text_area(
-                        value=GlobalLobbyState.export_payload,
+                        value=AdminState.export_payload,
                         read_only=True,
                         rows="8",
                         class_name="w-full font-mono text-sm bg-gray-50 border border-gray-200 rounded-lg p-3",
@@ -216,7 +580,7 @@ def data_maintenance_card():
                     rx.el.div(
                         rx.button(
                             "Copy",
-                            on_click=rx.set_clipboard(GlobalLobbyState.export_payload),
+                            on_click=rx.set_clipboard(AdminState.export_payload),
                             class_name="px-3 py-2 bg-gray-800 hover:bg-black text-white rounded-lg text-sm font-medium",
                         ),
                         class_name="flex justify-end",
@@ -233,8 +597,8 @@ def data_maintenance_card():
                         class_name="text-sm text-gray-500",
                     ),
                     rx.text_area(
-                        value=GlobalLobbyState.import_payload,
-                        on_change=GlobalLobbyState.set_import_payload,
+                        value=AdminState.import_payload,
+                        on_change=AdminState.set_import_payload,
                         rows="8",
                         class_name="w-full font-mono text-sm bg-white border border-gray-200 rounded-lg p-3",
                         placeholder="Paste exported JSON here",
@@ -242,7 +606,7 @@ def data_maintenance_card():
                     rx.el.div(
                         rx.el.button(
                             "Import Data",
-                            on_click=lambda: GlobalLobbyState.import_data(GlobalLobbyState.import_payload),
+                            on_click=lambda: GlobalLobbyState.import_data(AdminState.import_payload),
                             class_name="px-4 py-2 bg-emerald-600 hover:bg-emerald-700 text-white rounded-lg font-medium transition-colors shadow-sm",
                         ),
                         class_name="flex justify-end",
@@ -397,6 +761,23 @@ def permissions_card():
                 ),
                 class_name="py-3 space-y-2",
             ),
+            rx.el.div(
+                rx.el.span("Rate Limits", class_name="text-xs font-semibold text-gray-500 uppercase tracking-wide"),
+                rx.el.p(
+                    "Per user and per browser session. Excess actions are rejected with a notice; 0 disables a limit.",
+                    class_name="text-xs text-gray-500",
+                ),
+                rx.el.div(
+                    retention_input("Guest messages / min", PermissionState.guest_messages_per_minute, PermissionState.set_guest_messages_per_minute),
+                    retention_input("Google messages / min", PermissionState.google_messages_per_minute, PermissionState.set_google_messages_per_minute),
+                    retention_input("Guest room joins / min", PermissionState.guest_joins_per_minute, PermissionState.set_guest_joins_per_minute),
+                    retention_input("Google room joins / min", PermissionState.google_joins_per_minute, PermissionState.set_google_joins_per_minute),
+                    retention_input("Guest rooms created / h", PermissionState.guest_rooms_per_hour, PermissionState.set_guest_rooms_per_hour),
+                    retention_input("Google rooms created / h", PermissionState.google_rooms_per_hour, PermissionState.set_google_rooms_per_hour),
+                    class_name="grid grid-cols-2 gap-3",
+                ),
+                class_name="py-3 space-y-2",
+            ),
             rx.el.div(
                 rx.el.button(
                     "Save changes",
@@ -463,6 +844,7 @@ def admin_dashboard():
                         rx.tabs.trigger("Users", value="users", on_click=AdminState.close_settings_menu),
                         rx.tabs.trigger("Rooms", value="rooms", on_click=AdminState.close_settings_menu),
                         rx.tabs.trigger("Messages", value="messages", on_click=AdminState.close_settings_menu),
+                        rx.tabs.trigger("Analytics", value="analytics", on_click=AdminState.close_settings_menu),
                         rx.tabs.trigger(
                             rx.el.div(
                                 rx.el.span("Settings", class_name="mr-1"),
@@ -513,6 +895,11 @@ def admin_dashboard():
                     value="messages",
                     class_name="mt-6",
                 ),
+                rx.tabs.content(
+                    analytics_panel(),
+                    value="analytics",
+                    class_name="mt-6",
+                ),
                 rx.tabs.content(
                     settings_panel(),
                     value="settings",
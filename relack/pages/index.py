@@ -3,7 +3,6 @@ from relack.components.navbar import navbar
 from relack.components.auth_views import auth_container
 from relack.components.chat_views import chat_dashboard
 from relack.states.auth_state import AuthState
-from relack.states.shared_state import GlobalLobbyState
 from reflex_google_auth import google_oauth_provider
 
 
@@ -48,7 +47,6 @@ def index() -> rx.Component:
                     ),
                 ),
                 class_name="min-h-screen bg-gray-50/50 font-sans relative",
-                on_mount=[GlobalLobbyState.join_lobby],
             )
         )
     )
\ No newline at end of file
@@ -1,18 +1,41 @@
 import reflex as rx
+from reflex.config import get_config
+from starlette.applications import Starlette
+from relack.api import avatars, read, signals, static_assets
+from relack.services.guest_gc import guest_collector
+from relack.services.message_archive import message_archive
+from relack.services.outbound import outbound_budget
+from relack.services.profile_directory import profile_directory
+from relack.services.retention import retention_compactor
+from relack.services.room_flush import room_flush
+from relack.services.room_residency import room_residency
+from relack.services.signals import signal_hub
+from relack.services import startup_profile
+from relack.services.compat import require_single_worker
 from relack.pages.index import index
 from relack.pages.profile import profile
 from relack.pages.admin import admin_page
 
+require_single_worker()
+
+# Self-hosted, content-hashed font CSS (built by relack.services.asset_pipeline).
+font_stylesheet = static_assets.asset_path("fonts.css")
+
 app = rx.App(
     theme=rx.theme(appearance="light"),
-    stylesheets=[
-        "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap"
-    ],
-    head_components=[
-        rx.el.link(rel="preconnect", href="https://fonts.googleapis.com"),
-        rx.el.link(rel="preconnect", href="https://fonts.gstatic.com", cross_origin=""),
-    ],
+    stylesheets=[f"{get_config().api_url}{font_stylesheet}"] if font_stylesheet else [],
+    api_transformer=Starlette(routes=[*avatars.routes, *static_assets.routes, *signals.routes, *read.routes]),
 )
 app.add_page(index, route="/", title="Relack - Reflex Real-Time Chat")
 app.add_page(profile, route="/profile/[username]", title="User Profile")
-app.add_page(admin_page, route="/admin-dashboard", title="Admin Dashboard")
\ No newline at end of file
+app.add_page(admin_page, route="/admin-dashboard", title="Admin Dashboard")
+app.register_lifespan_task(message_archive.run)
+app.register_lifespan_task(retention_compactor.run)
+app.register_lifespan_task(room_residency.run)
+app.register_lifespan_task(guest_collector.run)
+app.register_lifespan_task(profile_directory.run)
+app.register_lifespan_task(outbound_budget.run)
+app.register_lifespan_task(room_flush.run)
+app.register_lifespan_task(signal_hub.run)
+app.register_lifespan_task(startup_profile.lifespan)
+startup_profile.mark("app_module_loaded")
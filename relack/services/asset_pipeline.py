@@ -0,0 +1,135 @@
+"""Build self-hosted static assets into ``assets/build``.
+
+Run ``python -m relack.services.asset_pipeline`` after changing anything in
+``assets_src/``. The vendored Inter faces are subset to Latin, every output
+gets a content-hashed filename, and compressible files get ``.br`` and
+``.gz`` variants next to them. ``manifest.json`` maps logical names to the
+hashed files and is what ``relack.api.static_assets`` serves from. Building
+needs ``fonttools`` and ``brotli``; serving does not.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import shutil
+from pathlib import Path
+
+SOURCE_DIR = Path("assets_src")
+OUTPUT_DIR = Path("assets/build")
+MANIFEST_NAME = "manifest.json"
+
+# (family, weight, source file) for every face the UI loads.
+FONT_FACES = (
+    ("Inter", 400, "fonts/inter/Inter-Regular.woff2"),
+    ("Inter", 500, "fonts/inter/Inter-Medium.woff2"),
+    ("Inter", 600, "fonts/inter/Inter-SemiBold.woff2"),
+    ("Inter", 700, "fonts/inter/Inter-Bold.woff2"),
+)
+# The same "latin" range Google Fonts serves; other scripts fall back to system fonts.
+LATIN_RANGE = (
+    "U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,U+0304,U+0308,"
+    "U+0329,U+2000-206F,U+20AC,U+2122,U+2191,U+2193,U+2212,U+2215,U+FEFF,U+FFFD"
+)
+# Copied through (hashed and precompressed) as-is.
+STATIC_FILES = ("icons/placeholder.svg",)
+# Already compressed formats gain nothing from another pass.
+PRECOMPRESS_SUFFIXES = {".css", ".svg", ".js", ".json", ".txt"}
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(logical_name: str, data: bytes) -> str:
+    path = Path(logical_name)
+    return f"{path.stem}.{content_hash(data)}{path.suffix}"
+
+
+def _parse_unicodes(ranges: str) -> list[int]:
+    codepoints: list[int] = []
+    for part in ranges.split(","):
+        start, _, end = part.strip().removeprefix("U+").partition("-")
+        codepoints.extend(range(int(start, 16), int(end or start, 16) + 1))
+    return codepoints
+
+
+def subset_font(source: Path, unicode_range: str = LATIN_RANGE) -> bytes:
+    from fontTools import subset  # noqa: WPS433
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=_parse_unicodes(unicode_range))
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    subset.save_font(font, buffer, options)
+    return buffer.getvalue()
+
+
+def compress(data: bytes) -> dict[str, bytes]:
+    """Precompressed variants that are actually smaller than ``data``."""
+
+    import brotli  # noqa: WPS433
+
+    variants = {
+        "br": brotli.compress(data, quality=11),
+        # mtime=0 keeps the output (and therefore the build) reproducible.
+        "gzip": gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def _font_css(faces: list[tuple[str, int, str]]) -> bytes:
+    rules = [
+        "@font-face{"
+        f'font-family:"{family}";font-style:normal;font-weight:{weight};font-display:swap;'
+        f'src:url({filename}) format("woff2");unicode-range:{LATIN_RANGE}'
+        "}"
+        for family, weight, filename in faces
+    ]
+    return ("\n".join(rules) + "\n").encode("utf-8")
+
+
+def build(source_dir: Path = SOURCE_DIR, output_dir: Path = OUTPUT_DIR) -> dict:
+    """Rebuild ``output_dir`` from scratch and return the manifest."""
+
+    outputs: dict[str, bytes] = {}
+    faces: list[tuple[str, int, str]] = []
+    for family, weight, source in FONT_FACES:
+        data = subset_font(source_dir / source)
+        logical_name = f"fonts/{family.lower()}-latin-{weight}.woff2"
+        outputs[logical_name] = data
+        faces.append((family, weight, hashed_name(logical_name, data)))
+    outputs["fonts.css"] = _font_css(faces)
+    for source in STATIC_FILES:
+        outputs[Path(source).name] = (source_dir / source).read_bytes()
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(parents=True)
+    manifest: dict[str, dict] = {}
+    for logical_name, data in outputs.items():
+        filename = hashed_name(Path(logical_name).name, data)
+        (output_dir / filename).write_bytes(data)
+        variants = compress(data) if Path(filename).suffix in PRECOMPRESS_SUFFIXES else {}
+        for encoding, body in variants.items():
+            (output_dir / f"{filename}{ENCODINGS[encoding]}").write_bytes(body)
+        manifest[logical_name] = {
+            "file": filename,
+            "bytes": len(data),
+            "encodings": {encoding: len(body) for encoding, body in variants.items()},
+        }
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+
+if __name__ == "__main__":
+    for name, entry in build().items():
+        sizes = ", ".join(f"{encoding} {size}" for encoding, size in entry["encodings"].items())
+        print(f"{name:32} {entry['file']:40} {entry['bytes']:>8} B {sizes}")
@@ -0,0 +1,251 @@
+"""Serialize-once frames for room fan-out.
+
+Every member of a room that views the same message window gets the same
+``messages`` value. ``FrameCache.get`` hands out one shared list per
+``(room, window)`` key. The first time that list is emitted it is
+JSON-encoded into a single engine.io packet. That packet object is then
+queued on every member's socket unchanged, so engine.io reuses its cached
+encoding. Whatever else is in a session's delta (per-session fields) is
+sent separately, as usual.
+
+Run ``python -m relack.services.broadcast`` for an encoding benchmark.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from reflex import constants
+from reflex.state import StateUpdate, _split_substate_key
+
+MAX_FRAMES = 256
+
+
+class _Frame:
+    __slots__ = ("key", "value", "packets", "size")
+
+    def __init__(self, key: tuple, value: list):
+        self.key = key
+        self.value = value
+        # (state name, var name) -> engine.io packet carrying the encoded delta.
+        self.packets: dict[tuple[str, str], Any] = {}
+        self.size = 0  # encoded bytes, once the first packet exists
+
+
+class FrameCache:
+    """LRU of shared, immutable delta values; each is encoded at most once per var.
+
+    Frames must never be mutated once handed out: they are matched by
+    identity when an update is emitted.
+    """
+
+    def __init__(self, max_frames: int = MAX_FRAMES):
+        self.max_frames = max_frames
+        self._frames: OrderedDict[tuple, _Frame] = OrderedDict()
+        self._by_id: dict[int, _Frame] = {}
+        self.built = 0
+        self.encoded = 0
+        self.shared_sends = 0
+        self.shared_bytes = 0
+
+    def get(self, key: tuple, build: Callable[[], list]) -> list:
+        """The frame for ``key``, calling ``build()`` only on a miss."""
+
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            return frame.value
+        frame = _Frame(key, build())
+        self._frames[key] = frame
+        self._by_id[id(frame.value)] = frame
+        self.built += 1
+        while len(self._frames) > self.max_frames:
+            _, evicted = self._frames.popitem(last=False)
+            self._by_id.pop(id(evicted.value), None)
+        return frame.value
+
+    def clear(self):
+        """Forget every frame, e.g. when history is replaced under the same IDs.
+
+        Values already in flight are then sent like any other delta.
+        """
+
+        self._frames.clear()
+        self._by_id.clear()
+
+    def _lookup(self, value: Any) -> _Frame | None:
+        frame = self._by_id.get(id(value))
+        return frame if frame is not None and frame.value is value else None
+
+    def split(self, update: StateUpdate) -> tuple[list[tuple[str, str, _Frame]], StateUpdate]:
+        """Separate the frames in ``update.delta`` from the per-session remainder."""
+
+        frames: list[tuple[str, str, _Frame]] = []
+        remainder: dict[str, dict[str, Any]] = {}
+        for state_name, substate_delta in update.delta.items():
+            rest = {}
+            for var_name, value in substate_delta.items():
+                frame = self._lookup(value)
+                if frame is None:
+                    rest[var_name] = value
+                else:
+                    frames.append((state_name, var_name, frame))
+            if rest:
+                remainder[state_name] = rest
+        if not frames:
+            return frames, update
+        return frames, StateUpdate(delta=remainder, events=update.events, final=update.final)
+
+    def _packet(self, server: Any, namespace: str, state_name: str, var_name: str, frame: _Frame) -> Any:
+        packet = frame.packets.get((state_name, var_name))
+        if packet is not None:
+            return packet
+        from engineio import packet as eio_packet  # noqa: WPS433
+        from socketio import packet as sio_packet  # noqa: WPS433
+
+        # Never final: the session's own remainder follows and carries ``final``.
+        update = StateUpdate(delta={state_name: {var_name: frame.value}}, final=False)
+        encoded = server.packet_class(
+            sio_packet.EVENT, namespace=namespace, data=[str(constants.SocketEvent.EVENT), update]
+        ).encode()
+        packet = eio_packet.Packet(eio_packet.MESSAGE, encoded)
+        packet.encode()  # fills the packet's encode cache shared by every socket
+        frame.packets[(state_name, var_name)] = packet
+        frame.size = len(encoded)
+        self.encoded += 1
+        return packet
+
+    def measure(self, update: StateUpdate) -> int:
+        """Approximate wire size of ``update`` without re-encoding its frames.
+
+        A frame nobody has been sent yet counts as 0; its first send encodes it.
+        """
+
+        frames, remainder = self.split(update)
+        return sum(frame.size for _, _, frame in frames) + len(remainder.json())
+
+    async def send(
+        self,
+        namespace: Any,
+        update: StateUpdate,
+        token: str,
+        emit_update: Callable[..., Awaitable[None]],
+    ):
+        """Queue the shared frame packets for ``token``, then emit the remainder."""
+
+        frames, remainder = self.split(update)
+        client_token, _ = _split_substate_key(token)
+        token_manager = namespace._token_manager
+        record = token_manager.token_to_socket.get(client_token)
+        if not frames or record is None or record.instance_id != token_manager.instance_id:
+            # Nothing shared, or the socket is not on this instance (RedisTokenManager
+            # caches remote records): the default path routes it.
+            await emit_update(update=update, token=token)
+            return
+        server = namespace.server
+        eio_sid = server.manager.eio_sid_from_sid(record.sid, namespace.namespace)
+        for state_name, var_name, frame in frames:
+            packet = self._packet(server, namespace.namespace, state_name, var_name, frame)
+            await server.eio.send_packet(eio_sid, packet)
+            self.shared_sends += 1
+            self.shared_bytes += len(packet.data)
+        await emit_update(update=remainder, token=token)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "frames": len(self._frames),
+            "frames_built": self.built,
+            "frames_encoded": self.encoded,
+            "frame_sends": self.shared_sends,
+            "frame_bytes_sent": self.shared_bytes,
+        }
+
+
+message_frames = FrameCache()
+
+
+def _benchmark(members: int = 1000, window: int = 100, rounds: int = 5):
+    """Time to emit one room update to ``members`` sessions, encoding per session vs once.
+
+    Drives ``FrameCache.send`` against an in-process stand-in for the socket
+    server, so the numbers cover encoding and queueing but not the network.
+    """
+
+    import asyncio  # noqa: WPS433
+    import json  # noqa: WPS433
+    from types import SimpleNamespace  # noqa: WPS433
+
+    from engineio import packet as eio_packet  # noqa: WPS433
+    from reflex.utils import format  # noqa: WPS433
+    from socketio import packet as sio_packet  # noqa: WPS433
+
+    from relack.models import ChatMessage  # noqa: WPS433
+
+    # What Reflex configures on its AsyncServer.
+    sio_packet.Packet.json = SimpleNamespace(dumps=format.json_dumps, loads=json.loads)
+    state_name = "reflex___state____state.relack___states___shared_state____room_state"
+    messages = [
+        ChatMessage(id=str(i), sender=f"user{i % 7}", content="hello " * (1 + i % 12), timestamp=i)
+        for i in range(window)
+    ]
+    sent: list[Any] = []
+
+    async def send_packet(eio_sid: str, packet: Any):
+        sent.append(packet.encode())
+
+    namespace = SimpleNamespace(
+        namespace="/_event",
+        _token_manager=SimpleNamespace(
+            instance_id="local",
+            token_to_socket={
+                f"token{i}": SimpleNamespace(sid=f"sid{i}", instance_id="local") for i in range(members)
+            },
+        ),
+        server=SimpleNamespace(
+            packet_class=sio_packet.Packet,
+            manager=SimpleNamespace(eio_sid_from_sid=lambda sid, _: sid),
+            eio=SimpleNamespace(send_packet=send_packet),
+        ),
+    )
+
+    async def emit_update(update: StateUpdate, token: str):
+        # Reflex's emit: one socket.io packet encoded per session.
+        encoded = sio_packet.Packet(
+            sio_packet.EVENT, namespace=namespace.namespace, data=[str(constants.SocketEvent.EVENT), update]
+        ).encode()
+        await send_packet(token, eio_packet.Packet(eio_packet.MESSAGE, encoded))
+
+    async def fan_out(cache: FrameCache | None):
+        for member in range(members):
+            value = (
+                cache.get(("room-bench", messages[0].id, messages[-1].id, window), lambda: list(messages))
+                if cache is not None
+                else list(messages)
+            )
+            # The shared list plus a per-session field, as the room's computed vars produce.
+            update = StateUpdate(
+                delta={state_name: {"messages_rx_state_": value, "in_room_rx_state_": True}}, final=True
+            )
+            if cache is None:
+                await emit_update(update=update, token=f"token{member}")
+            else:
+                await cache.send(namespace, update, f"token{member}", emit_update)
+
+    for label, use_cache in (("per-session", False), ("shared frame", True)):
+        timings = []
+        for _ in range(rounds):
+            cache = FrameCache() if use_cache else None
+            sent.clear()
+            started = time.perf_counter()
+            asyncio.run(fan_out(cache))
+            timings.append(time.perf_counter() - started)
+        best = min(timings) * 1000
+        distinct = len({id(encoded) for encoded in sent})
+        print(
+            f"{label:13} {members} members x {window} msgs: {best:8.2f} ms per message "
+            f"({best / members * 1000:6.1f} us/member, {distinct} distinct buffers for {len(sent)} packets)"
+        )
+
+
+if __name__ == "__main__":
+    _benchmark()
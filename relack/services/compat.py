@@ -0,0 +1,59 @@
+"""Guards for the Reflex internals relack replaces at runtime.
+
+``outbound`` (with ``broadcast``) wraps ``EventNamespace.emit_update`` and
+writes engine.io packets itself; ``room_flush`` replaces
+``reflex.istate.shared._do_update_other_tokens``. pyproject.toml pins reflex to
+the versions these were checked against. ``require_attributes`` turns a
+mismatch into an error at startup instead of silently undelivered updates.
+
+``require_single_worker`` guards the deployment shape: membership, presence,
+signals and the profile cache are per-process services, so they are only
+authoritative when one backend process serves every client.
+"""
+
+import inspect
+import operator
+from typing import Any, Iterable
+
+
+def require_attributes(target: Any, paths: Iterable[str], what: str):
+    """Raise RuntimeError unless every dotted ``path`` resolves on ``target``."""
+
+    missing = []
+    for path in paths:
+        try:
+            operator.attrgetter(path)(target)
+        except AttributeError:
+            missing.append(path)
+    if missing:
+        raise RuntimeError(
+            f"{what} cannot be installed: this Reflex version has no {', '.join(missing)}. "
+            "Use a reflex version allowed by pyproject.toml."
+        )
+
+
+def require_parameters(function: Any, names: Iterable[str], what: str):
+    """Raise RuntimeError unless ``function`` accepts every keyword in ``names``."""
+
+    parameters = inspect.signature(function).parameters
+    missing = [name for name in names if name not in parameters]
+    if missing:
+        raise RuntimeError(
+            f"{what} cannot be installed: {function.__qualname__} no longer takes {', '.join(missing)}. "
+            "Use a reflex version allowed by pyproject.toml."
+        )
+
+
+def require_single_worker():
+    """Raise RuntimeError if Reflex is configured to run several backend workers.
+
+    Reflex starts more than one worker only when ``redis_url`` is set.
+    """
+
+    from reflex.utils import prerequisites  # noqa: WPS433
+
+    if prerequisites.check_redis_used():
+        raise RuntimeError(
+            "relack keeps room membership, presence and profiles in process memory and must run as a "
+            "single backend worker. Unset redis_url (REFLEX_REDIS_URL) in rxconfig.py and the environment."
+        )
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable
+
+from relack.services.profile_directory import profile_directory
+
+# A guest profile is forgotten once it has been offline, without logging in or
+# posting, for this long. 0 keeps guest profiles forever.
+GUEST_TTL_HOURS = float(os.getenv("RELACK_GUEST_TTL_HOURS", "72"))
+GUEST_SWEEP_SECONDS = float(os.getenv("RELACK_GUEST_SWEEP_SECONDS", "900"))
+# Idle guests handed to the lobby per lock acquisition.
+GUEST_SWEEP_BATCH = 1000
+
+
+class GuestProfileCollector:
+    """Background sweep that forgets abandoned guest profiles.
+
+    Every guest login creates a profile in ``profile_directory``. Without this,
+    they pile up for as long as the server runs. Idle guests are read from the
+    directory's activity index in batches. ``forget`` is bound by the lobby: it
+    takes a batch of usernames, drops those not online under the lobby lock,
+    and returns how many it removed.
+    """
+
+    def __init__(
+        self, ttl_hours: float = GUEST_TTL_HOURS, interval: float = GUEST_SWEEP_SECONDS, batch: int = GUEST_SWEEP_BATCH
+    ):
+        self.ttl_hours = ttl_hours
+        self.interval = interval
+        self.batch = batch
+        self._forget: Callable[[list[str]], Awaitable[int]] | None = None
+        self.collected_total = 0
+        self.last_run_ms = 0
+
+    def bind(self, forget: Callable[[list[str]], Awaitable[int]]):
+        self._forget = forget
+
+    async def run_once(self) -> int:
+        if self._forget is None:
+            raise RuntimeError("GuestProfileCollector used before bind().")
+        if not self.ttl_hours:
+            return 0
+        now = time.time_ns() // 1_000_000
+        cutoff = now - int(self.ttl_hours * 3_600_000)
+        removed = 0
+        while True:
+            candidates = await profile_directory.idle_guests(cutoff, self.batch)
+            forgotten = await self._forget(candidates) if candidates else 0
+            removed += forgotten
+            # A short batch is the last one; a batch of online guests would repeat forever.
+            if len(candidates) < self.batch or not forgotten:
+                break
+        self.collected_total += removed
+        self.last_run_ms = now
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "guests_collected": self.collected_total,
+            "last_run_ms": self.last_run_ms,
+        }
+
+    async def run(self):
+        """Lifespan task: sweep every ``interval`` seconds until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if removed := await self.run_once():
+                    logging.info("Removed %d abandoned guest profiles", removed)
+            except Exception:
+                logging.exception("Guest profile sweep failed")
+
+
+guest_collector = GuestProfileCollector()
@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+
+# Custom epoch keeps the timestamp part small: 2024-01-01T00:00:00Z.
+RELACK_EPOCH_MS = 1_704_067_200_000
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1  # reserved for IDs assigned when migrating old snapshots
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+
+def now_ms() -> int:
+    """Current UTC time as integer epoch milliseconds."""
+
+    return time.time_ns() // 1_000_000
+
+
+class SnowflakeGenerator:
+    """Snowflake-style 64-bit IDs: 41 bits time | 10 bits worker | 12 bits sequence.
+
+    IDs are strictly increasing per worker, so they sort in creation order and
+    can be used as cursors. If the clock steps backwards (or a millisecond's
+    sequence is exhausted) the generator keeps using its last timestamp and
+    advances it logically instead of blocking.
+
+    Note: values exceed JavaScript's 2**53 safe integer range, so clients must
+    not do arithmetic on them or send them back as numbers.
+    """
+
+    def __init__(self, worker_id: int = 0):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_id(self, at_ms: int | None = None) -> int:
+        with self._lock:
+            current = (now_ms() if at_ms is None else at_ms) - RELACK_EPOCH_MS
+            if current > self._last_ms:
+                self._last_ms = current
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                self._last_ms += 1
+                self._sequence = 0
+            return (
+                (self._last_ms << TIMESTAMP_SHIFT)
+                | (self.worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+
+# Set RELACK_WORKER_ID per backend process when running several workers.
+message_ids = SnowflakeGenerator(worker_id=int(os.getenv("RELACK_WORKER_ID", "0")))
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable
+
+ArchiveBatch = list[tuple[str, Any]]
+
+
+class MessageArchiveWriter:
+    """Write-behind buffer that archives chat messages into the lobby in batches.
+
+    Senders ``offer`` messages and return immediately; a lifespan task wakes up,
+    waits a short window so bursts coalesce, and flushes whole batches with one
+    lobby update. Batches are only taken from the buffer while the lobby lock
+    is held (see ``drain_into``), so archive order matches send order per room.
+
+    The buffer is bounded. When it is full ``offer`` refuses the message and the
+    sender must flush inline, which throttles producers to the archive's pace
+    instead of buffering without limit.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 2000,
+        max_batch_size: int = 500,
+        flush_interval: float = 0.05,
+    ):
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._flush: Callable[[], Awaitable[None]] | None = None
+        self._queue: deque[tuple[str, Any]] = deque()
+        self._pending: dict[str, deque] = defaultdict(deque)
+        self._wakeup: asyncio.Event | None = None
+        self.batches_written = 0
+        self.messages_written = 0
+        self.largest_batch = 0
+        self.inline_flushes = 0
+
+    def bind(self, flush: Callable[[], Awaitable[None]]):
+        """Set the coroutine that takes the lobby lock and calls ``drain_into``."""
+
+        self._flush = flush
+
+    @property
+    def running(self) -> bool:
+        return self._wakeup is not None
+
+    def offer(self, room_name: str, message: Any) -> bool:
+        """Buffer a message for archival. Returns False if the caller must write inline."""
+
+        if not self.running:
+            return False
+        if len(self._queue) >= self.max_queue_size:
+            self.inline_flushes += 1
+            return False
+        self._queue.append((room_name, message))
+        self._pending[room_name].append(message)
+        self._wakeup.set()
+        return True
+
+    def drain_into(self, store: Callable[[ArchiveBatch], None], limit: int | None = None) -> int:
+        """Synchronously move up to ``limit`` buffered messages into ``store``.
+
+        Must be called while holding the lobby lock; returns the batch size.
+        """
+
+        size = len(self._queue) if limit is None else min(limit, len(self._queue))
+        if not size:
+            return 0
+        batch = [self._queue.popleft() for _ in range(size)]
+        try:
+            store(batch)
+        except Exception:
+            logging.exception("Failed to archive %d messages", size)
+        for room_name, _ in batch:
+            room_pending = self._pending[room_name]
+            room_pending.popleft()
+            if not room_pending:
+                del self._pending[room_name]
+        self.batches_written += 1
+        self.messages_written += size
+        self.largest_batch = max(self.largest_batch, size)
+        return size
+
+    def clear(self):
+        """Drop buffered messages (used when lobby data is reset or replaced)."""
+
+        self._queue.clear()
+        self._pending.clear()
+
+    def pending(self, room_name: str) -> list[Any]:
+        """Messages accepted for ``room_name`` that are not in the lobby yet."""
+
+        return list(self._pending.get(room_name, ()))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": len(self._queue),
+            "batches_written": self.batches_written,
+            "messages_written": self.messages_written,
+            "largest_batch": self.largest_batch,
+            "inline_flushes": self.inline_flushes,
+        }
+
+    async def run(self):
+        """Lifespan task: flush buffered messages until cancelled."""
+
+        if self._flush is None:
+            raise RuntimeError("MessageArchiveWriter.run() called before bind().")
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                # Give concurrent senders a short window to join this batch.
+                await asyncio.sleep(self.flush_interval)
+                while self._queue:
+                    try:
+                        await self._flush()
+                    except Exception:
+                        logging.exception("Message archive flush failed; retrying on next wakeup")
+                        break
+        finally:
+            self._wakeup = None
+            if self._queue:
+                await self._flush()
+
+
+message_archive = MessageArchiveWriter()
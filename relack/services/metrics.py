@@ -0,0 +1,164 @@
+import heapq
+import time
+from array import array
+from typing import Callable
+
+# (name, bucket width in seconds, bucket count): 2 minutes, 2 hours, 1 week.
+RESOLUTIONS = (("1s", 1, 120), ("1m", 60, 120), ("1h", 3600, 168))
+COUNTERS = ("messages", "joins", "leaves")
+
+
+class RingSeries:
+    """Fixed-size time series of integer buckets backed by a circular ``array``.
+
+    Counters add into the current bucket; gauges (``carry=True``) store the
+    latest value and carry it forward into buckets that saw no update.
+    """
+
+    __slots__ = ("width", "size", "carry", "_buckets", "_head", "_last")
+
+    def __init__(self, width: int, size: int, carry: bool = False):
+        self.width = width
+        self.size = size
+        self.carry = carry
+        self._buckets = array("q", bytes(8 * size))
+        self._head = 0  # absolute bucket number of the newest slot
+        self._last = 0
+
+    def _advance(self, now: float):
+        bucket = int(now // self.width)
+        gap = bucket - self._head
+        if gap <= 0:
+            return
+        fill = self._last if self.carry else 0
+        if gap >= self.size:
+            self._buckets = array("q", [fill]) * self.size
+        else:
+            for step in range(1, gap + 1):
+                self._buckets[(self._head + step) % self.size] = fill
+        self._head = bucket
+
+    def add(self, now: float, amount: int = 1):
+        self._advance(now)
+        self._buckets[self._head % self.size] += amount
+        self._last = self._buckets[self._head % self.size]
+
+    def set(self, now: float, value: int):
+        self._advance(now)
+        self._buckets[self._head % self.size] = value
+        self._last = value
+
+    def values(self, now: float) -> array:
+        """All buckets, oldest first, ending with the bucket containing ``now``."""
+
+        self._advance(now)
+        split = (self._head + 1) % self.size
+        return self._buckets[split:] + self._buckets[:split]
+
+    def total(self, now: float) -> int:
+        self._advance(now)
+        return sum(self._buckets)
+
+
+class _SeriesSet:
+    """The same metric at every resolution in ``RESOLUTIONS``."""
+
+    __slots__ = ("series",)
+
+    def __init__(self, carry: bool = False):
+        self.series = {name: RingSeries(width, size, carry) for name, width, size in RESOLUTIONS}
+
+    def add(self, now: float, amount: int):
+        for series in self.series.values():
+            series.add(now, amount)
+
+    def set(self, now: float, value: int):
+        for series in self.series.values():
+            series.set(now, value)
+
+
+def percentile(values: array, fraction: float) -> int:
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class ActivityMetrics:
+    """Rolling-window chat activity at 1 s / 1 min / 1 h resolution.
+
+    Memory is fixed per tracked series (every room has its own counters and
+    active-user gauge, dropped when the room is deleted), independent of uptime.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._totals = {name: _SeriesSet() for name in COUNTERS}
+        # Room -> counters and "active_users" for that room.
+        self._rooms: dict[str, dict[str, _SeriesSet]] = {}
+        self._active_users = _SeriesSet(carry=True)
+        self._active_by_room: dict[str, int] = {}
+
+    def _room(self, room_name: str) -> dict[str, _SeriesSet]:
+        room = self._rooms.get(room_name)
+        if room is None:
+            room = self._rooms[room_name] = {name: _SeriesSet() for name in COUNTERS}
+            room["active_users"] = _SeriesSet(carry=True)
+        return room
+
+    def record(self, name: str, room_name: str, amount: int = 1):
+        """Count ``amount`` events of ``name`` ("messages", "joins", "leaves") in a room."""
+
+        if amount <= 0:
+            return
+        now = self._clock()
+        self._totals[name].add(now, amount)
+        self._room(room_name)[name].add(now, amount)
+
+    def set_active_users(self, room_name: str, count: int):
+        if self._active_by_room.get(room_name, 0) == count:
+            return
+        now = self._clock()
+        if count:
+            self._active_by_room[room_name] = count
+        else:
+            self._active_by_room.pop(room_name, None)
+        if count or room_name in self._rooms:
+            self._room(room_name)["active_users"].set(now, count)
+        self._active_users.set(now, sum(self._active_by_room.values()))
+
+    def forget_room(self, room_name: str):
+        self.set_active_users(room_name, 0)
+        self._rooms.pop(room_name, None)
+
+    def series(self, resolution: str) -> dict[str, array]:
+        now = self._clock()
+        data = {name: self._totals[name].series[resolution].values(now) for name in COUNTERS}
+        data["active_users"] = self._active_users.series[resolution].values(now)
+        return data
+
+    def top_rooms(self, resolution: str, k: int = 5) -> list[dict[str, int | str]]:
+        """The ``k`` busiest rooms (by messages, then joins) with their totals and peak active users."""
+
+        now = self._clock()
+        rows = []
+        for room_name, room in self._rooms.items():
+            row: dict[str, int | str] = {
+                name: room[name].series[resolution].total(now) for name in COUNTERS
+            }
+            row["active_users"] = max(room["active_users"].series[resolution].values(now), default=0)
+            if any(row.values()):
+                rows.append({"room": room_name, **row})
+        return heapq.nlargest(k, rows, key=lambda row: (row["messages"], row["joins"]))
+
+    def summary(self, resolution: str) -> dict[str, int]:
+        data = self.series(resolution)
+        summary = {f"{name}_total": sum(data[name]) for name in COUNTERS}
+        summary["messages_p95"] = percentile(data["messages"], 0.95)
+        summary["messages_peak"] = max(data["messages"], default=0)
+        summary["active_users_now"] = data["active_users"][-1] if data["active_users"] else 0
+        summary["active_users_peak"] = max(data["active_users"], default=0)
+        return summary
+
+
+activity_metrics = ActivityMetrics()
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Callable
+
+from reflex.state import StateUpdate, _split_substate_key
+
+from relack.services.broadcast import message_frames
+from relack.services.compat import require_attributes
+
+OUTBOUND_BUDGET_BYTES = int(os.getenv("RELACK_OUTBOUND_BUDGET", str(1024 * 1024)))
+# A lagging session that has not acknowledged its notice by then is sent a new one.
+RESYNC_TIMEOUT_SECONDS = 15.0
+
+
+class _Session:
+    __slots__ = ("sid", "seq", "sizes", "pending_bytes", "depth", "peak_depth", "resync_from", "lagging_since")
+
+    def __init__(self, sid: str):
+        self.sid = sid  # socket the accounting is for; a reconnect starts a new session
+        self.seq = 0  # outbound updates emitted to this session
+        self.sizes: deque[int] = deque()  # estimated bytes of each packet still queued
+        self.pending_bytes = 0
+        self.depth = 0
+        self.peak_depth = 0
+        self.resync_from = 0  # first collapsed update while lagging, else 0
+        self.lagging_since = 0.0  # monotonic time resync_from was last set
+
+
+class OutboundBudget:
+    """Per-session accounting of state deltas waiting in the socket send queue.
+
+    Queue depth is read from the session's engine.io send queue on every
+    emit; the byte total covers the packets still in it. Sizes are only
+    measured once a backlog exists, so caught-up clients pay nothing. A
+    session that goes over ``budget_bytes`` is marked lagging: its deltas are
+    dropped and it receives a single "resync from N" notice (built by the
+    bound ``notice`` callback) instead. When the client gets to the notice it
+    asks for a full-state resync, and normal delivery resumes.
+
+    Sessions are tied to a socket: a client that reconnects (its notice may
+    have died with the old socket) starts over with a full hydrate. A notice
+    not acknowledged within ``resync_timeout`` seconds is sent again.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int = OUTBOUND_BUDGET_BYTES,
+        sample_interval: float = 5.0,
+        resync_timeout: float = RESYNC_TIMEOUT_SECONDS,
+    ):
+        self.budget_bytes = budget_bytes
+        self.sample_interval = sample_interval
+        self.resync_timeout = resync_timeout
+        self._notice: Callable[[str, int], Any] | None = None
+        self._namespace: Any = None
+        self._sessions: dict[str, _Session] = {}
+        self.forced_resyncs = 0
+        self.completed_resyncs = 0
+        self.collapsed_updates = 0
+        self.collapsed_bytes = 0
+
+    def bind(self, notice: Callable[[str, int], Any]):
+        """``notice(client_token, from_seq)`` returns the event asking the client to resync."""
+
+        self._notice = notice
+
+    def install(self, namespace: Any):
+        """Route ``namespace.emit_update`` (the Reflex event namespace) through the budget.
+
+        Admitted updates go out through ``message_frames``, so shared room
+        frames are encoded once for all sessions.
+        """
+
+        if self._namespace is namespace:
+            return
+        require_attributes(
+            namespace,
+            (
+                "emit_update",
+                "namespace",
+                "_token_manager.token_to_socket",
+                "_token_manager.instance_id",
+                "server.packet_class",
+                "server.manager.eio_sid_from_sid",
+                "server.eio.send_packet",
+                "server.eio.sockets",
+            ),
+            "Outbound send budget",
+        )
+        self._namespace = namespace
+        emit_update = namespace.emit_update
+
+        async def budgeted_emit_update(update: StateUpdate, token: str):
+            client_token, _ = _split_substate_key(token)
+            record = namespace._token_manager.token_to_socket.get(client_token)
+            sid = record.sid if record is not None else ""
+            admitted = self.admit(client_token, self.queue_depth(client_token), update, sid)
+            if admitted is not None:
+                await message_frames.send(namespace, admitted, token, emit_update)
+
+        namespace.emit_update = budgeted_emit_update
+
+    def queue_depth(self, client_token: str) -> int:
+        namespace = self._namespace
+        record = namespace._token_manager.token_to_socket.get(client_token) if namespace else None
+        if record is None or record.instance_id != namespace._token_manager.instance_id:
+            # Sockets on other instances have no local queue.
+            return 0
+        eio_sid = namespace.server.manager.eio_sid_from_sid(record.sid, namespace.namespace)
+        socket = namespace.server.eio.sockets.get(eio_sid)
+        return socket.queue.qsize() if socket is not None else 0
+
+    def admit(self, client_token: str, depth: int, update: StateUpdate, sid: str = "") -> StateUpdate | None:
+        """Return the update to send to ``client_token`` (possibly collapsed), or None to skip it."""
+
+        session = self._sessions.get(client_token)
+        if session is None or session.sid != sid:
+            session = self._sessions[client_token] = _Session(sid)
+        session.seq += 1
+        # Packets leave the queue in order, so only the newest ``depth`` are still pending.
+        while len(session.sizes) > depth:
+            session.pending_bytes -= session.sizes.popleft()
+        session.depth = depth
+        session.peak_depth = max(session.peak_depth, depth)
+
+        if session.resync_from:
+            if time.monotonic() - session.lagging_since < self.resync_timeout:
+                return self._collapse(update, size=0)
+            # The notice was lost or ignored; ask again from here.
+            logging.info("Client %s did not resync from %d; asking again", client_token, session.resync_from)
+            return self._collapse(update, 0, self._request_resync(client_token, session))
+        if not depth:
+            session.sizes.append(0)
+            return update
+        size = message_frames.measure(update)
+        if session.pending_bytes + size <= self.budget_bytes:
+            session.sizes.append(size)
+            session.pending_bytes += size
+            return update
+        self.forced_resyncs += 1
+        logging.info(
+            "Client %s is %d updates / %d bytes behind; collapsing to a resync from %d",
+            client_token, depth, session.pending_bytes, session.seq,
+        )
+        return self._collapse(update, size, self._request_resync(client_token, session))
+
+    def _request_resync(self, client_token: str, session: _Session) -> Any:
+        session.resync_from = session.seq
+        session.lagging_since = time.monotonic()
+        return self._notice(client_token, session.seq) if self._notice else None
+
+    def _collapse(self, update: StateUpdate, size: int, notice: Any = None) -> StateUpdate | None:
+        self.collapsed_updates += 1
+        self.collapsed_bytes += size
+        events = [notice, *update.events] if notice is not None else update.events
+        # Keep ``final`` and any queued events so the client's event loop still advances.
+        if not events and not update.final:
+            return None
+        return StateUpdate(delta={}, events=events, final=update.final)
+
+    def resynced(self, client_token: str, from_seq: int) -> bool:
+        """Clear the lagging flag once the client acknowledges the notice for ``from_seq``."""
+
+        session = self._sessions.get(client_token)
+        if session is None or session.resync_from != from_seq:
+            return False
+        session.resync_from = 0
+        session.sizes.clear()
+        session.pending_bytes = 0
+        self.completed_resyncs += 1
+        return True
+
+    def sample(self):
+        """Refresh queue depths and forget sessions whose socket is gone."""
+
+        connected = self._namespace._token_manager.token_to_socket if self._namespace else {}
+        for client_token in [
+            token
+            for token, session in self._sessions.items()
+            if token not in connected or connected[token].sid != session.sid
+        ]:
+            del self._sessions[client_token]
+        for client_token, session in self._sessions.items():
+            session.depth = self.queue_depth(client_token)
+            session.peak_depth = max(session.peak_depth, session.depth)
+
+    def queue_depths(self, k: int = 10) -> list[tuple[str, int, int]]:
+        """The ``k`` deepest sessions as ``(client_token, depth, pending_bytes)``."""
+
+        ranked = sorted(self._sessions.items(), key=lambda item: item[1].depth, reverse=True)[:k]
+        return [(token, session.depth, session.pending_bytes) for token, session in ranked if session.depth]
+
+    def stats(self) -> dict[str, int]:
+        depths = [session.depth for session in self._sessions.values()]
+        return {
+            "sessions": len(self._sessions),
+            "lagging_sessions": sum(1 for session in self._sessions.values() if session.resync_from),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": max((session.peak_depth for session in self._sessions.values()), default=0),
+            "pending_bytes": sum(session.pending_bytes for session in self._sessions.values()),
+            "forced_resyncs": self.forced_resyncs,
+            "completed_resyncs": self.completed_resyncs,
+            "collapsed_updates": self.collapsed_updates,
+            "collapsed_bytes": self.collapsed_bytes,
+        }
+
+    async def run(self):
+        """Lifespan task: hook the app's event namespace and sample queue depths."""
+
+        from reflex.utils.prerequisites import get_app  # noqa: WPS433
+
+        self.install(get_app().app.event_namespace)
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            try:
+                self.sample()
+            except Exception:
+                logging.exception("Outbound queue sampling failed")
+
+
+outbound_budget = OutboundBudget()
@@ -0,0 +1,171 @@
+"""Who is where: one index over every client session that has joined a room.
+
+Rooms are keyed by their shared-state token (``room-general``), sessions by
+Reflex client token. The index keeps three maps up to date on join and leave:
+
+- session -> its entry (user, room, profile)
+- username -> that user's sessions
+- room -> per-user counts of active sessions
+
+Room membership, "where is this user" and participant counts are then
+lookups instead of scans over per-room dicts. A session whose presence
+expired is marked idle rather than removed. It stays in its room, but it no
+longer counts as a member until it is active again. Like the other services, the
+index is per process. States that render from it depend on ``version`` so
+Reflex recomputes them when membership changes.
+"""
+
+from relack.models import UserProfile
+
+
+class _Session:
+    __slots__ = ("client_token", "room_token", "room_name", "profile", "active")
+
+    def __init__(self, client_token: str, room_token: str, room_name: str, profile: UserProfile):
+        self.client_token = client_token
+        self.room_token = room_token
+        self.room_name = room_name
+        self.profile = profile
+        self.active = True
+
+
+class PresenceIndex:
+    def __init__(self):
+        self._sessions: dict[str, _Session] = {}
+        self._by_user: dict[str, set[str]] = {}
+        # Room token -> username -> active sessions of that user in the room (in join order).
+        self._by_room: dict[str, dict[str, int]] = {}
+        # Room token -> client tokens in the room.
+        self._room_sessions: dict[str, set[str]] = {}
+        # Latest profile per username, for rendering members.
+        self._profiles: dict[str, UserProfile] = {}
+        # Bumped on every change that can alter a member list or count.
+        self.version = 0
+
+    def join(self, client_token: str, room_token: str, room_name: str, profile: UserProfile):
+        """Place a session in a room, moving it out of any other room."""
+
+        session = self._sessions.get(client_token)
+        if session is not None:
+            if session.room_token == room_token and session.profile == profile:
+                self.mark_active(client_token)
+                return
+            self._remove(session)
+        session = self._sessions[client_token] = _Session(client_token, room_token, room_name, profile)
+        username = profile.username
+        self._by_user.setdefault(username, set()).add(client_token)
+        self._room_sessions.setdefault(room_token, set()).add(client_token)
+        self._profiles[username] = profile
+        self._count(session, 1)
+        self.version += 1
+
+    def leave(self, client_token: str) -> str:
+        """Remove a session; returns the name of the room it was in ("" if none)."""
+
+        session = self._sessions.get(client_token)
+        if session is None:
+            return ""
+        self._remove(session)
+        self.version += 1
+        return session.room_name
+
+    def mark_idle(self, client_token: str) -> bool:
+        """Stop counting a session as a member (its presence expired); True if it changed."""
+
+        session = self._sessions.get(client_token)
+        if session is None or not session.active:
+            return False
+        self._count(session, -1)
+        session.active = False
+        self.version += 1
+        return True
+
+    def mark_active(self, client_token: str) -> bool:
+        session = self._sessions.get(client_token)
+        if session is None or session.active:
+            return False
+        session.active = True
+        self._count(session, 1)
+        self.version += 1
+        return True
+
+    def _count(self, session: _Session, delta: int):
+        members = self._by_room.setdefault(session.room_token, {})
+        username = session.profile.username
+        count = members.get(username, 0) + delta
+        if count:
+            members[username] = count
+        else:
+            members.pop(username, None)
+            if not members:
+                del self._by_room[session.room_token]
+
+    def _remove(self, session: _Session):
+        del self._sessions[session.client_token]
+        username = session.profile.username
+        tokens = self._by_user[username]
+        tokens.discard(session.client_token)
+        if not tokens:
+            del self._by_user[username]
+            self._profiles.pop(username, None)
+        if session.active:
+            self._count(session, -1)
+        room_sessions = self._room_sessions[session.room_token]
+        room_sessions.discard(session.client_token)
+        if not room_sessions:
+            del self._room_sessions[session.room_token]
+
+    def room_of(self, client_token: str) -> str:
+        """Name of the room this session is in, or ""."""
+
+        session = self._sessions.get(client_token)
+        return session.room_name if session is not None else ""
+
+    def room_token_of(self, client_token: str) -> str:
+        session = self._sessions.get(client_token)
+        return session.room_token if session is not None else ""
+
+    def username_of(self, client_token: str) -> str:
+        session = self._sessions.get(client_token)
+        return session.profile.username if session is not None else ""
+
+    def profile_of(self, client_token: str) -> UserProfile | None:
+        session = self._sessions.get(client_token)
+        return session.profile if session is not None else None
+
+    def is_online(self, username: str) -> bool:
+        """True if the user has a session in any room (active or idle)."""
+
+        return username in self._by_user
+
+    def active_sessions_in(self, room_token: str) -> list[str]:
+        return [token for token in self._room_sessions.get(room_token, ()) if self._sessions[token].active]
+
+    def members(self, room_token: str) -> list[UserProfile]:
+        """One profile per active user in the room, in join order."""
+
+        return [self._profiles[username] for username in self._by_room.get(room_token, {})]
+
+    def participant_count(self, room_token: str) -> int:
+        """Distinct users in the room (a user with several tabs counts once)."""
+
+        return len(self._by_room.get(room_token, ()))
+
+    def clear_room(self, room_token: str) -> list[str]:
+        """Remove every session in the room; returns their client tokens."""
+
+        client_tokens = list(self._room_sessions.get(room_token, ()))
+        for client_token in client_tokens:
+            self._remove(self._sessions[client_token])
+        self.version += 1
+        return client_tokens
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "users": len(self._by_user),
+            "occupied_rooms": len(self._by_room),
+        }
+
+
+presence = PresenceIndex()
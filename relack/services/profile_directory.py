@@ -0,0 +1,448 @@
+"""Every known user profile, on disk, with a hot in-memory LRU in front.
+
+Profiles used to live in ``GlobalLobbyState._known_profiles``, so looking up
+one profile meant linking (and locking) the whole lobby, and every profile
+ever seen stayed in memory. ``ProfileDirectory`` keeps them in a local
+SQLite file instead:
+
+- point and batched lookups go through an LRU of recently used profiles
+  (misses are cached too, e.g. "System" or a collected guest);
+- admin listings page with indexed ``ORDER BY ... LIMIT``;
+- the guest sweep finds idle guests through an index on last activity.
+
+Writes are write-behind: ``put`` and ``note_activity`` only update memory,
+and ``run`` writes them out in a worker thread. Everything that reads or
+writes the file from the event loop is async and runs its SQL through
+``asyncio.to_thread``, after writing out what is pending. Only ``get`` and
+``get_many`` stay synchronous: a cache miss is one indexed lookup on a
+separate read-only connection, which WAL never makes wait for the writer.
+
+The database is opened on first use. Like the other services, the LRU is per
+process; ``version`` counts local writes so states can depend on it.
+
+Run ``python -m relack.services.profile_directory`` for a 1M-profile benchmark.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable
+
+from relack.models import UserProfile
+
+PROFILE_DB_PATH = Path(os.getenv("RELACK_PROFILE_DB", ".relack_profiles.sqlite3"))
+PROFILE_CACHE_SIZE = int(os.getenv("RELACK_PROFILE_CACHE_SIZE", "10000"))
+# How often pending profile and activity writes reach the database.
+PROFILE_FLUSH_SECONDS = 2.0
+# SQLite's default limit on host parameters is 999 in older builds.
+_BATCH = 500
+_MISSING = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    username TEXT PRIMARY KEY,
+    sort_name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    is_guest INTEGER NOT NULL,
+    last_active_ms INTEGER NOT NULL,
+    search TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_by_name ON profiles (sort_name, username);
+CREATE INDEX IF NOT EXISTS profiles_by_created ON profiles (created_at, username);
+CREATE INDEX IF NOT EXISTS profiles_by_guest_activity ON profiles (is_guest, last_active_ms);
+"""
+_SORT_COLUMNS = {"username": "sort_name", "created_at": "created_at"}
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def _row(profile: UserProfile, last_active_ms: int) -> tuple:
+    return (
+        profile.username,
+        profile.username.lower(),
+        profile.created_at,
+        int(profile.is_guest),
+        last_active_ms,
+        f"{profile.username} {profile.nickname} {profile.email}".lower(),
+        profile.model_dump_json(),
+    )
+
+
+class ProfileDirectory:
+    def __init__(self, path: Path = PROFILE_DB_PATH, cache_size: int = PROFILE_CACHE_SIZE):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self._conn: sqlite3.Connection | None = None
+        self._reader: sqlite3.Connection | None = None
+        # username -> profile, or _MISSING for a cached miss; least recently used first.
+        self._cache: OrderedDict[str, object] = OrderedDict()
+        # Written by the next flush: changed profiles and their activity, and
+        # newer activity for stored profiles (username -> epoch ms).
+        self._pending_profiles: dict[str, tuple[UserProfile, int]] = {}
+        self._pending_activity: dict[str, int] = {}
+        # Profiles the running flush is writing; still served until it commits.
+        self._flushing: dict[str, tuple[UserProfile, int]] = {}
+        # The connection is shared by worker threads; writes also run one at a time.
+        self._db_lock = threading.Lock()
+        self._write_lock = asyncio.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Used from worker threads only (see _db_lock).
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _read_db(self) -> sqlite3.Connection:
+        """The event loop's connection for cache misses; never shares ``_db_lock``."""
+
+        if self._reader is None:
+            with self._db_lock:
+                self._db()  # creates the file and schema
+            self._reader = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro", uri=True, isolation_level=None, check_same_thread=False
+            )
+        return self._reader
+
+    def _remember(self, username: str, value: object):
+        self._cache[username] = value
+        self._cache.move_to_end(username)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, username: str) -> UserProfile | None:
+        return self.get_many((username,)).get(username)
+
+    def get_many(self, usernames: Iterable[str]) -> dict[str, UserProfile]:
+        """Profiles for the given usernames that exist; one query per 500 cache misses."""
+
+        found: dict[str, UserProfile] = {}
+        missing: list[str] = []
+        for username in set(usernames):
+            cached = self._cache.get(username)
+            if cached is None:
+                pending = self._pending_profiles.get(username) or self._flushing.get(username)
+                if pending is None:
+                    missing.append(username)
+                    continue
+                cached = pending[0]
+                self._remember(username, cached)
+            self._cache.move_to_end(username)
+            self.hits += 1
+            if cached is not _MISSING:
+                found[username] = cached
+        self.misses += len(missing)
+        for start in range(0, len(missing), _BATCH):
+            chunk = missing[start : start + _BATCH]
+            rows = self._read_db().execute(
+                f"SELECT username, data FROM profiles WHERE username IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            loaded = {username: UserProfile.model_validate_json(data) for username, data in rows}
+            for username in chunk:
+                self._remember(username, loaded.get(username, _MISSING))
+            found.update(loaded)
+        return found
+
+    def put(self, profile: UserProfile, active_ms: int | None = None) -> bool:
+        """Insert or replace a profile; False if it was already stored unchanged.
+
+        ``active_ms`` also records activity (a login) for the guest sweep.
+        """
+
+        if self.get(profile.username) == profile:
+            if active_ms is not None:
+                self.note_activity({profile.username: active_ms})
+            return False
+        # A copy: callers (e.g. AuthState.user) may mutate theirs before the next put.
+        profile = profile.model_copy()
+        self._pending_profiles[profile.username] = (profile, active_ms or _now_ms())
+        self._remember(profile.username, profile)
+        self.version += 1
+        return True
+
+    def note_activity(self, active_ms: dict[str, int]):
+        """Record activity (e.g. the newest message per sender); unknown usernames are ignored."""
+
+        pending = self._pending_activity
+        for username, when in active_ms.items():
+            if when > pending.get(username, 0):
+                pending[username] = when
+
+    async def flush(self):
+        """Write pending profiles and activity in a worker thread."""
+
+        async with self._write_lock:
+            profiles, self._pending_profiles = self._pending_profiles, {}
+            activity, self._pending_activity = self._pending_activity, {}
+            if not profiles and not activity:
+                return
+            self._flushing = profiles
+            try:
+                await asyncio.to_thread(self._write_blocking, list(profiles.values()), activity)
+            except Exception:
+                # Keep them for the next flush, behind anything newer.
+                self._pending_profiles = {**profiles, **self._pending_profiles}
+                self.note_activity(activity)
+                raise
+            finally:
+                self._flushing = {}
+
+    def _write_blocking(self, profiles: list[tuple[UserProfile, int]], activity: dict[str, int]):
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (username) DO UPDATE SET "
+                    "sort_name = excluded.sort_name, created_at = excluded.created_at, "
+                    "is_guest = excluded.is_guest, last_active_ms = max(last_active_ms, excluded.last_active_ms), "
+                    "search = excluded.search, data = excluded.data",
+                    [_row(profile, active_ms) for profile, active_ms in profiles],
+                )
+                conn.executemany(
+                    "UPDATE profiles SET last_active_ms = max(last_active_ms, ?) WHERE username = ?",
+                    [(when, username) for username, when in activity.items()],
+                )
+
+    async def delete_many(self, usernames: Iterable[str]) -> int:
+        usernames = list(usernames)
+        if not usernames:
+            return 0
+        for username in usernames:
+            self._pending_profiles.pop(username, None)
+            self._pending_activity.pop(username, None)
+            self._remember(username, _MISSING)
+        self.version += 1
+        async with self._write_lock:
+            await asyncio.to_thread(self._delete_blocking, usernames)
+        return len(usernames)
+
+    def _delete_blocking(self, usernames: list[str]):
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany("DELETE FROM profiles WHERE username = ?", [(username,) for username in usernames])
+
+    async def idle_guests(self, before_ms: int, limit: int) -> list[str]:
+        """Guest usernames with no login or message since ``before_ms`` (oldest first)."""
+
+        await self.flush()
+        return await asyncio.to_thread(self._idle_guests_blocking, before_ms, limit)
+
+    def _idle_guests_blocking(self, before_ms: int, limit: int) -> list[str]:
+        with self._db_lock:
+            rows = self._db().execute(
+                "SELECT username FROM profiles WHERE is_guest = 1 AND last_active_ms < ? "
+                "ORDER BY last_active_ms LIMIT ?",
+                (before_ms, limit),
+            ).fetchall()
+        return [username for (username,) in rows]
+
+    async def query(
+        self, sort: str, descending: bool = False, text: str = "", offset: int = 0, limit: int = 50
+    ) -> tuple[list[UserProfile], int]:
+        """One page of profiles for the admin users table, and the number of matches."""
+
+        await self.flush()
+        return await asyncio.to_thread(self._query_blocking, sort, descending, text, offset, limit)
+
+    def _query_blocking(
+        self, sort: str, descending: bool, text: str, offset: int, limit: int
+    ) -> tuple[list[UserProfile], int]:
+        column = _SORT_COLUMNS.get(sort, "sort_name")
+        direction = "DESC" if descending else "ASC"
+        text = text.strip().lower()
+        where, params = ("WHERE instr(search, ?) > 0", [text]) if text else ("", [])
+        with self._db_lock:
+            conn = self._db()
+            (total,) = conn.execute(f"SELECT count(*) FROM profiles {where}", params).fetchone()
+            rows = conn.execute(
+                f"SELECT data FROM profiles {where} ORDER BY {column} {direction}, username {direction} "
+                "LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return [UserProfile.model_validate_json(data) for (data,) in rows], total
+
+    async def load_all(self) -> list[UserProfile]:
+        """Every profile in username order (for exports)."""
+
+        await self.flush()
+        return await asyncio.to_thread(self._load_all_blocking)
+
+    def _load_all_blocking(self) -> list[UserProfile]:
+        profiles: list[UserProfile] = []
+        last = ""
+        while True:
+            # In chunks, so writers get the lock between them.
+            with self._db_lock:
+                rows = self._db().execute(
+                    "SELECT username, data FROM profiles WHERE username > ? ORDER BY username LIMIT ?",
+                    (last, _BATCH),
+                ).fetchall()
+            profiles.extend(UserProfile.model_validate_json(data) for _, data in rows)
+            if len(rows) < _BATCH:
+                return profiles
+            last = rows[-1][0]
+
+    async def replace_all(self, profiles: Iterable[UserProfile]) -> int:
+        """Swap the whole directory for ``profiles`` (imports); they count as active now."""
+
+        profiles = list(profiles)
+        async with self._write_lock:
+            self._pending_profiles.clear()
+            self._pending_activity.clear()
+            count = await asyncio.to_thread(self._replace_all_blocking, profiles, _now_ms())
+            self._cache.clear()
+            self.version += 1
+        return count
+
+    def _replace_all_blocking(self, profiles: Iterable[UserProfile], now: int) -> int:
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                conn.execute("BEGIN")
+                conn.execute("DELETE FROM profiles")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (_row(profile, now) for profile in profiles),
+                )
+            return conn.execute("SELECT count(*) FROM profiles").fetchone()[0]
+
+    async def clear(self):
+        await self.replace_all(())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "cached_profiles": len(self._cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "pending_writes": len(self._pending_profiles) + len(self._pending_activity),
+        }
+
+    async def run(self):
+        """Lifespan task: write pending changes every ``PROFILE_FLUSH_SECONDS`` until cancelled."""
+
+        try:
+            while True:
+                await asyncio.sleep(PROFILE_FLUSH_SECONDS)
+                try:
+                    await self.flush()
+                except Exception:
+                    logging.exception("Profile directory flush failed; retrying")
+        finally:
+            await self.flush()
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._cache.clear()
+
+
+profile_directory = ProfileDirectory()
+
+
+def _benchmark(count: int = 1_000_000, samples: int = 20_000):
+    """Build a ``count``-profile directory in a temp dir and time the hot paths.
+
+    Async methods are timed through their ``_blocking`` halves, i.e. the time
+    a worker thread spends on them.
+    """
+
+    import random  # noqa: WPS433
+    import statistics  # noqa: WPS433
+    import tempfile  # noqa: WPS433
+    import tracemalloc  # noqa: WPS433
+
+    def profile(i: int) -> UserProfile:
+        guest = i % 4 != 0
+        name = f"guest{i}" if guest else f"user{i}@example.com"
+        return UserProfile(
+            username=name,
+            email="" if guest else name,
+            nickname=f"Nick {i}",
+            is_guest=guest,
+            avatar_seed=name,
+            created_at=f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00",
+            bio="hello " * (i % 5),
+        )
+
+    def timed(label: str, runs: int, fn):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{label:44} p50 {statistics.median(timings):9.1f} us   p99 {p99:9.1f} us")
+
+    rng = random.Random(7)
+    names = [profile(i).username for i in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = ProfileDirectory(Path(tmp) / "profiles.sqlite3", cache_size=PROFILE_CACHE_SIZE)
+        started = time.perf_counter()
+        directory._replace_all_blocking((profile(i) for i in range(count)), _now_ms())
+        size_mb = directory.path.stat().st_size / 2**20
+        print(f"built {count:,} profiles in {time.perf_counter() - started:.1f} s ({size_mb:.0f} MB on disk)")
+
+        def cold_get():
+            directory._cache.clear()
+            directory.get(rng.choice(names))
+
+        hot = rng.sample(names, 1000)
+        directory.get_many(hot)
+        timed("get (cold, cache cleared)", samples // 10, cold_get)
+        timed("get (hot, in LRU)", samples, lambda: directory.get(rng.choice(hot)))
+
+        def cold_batch():
+            directory._cache.clear()
+            directory.get_many(rng.sample(names, 200))
+
+        timed("get_many 200 senders (cold)", 200, cold_batch)
+        timed("get_many 200 senders (hot)", 2000, lambda: directory.get_many(rng.sample(hot, 200)))
+        query = directory._query_blocking
+        timed("admin page, created_at desc, offset 0", 50, lambda: query("created_at", True, "", 0, 50))
+        timed("admin page, username, offset 500k", 20, lambda: query("username", False, "", count // 2, 50))
+        timed("admin text search 'nick 4242'", 5, lambda: query("username", False, "nick 4242", 0, 50))
+        timed("activity flush, 200 senders", 200, lambda: directory._write_blocking(
+            [], {n: _now_ms() for n in rng.sample(names, 200)}))
+        timed("idle guest batch (5000)", 20, lambda: directory._idle_guests_blocking(_now_ms() + 1, 5000))
+        timed("put (changed nickname, queued)", 2000, lambda: directory.put(profile(rng.randrange(count)).model_copy(
+            update={"nickname": f"n{rng.random()}"})))
+        directory.close()
+
+    # What the lobby used to hold: every profile as a live object.
+    sample = min(count, 100_000)
+    tracemalloc.start()
+    held = {p.username: p for p in (profile(i) for i in range(sample))}
+    resident = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"in-memory dict: {resident / sample:.0f} B/profile -> ~{resident / sample * count / 2**20:.0f} MB "
+        f"for {count:,}; LRU holds at most {PROFILE_CACHE_SIZE:,} ({len(held):,} measured)"
+    )
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+from relack.models import PermissionConfig
+
+EVENTS = ("send_message", "create_room", "join_room")
+
+
+class BucketSpec(NamedTuple):
+    rate: float  # tokens refilled per second; 0 disables the limit
+    burst: float  # bucket capacity
+
+
+def limits_for(config: PermissionConfig, is_guest: bool) -> dict[str, BucketSpec]:
+    """Per-event bucket specs for a role from a ``PermissionConfig``.
+
+    Each bucket holds the configured count and refills over its window, so
+    "3 rooms per hour" allows three rooms at once and then one every 20 minutes.
+    """
+
+    role = "guest" if is_guest else "google"
+    limits = {
+        "send_message": (getattr(config, f"{role}_messages_per_minute"), 60),
+        "create_room": (getattr(config, f"{role}_rooms_per_hour"), 3600),
+        "join_room": (getattr(config, f"{role}_joins_per_minute"), 60),
+    }
+    return {event: BucketSpec(count / window, float(count)) for event, (count, window) in limits.items()}
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "spec")
+
+    def __init__(self, tokens: float, updated: float, spec: BucketSpec):
+        self.tokens = tokens
+        self.updated = updated
+        self.spec = spec
+
+
+class RateLimiter:
+    """Token buckets per (client token, event) and (username, event).
+
+    An event is allowed only if every bucket it maps to has a token. Buckets
+    are kept in one LRU per event, whose buckets all share a window, and
+    dropped once they would have refilled to capacity (a full bucket is the
+    same as no bucket). A bucket refills within its window, so pruning an
+    event never waits on another event's longer window, and memory is O(1)
+    per recently active client.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        # Event -> identity -> bucket, least recently used first.
+        self._buckets: dict[str, OrderedDict[str, _Bucket]] = {event: OrderedDict() for event in EVENTS}
+        self.allowed: dict[str, int] = dict.fromkeys(EVENTS, 0)
+        self.rejected: dict[str, int] = dict.fromkeys(EVENTS, 0)
+        self.rejected_by_role: dict[str, int] = {"guest": 0, "google": 0}
+
+    def _prune(self, now: float):
+        for buckets in self._buckets.values():
+            while buckets:
+                identity, bucket = next(iter(buckets.items()))
+                rate, burst = bucket.spec
+                if bucket.tokens + (now - bucket.updated) * rate < burst:
+                    break
+                del buckets[identity]
+
+    def _refilled(self, buckets: OrderedDict[str, _Bucket], identity: str, spec: BucketSpec, now: float) -> _Bucket:
+        bucket = buckets.get(identity)
+        if bucket is None:
+            bucket = buckets[identity] = _Bucket(spec.burst, now, spec)
+        else:
+            bucket.tokens = min(spec.burst, bucket.tokens + (now - bucket.updated) * spec.rate)
+            bucket.updated = now
+            bucket.spec = spec
+            buckets.move_to_end(identity)
+        return bucket
+
+    def check(self, event: str, spec: BucketSpec, *identities: str, role: str = "") -> float:
+        """Consume one token for ``event`` from each identity's bucket.
+
+        Returns 0.0 when allowed, otherwise the seconds until a retry could
+        succeed (nothing is consumed on rejection).
+        """
+
+        if not spec.rate:
+            self.allowed[event] += 1
+            return 0.0
+        now = self._clock()
+        self._prune(now)
+        by_identity = self._buckets.setdefault(event, OrderedDict())
+        buckets = [self._refilled(by_identity, identity, spec, now) for identity in identities if identity]
+        short = [bucket for bucket in buckets if bucket.tokens < 1]
+        if short:
+            self.rejected[event] += 1
+            if role in self.rejected_by_role:
+                self.rejected_by_role[role] += 1
+            return max((1 - bucket.tokens) / spec.rate for bucket in short)
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.allowed[event] += 1
+        return 0.0
+
+    def stats(self) -> dict[str, int]:
+        stats = {"tracked_buckets": sum(len(buckets) for buckets in self._buckets.values())}
+        stats.update({f"{event}_allowed": count for event, count in self.allowed.items()})
+        stats.update({f"{event}_rejected": count for event, count in self.rejected.items()})
+        stats.update({f"{role}_rejected": count for role, count in self.rejected_by_role.items()})
+        return stats
+
+
+rate_limiter = RateLimiter()
+
+
+def throttle_message(event: str, retry_after: float) -> str:
+    action = {
+        "send_message": "sending messages",
+        "create_room": "creating rooms",
+        "join_room": "switching rooms",
+    }[event]
+    return f"You're {action} too fast. Try again in {max(1, round(retry_after))}s."
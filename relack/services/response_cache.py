@@ -0,0 +1,87 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+# How long an encoded response is served without looking at state again. 0
+# revalidates (recomputes the ETag) on every request.
+API_CACHE_MS = float(os.getenv("RELACK_API_CACHE_MS", "1000"))
+API_CACHE_ENTRIES = 1024
+
+
+class _Entry:
+    __slots__ = ("etag", "body", "fresh_until")
+
+    def __init__(self, etag: str, body: bytes, fresh_until: float):
+        self.etag = etag
+        self.body = body
+        self.fresh_until = fresh_until
+
+
+class ResponseCache:
+    """Short-lived cache of encoded read API responses, keyed by path and query.
+
+    A fresh entry is returned as is. Once it is older than ``ttl_ms`` the
+    caller's ``etag`` function is asked for the current tag (cheap: it reads
+    version counters). If the tag is unchanged the entry is reused and only
+    then is the body rebuilt. Polling clients therefore cost one dict lookup
+    (or a 304) most of the time.
+    """
+
+    def __init__(self, ttl_ms: float = API_CACHE_MS, max_entries: int = API_CACHE_ENTRIES):
+        self.ttl_ms = ttl_ms
+        self.max_entries = max_entries
+        # Least recently used first.
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.requests = 0
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.built = 0
+        self.not_modified = 0
+
+    async def serve(
+        self, key: str, load: Callable[[], Awaitable[tuple[str, Callable[[], bytes]]]]
+    ) -> tuple[str, bytes]:
+        """Return ``(etag, body)`` for ``key``.
+
+        ``load`` returns the current ETag and a function that encodes the body;
+        it is only awaited when the cached entry is stale or missing.
+        """
+
+        self.requests += 1
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.fresh_until:
+            self._entries.move_to_end(key)
+            self.fresh_hits += 1
+            return entry.etag, entry.body
+        etag, build = await load()
+        if entry is not None and entry.etag == etag:
+            self.revalidated += 1
+        else:
+            entry = _Entry(etag, build(), 0.0)
+            self.built += 1
+        entry.fresh_until = now + self.ttl_ms / 1000
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry.etag, entry.body
+
+    def record_not_modified(self):
+        self.not_modified += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "built": self.built,
+        }
+
+
+api_cache = ResponseCache()
@@ -0,0 +1,133 @@
+import asyncio
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Sequence
+
+ARCHIVE_DIR = Path(os.getenv("RELACK_ARCHIVE_DIR", ".relack_archive"))
+COMPACTION_INTERVAL_SECONDS = float(os.getenv("RELACK_COMPACTION_INTERVAL", "30"))
+# Integers in a record (id, timestamp) are not shared, unlike the interned sender.
+_INT_BYTES = 2 * sys.getsizeof(2**62)
+
+ArchiveBatch = dict[str, list[dict[str, Any]]]
+
+
+def message_bytes(message: Any) -> int:
+    """Approximate resident size of one stored message (record + content + ints)."""
+
+    return sys.getsizeof(message) + sys.getsizeof(message.content) + _INT_BYTES
+
+
+def expired_prefix(messages: Sequence[Any], policy: Any, now_ms: int) -> int:
+    """How many of the oldest ``messages`` violate ``policy``.
+
+    ``messages`` must be in send order. A limit of 0 means "unlimited".
+    """
+
+    total = len(messages)
+    cut = 0
+    if policy.max_count and total > policy.max_count:
+        cut = total - policy.max_count
+    if policy.max_age_hours:
+        cutoff = now_ms - int(policy.max_age_hours * 3_600_000)
+        cut = max(cut, bisect.bisect_left(messages, cutoff, key=lambda msg: msg.timestamp))
+    if policy.max_bytes:
+        kept = sum(message_bytes(msg) for msg in messages[cut:])
+        while cut < total and kept > policy.max_bytes:
+            kept -= message_bytes(messages[cut])
+            cut += 1
+    return cut
+
+
+def _archive_path(room_name: str) -> Path:
+    slug = re.sub(r"[^a-z0-9]+", "-", room_name.lower()).strip("-") or "room"
+    digest = hashlib.sha1(room_name.encode("utf-8")).hexdigest()[:8]
+    return ARCHIVE_DIR / f"{slug}-{digest}.jsonl.gz"
+
+
+def _append_archive_blocking(expired: ArchiveBatch):
+    """Append each room's messages to its archive, removing rooms from ``expired`` once written."""
+
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    for room_name, payloads in list(expired.items()):
+        # Each call appends a new gzip member; readers see one concatenated stream.
+        with gzip.open(_archive_path(room_name), "at", encoding="utf-8") as fh:
+            for payload in payloads:
+                fh.write(json.dumps({"room": room_name, **payload}) + "\n")
+        del expired[room_name]
+
+
+class RetentionCompactor:
+    """Background task that enforces retention policies off the write path.
+
+    ``compact`` (bound by the lobby) trims hot history under the lobby lock and
+    returns ``(to_archive, dropped_count)``; the archive write happens
+    afterwards in a worker thread so the lock is never held for disk I/O.
+    Those messages are already gone from hot history, so rooms whose write
+    fails are kept in memory and retried on the next pass.
+    """
+
+    def __init__(self, interval: float = COMPACTION_INTERVAL_SECONDS):
+        self.interval = interval
+        self._compact: Callable[[], Awaitable[tuple[ArchiveBatch, int]]] | None = None
+        # Expired messages whose archive write has not succeeded yet, by room.
+        self._unwritten: ArchiveBatch = {}
+        self.archived_total = 0
+        self.dropped_total = 0
+        self.last_run_ms = 0
+
+    def bind(self, compact: Callable[[], Awaitable[tuple[ArchiveBatch, int]]]):
+        self._compact = compact
+
+    async def store(self, to_archive: ArchiveBatch, dropped: int = 0):
+        """Append expired messages to the cold archive and update counters."""
+
+        self.dropped_total += dropped
+        for room_name, payloads in to_archive.items():
+            self._unwritten.setdefault(room_name, []).extend(payloads)
+        if self._unwritten:
+            batch, self._unwritten = self._unwritten, {}
+            queued = sum(len(payloads) for payloads in batch.values())
+            try:
+                await asyncio.to_thread(_append_archive_blocking, batch)
+            finally:
+                # ``batch`` now holds only the rooms that were not written; keep
+                # them ahead of anything expired in the meantime.
+                for room_name, payloads in self._unwritten.items():
+                    batch.setdefault(room_name, []).extend(payloads)
+                self._unwritten = batch
+                self.archived_total += queued - sum(len(payloads) for payloads in batch.values())
+        self.last_run_ms = time.time_ns() // 1_000_000
+
+    async def run_once(self):
+        if self._compact is None:
+            raise RuntimeError("RetentionCompactor used before bind().")
+        await self.store(*await self._compact())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "archived_total": self.archived_total,
+            "dropped_total": self.dropped_total,
+            "unwritten_total": sum(len(payloads) for payloads in self._unwritten.values()),
+            "last_run_ms": self.last_run_ms,
+        }
+
+    async def run(self):
+        """Lifespan task: compact every ``interval`` seconds until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logging.exception("Retention compaction failed")
+
+
+retention_compactor = RetentionCompactor()
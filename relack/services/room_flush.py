@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from relack.services.compat import require_attributes, require_parameters
+
+FLUSH_WINDOW_MS = float(os.getenv("RELACK_FLUSH_WINDOW_MS", "30"))
+# Hard cap on the window, and so on the latency batching may add to an update.
+MAX_FLUSH_WINDOW_MS = 100.0
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class RoomFlushScheduler:
+    """Coalesces linked-state fan-out into one update per client per window.
+
+    Reflex pushes every change to a shared state (a room or the lobby) to
+    each other linked client as soon as the event finishes. Once installed,
+    those pushes are queued per ``(client, shared state)`` and their dirty
+    vars merged. The first queued change opens a window. When it closes,
+    every queued client is brought up to date with a single state update.
+    The window does not slide, so no change waits longer than
+    ``window_ms`` (capped at ``MAX_FLUSH_WINDOW_MS``). A window of 0
+    restores Reflex's immediate behaviour.
+    """
+
+    def __init__(self, window_ms: float = FLUSH_WINDOW_MS, history: int = 512):
+        self.window_ms = max(0.0, min(window_ms, MAX_FLUSH_WINDOW_MS))
+        # (client token, shared state type) -> merged dirty vars per state name.
+        self._pending: dict[tuple[str, type], dict[str, set[str]]] = {}
+        self._opened_at = 0.0
+        self._window_mutations = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._installed = False
+        self.mutations = 0
+        self.flushes = 0
+        self.client_updates = 0
+        self.coalesced = 0
+        # Per flush: changes merged, clients updated, and ms from first change to flush.
+        self._batch_sizes: deque[int] = deque(maxlen=history)
+        self._batch_clients: deque[int] = deque(maxlen=history)
+        self._delays_ms: deque[float] = deque(maxlen=history)
+
+    def schedule(
+        self,
+        affected_tokens: set[str],
+        previous_dirty_vars: dict[str, set[str]],
+        state_type: type,
+    ) -> list[asyncio.Task]:
+        """Drop-in for ``reflex.istate.shared._do_update_other_tokens``."""
+
+        if not self.window_ms:
+            return self._update_clients(
+                [(token, state_type, previous_dirty_vars) for token in affected_tokens]
+            )
+        self.mutations += 1
+        self._window_mutations += 1
+        for token in affected_tokens:
+            pending = self._pending.get((token, state_type))
+            if pending is None:
+                pending = self._pending[(token, state_type)] = {}
+            else:
+                self.coalesced += 1
+            for state_name, dirty_vars in previous_dirty_vars.items():
+                pending.setdefault(state_name, set()).update(dirty_vars)
+        if self._pending and self._timer is None:
+            self._opened_at = time.perf_counter()
+            self._timer = asyncio.get_running_loop().call_later(self.window_ms / 1000, self.flush)
+        return []
+
+    def flush(self):
+        """Send one update to every client with queued changes."""
+
+        self._timer = None
+        pending, self._pending = self._pending, {}
+        mutations, self._window_mutations = self._window_mutations, 0
+        if not pending:
+            return
+        self.flushes += 1
+        self._batch_sizes.append(mutations)
+        self._batch_clients.append(len(pending))
+        self._delays_ms.append((time.perf_counter() - self._opened_at) * 1000)
+        self._update_clients(
+            [(token, state_type, dirty_vars) for (token, state_type), dirty_vars in pending.items()]
+        )
+
+    def _update_clients(self, updates: list[tuple[str, type, dict[str, set[str]]]]) -> list[asyncio.Task]:
+        from reflex.istate.shared import UPDATE_OTHER_CLIENT_TASKS, _log_update_client_errors  # noqa: WPS433
+        from reflex.state import _substate_key  # noqa: WPS433
+        from reflex.utils.prerequisites import get_app  # noqa: WPS433
+
+        app = get_app().app
+        connected = app.event_namespace._token_manager.token_to_socket
+
+        async def update_client(token: str, state_type: type, dirty_vars: dict[str, set[str]]):
+            async with app.modify_state(_substate_key(token, state_type), previous_dirty_vars=dirty_vars):
+                pass
+
+        tasks = []
+        for token, state_type, dirty_vars in updates:
+            # Disconnected clients catch up when they rehydrate.
+            if token not in connected:
+                continue
+            task = asyncio.create_task(update_client(token, state_type, dirty_vars))
+            UPDATE_OTHER_CLIENT_TASKS.add(task)
+            task.add_done_callback(_log_update_client_errors)
+            tasks.append(task)
+        self.client_updates += len(tasks)
+        return tasks
+
+    def install(self):
+        """Route Reflex's linked-state fan-out through the scheduler."""
+
+        if self._installed:
+            return
+        from reflex.istate import shared  # noqa: WPS433
+
+        require_attributes(
+            shared,
+            ("_do_update_other_tokens", "UPDATE_OTHER_CLIENT_TASKS", "_log_update_client_errors"),
+            "Room flush scheduler",
+        )
+        require_parameters(
+            shared._do_update_other_tokens,
+            ("affected_tokens", "previous_dirty_vars", "state_type"),
+            "Room flush scheduler",
+        )
+        shared._do_update_other_tokens = self.schedule
+        self._installed = True
+
+    def stats(self) -> dict[str, float]:
+        sizes = list(self._batch_sizes)
+        clients = list(self._batch_clients)
+        delays = list(self._delays_ms)
+        return {
+            "window_ms": self.window_ms,
+            "flushes": self.flushes,
+            "mutations": self.mutations,
+            "client_updates": self.client_updates,
+            "coalesced_updates": self.coalesced,
+            "batch_size_p50": _percentile(sizes, 0.5),
+            "batch_size_max": max(sizes, default=0),
+            "batch_clients_max": max(clients, default=0),
+            "flush_delay_p95_ms": round(_percentile(delays, 0.95), 1),
+            "flush_delay_max_ms": round(max(delays, default=0.0), 1),
+        }
+
+    async def run(self):
+        """Lifespan task: install the scheduler (the window timer runs on the event loop)."""
+
+        self.install()
+        logging.info("Room updates are batched in %.0f ms windows", self.window_ms)
+
+
+room_flush = RoomFlushScheduler()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import pickle
+import time
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+ROOM_CACHE_DIR = Path(os.getenv("RELACK_ROOM_CACHE_DIR", ".relack_rooms"))
+ROOM_IDLE_SECONDS = float(os.getenv("RELACK_ROOM_IDLE_SECONDS", "600"))
+ROOM_MEMORY_BUDGET = int(os.getenv("RELACK_ROOM_MEMORY_BUDGET", str(64 * 1024 * 1024)))
+
+
+class _ResidentRoom:
+    __slots__ = ("last_active", "members", "size")
+
+    def __init__(self, last_active: float, members: int, size: int):
+        self.last_active = last_active
+        self.members = members
+        self.size = size
+
+
+class RoomResidency:
+    """Tracks which rooms have hydrated RoomState data in memory.
+
+    Rooms are kept in LRU order. A sweep evicts rooms that have been idle for
+    ``idle_seconds``, and memberless rooms in LRU order while the resident
+    total exceeds ``memory_budget``. Evicted rooms are stored as compressed
+    snapshots and rehydrated on the next join. ``evict`` is bound by the room
+    state module and returns False if the room turned out to be in use.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: float = ROOM_IDLE_SECONDS,
+        memory_budget: int = ROOM_MEMORY_BUDGET,
+        sweep_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.idle_seconds = idle_seconds
+        self.memory_budget = memory_budget
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._evict: Callable[[str], Awaitable[bool]] | None = None
+        self._resident: OrderedDict[str, _ResidentRoom] = OrderedDict()
+        self._evicted: set[str] = set()
+        self.evictions = 0
+        self.rehydrations = 0
+        self._rehydrate_ms: deque[float] = deque(maxlen=256)
+
+    def bind(self, evict: Callable[[str], Awaitable[bool]]):
+        self._evict = evict
+
+    def needs_hydration(self, token: str) -> bool:
+        return token not in self._resident
+
+    def is_evicted(self, token: str) -> bool:
+        return token in self._evicted
+
+    def mark_resident(self, token: str, size: int, members: int = 0):
+        self._evicted.discard(token)
+        self._resident[token] = _ResidentRoom(self._clock(), members, size)
+
+    def touch(self, token: str, members: int | None = None, added_bytes: int = 0):
+        """Record activity (and optionally membership/size changes) for a resident room."""
+
+        entry = self._resident.get(token)
+        if entry is None:
+            return
+        entry.last_active = self._clock()
+        if members is not None:
+            entry.members = members
+        entry.size += added_bytes
+        self._resident.move_to_end(token)
+
+    def shrink(self, token: str, removed_bytes: int):
+        """Account for history trimmed from a resident room (not activity)."""
+
+        entry = self._resident.get(token)
+        if entry is not None:
+            entry.size = max(0, entry.size - removed_bytes)
+
+    def record_rehydration(self, started: float):
+        self.rehydrations += 1
+        self._rehydrate_ms.append((time.perf_counter() - started) * 1000)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.size for entry in self._resident.values())
+
+    def eviction_candidates(self) -> list[str]:
+        """Idle rooms first, then memberless rooms in LRU order until under budget."""
+
+        now = self._clock()
+        candidates = [
+            token for token, entry in self._resident.items() if now - entry.last_active >= self.idle_seconds
+        ]
+        remaining = self.resident_bytes - sum(self._resident[token].size for token in candidates)
+        for token, entry in self._resident.items():
+            if remaining <= self.memory_budget:
+                break
+            if not entry.members and token not in candidates:
+                candidates.append(token)
+                remaining -= entry.size
+        return candidates
+
+    def _path(self, token: str) -> Path:
+        return ROOM_CACHE_DIR / f"{token}.pkl.z"
+
+    def _save_blocking(self, token: str, snapshot: dict[str, Any]):
+        ROOM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        self._path(token).write_bytes(data)
+
+    def _load_blocking(self, token: str) -> dict[str, Any]:
+        path = self._path(token)
+        try:
+            snapshot = pickle.loads(zlib.decompress(path.read_bytes()))
+        except (OSError, zlib.error, pickle.UnpicklingError):
+            logging.warning("Room snapshot for %s is missing or unreadable; rehydrating from the lobby", token)
+            return {}
+        path.unlink(missing_ok=True)
+        return snapshot
+
+    async def save(self, token: str, snapshot: dict[str, Any]):
+        """Write an evicted room's compact snapshot and drop it from the resident set."""
+
+        await asyncio.to_thread(self._save_blocking, token, snapshot)
+        self._resident.pop(token, None)
+        self._evicted.add(token)
+        self.evictions += 1
+
+    async def load(self, token: str) -> dict[str, Any]:
+        """Read (and remove) an evicted room's snapshot."""
+
+        if token not in self._evicted:
+            return {}
+        snapshot = await asyncio.to_thread(self._load_blocking, token)
+        self._evicted.discard(token)
+        return snapshot
+
+    def invalidate(self):
+        """Forget all rooms, e.g. after lobby data is cleared or replaced.
+
+        Resident RoomState data becomes stale and is re-hydrated on next join.
+        """
+
+        for token in self._evicted:
+            self._path(token).unlink(missing_ok=True)
+        self._evicted.clear()
+        self._resident.clear()
+
+    def stats(self) -> dict[str, float]:
+        samples = sorted(self._rehydrate_ms)
+        return {
+            "resident_rooms": len(self._resident),
+            "resident_bytes": self.resident_bytes,
+            "evicted_rooms": len(self._evicted),
+            "evictions": self.evictions,
+            "rehydrations": self.rehydrations,
+            "rehydrate_ms_avg": round(sum(samples) / len(samples), 3) if samples else 0.0,
+            "rehydrate_ms_p95": round(samples[int(0.95 * (len(samples) - 1))], 3) if samples else 0.0,
+            "rehydrate_ms_max": round(samples[-1], 3) if samples else 0.0,
+        }
+
+    async def sweep(self) -> int:
+        if self._evict is None:
+            raise RuntimeError("RoomResidency used before bind().")
+        evicted = 0
+        for token in self.eviction_candidates():
+            if await self._evict(token):
+                evicted += 1
+        return evicted
+
+    async def run(self):
+        """Lifespan task: sweep for idle rooms every ``sweep_interval`` seconds."""
+
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                if evicted := await self.sweep():
+                    logging.info("Evicted %d idle rooms: %s", evicted, self.stats())
+            except Exception:
+                logging.exception("Room eviction sweep failed")
+
+
+room_residency = RoomResidency()
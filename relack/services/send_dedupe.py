@@ -0,0 +1,68 @@
+from collections import deque
+
+# Idempotency keys remembered per room; replays older than this many sends are not caught.
+DEDUPE_WINDOW = 512
+MAX_KEY_LENGTH = 64
+
+
+class _Window:
+    __slots__ = ("keys", "order")
+
+    def __init__(self):
+        self.keys: set[tuple[str, str]] = set()
+        self.order: deque[tuple[str, str]] = deque()
+
+
+class SendDedupe:
+    """Recently used ``(sender, idempotency key)`` pairs per room.
+
+    Each room keeps a hash set for O(1) lookups and a FIFO that evicts the
+    oldest key once ``window`` keys are held, so memory per room is bounded.
+    """
+
+    def __init__(self, window: int = DEDUPE_WINDOW):
+        self.window = window
+        self._rooms: dict[str, _Window] = {}
+        self.duplicates = 0
+
+    def is_duplicate(self, room_name: str, sender: str, key: str) -> bool:
+        """True if this send was already accepted; counts it as a dropped duplicate."""
+
+        window = self._rooms.get(room_name)
+        if not key or window is None or (sender, key) not in window.keys:
+            return False
+        self.duplicates += 1
+        return True
+
+    def remember(self, room_name: str, sender: str, key: str):
+        if not key:
+            return
+        window = self._rooms.get(room_name)
+        if window is None:
+            window = self._rooms[room_name] = _Window()
+        entry = (sender, key)
+        if entry in window.keys:
+            return
+        window.keys.add(entry)
+        window.order.append(entry)
+        if len(window.order) > self.window:
+            window.keys.discard(window.order.popleft())
+
+    def forget_room(self, room_name: str):
+        self._rooms.pop(room_name, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "rooms": len(self._rooms),
+            "keys": sum(len(window.order) for window in self._rooms.values()),
+            "duplicates_dropped": self.duplicates,
+        }
+
+
+def normalize_key(value: object) -> str:
+    """Accept short string keys only; anything else disables dedupe for the send."""
+
+    return value if isinstance(value, str) and len(value) <= MAX_KEY_LENGTH else ""
+
+
+send_dedupe = SendDedupe()
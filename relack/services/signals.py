@@ -0,0 +1,258 @@
+"""Ephemeral room signals: presence pings and typing indicators.
+
+These signals are frequent and safe to lose, so they never pass through
+Reflex state. ``SignalHub`` keeps them in process memory, each with a TTL.
+Clients publish and subscribe over a plain WebSocket (``relack.api.signals``)
+that is identified by the Reflex client token. ``RoomState`` registers that
+token with ``enter``/``leave`` when the client joins or leaves a room.
+Subscribers only receive changes: a signal appearing, its value changing, or
+it being cleared or expiring. Repeating a signal just extends its TTL.
+
+Presence has one consumer outside the hub. ``on_presence`` is bound by the
+rooms. Each sweep it is given the clients whose pings lapsed and the ones
+that resumed, so the room can mark those sessions idle or active.
+
+Like the other services, the hub is per process.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+# Seconds a signal lives without being repeated.
+SIGNAL_TTLS = {
+    "presence": 180.0,  # after this, the client's room session is marked idle
+    "typing": 6.0,
+}
+SWEEP_SECONDS = 1.0
+# Messages buffered per connection; a slow client misses signals rather than blocking the room.
+QUEUE_SIZE = 64
+MAX_VALUE_LENGTH = 64
+
+
+class _Member:
+    __slots__ = ("room", "username", "name", "queue")
+
+    def __init__(self, room: str, username: str, name: str):
+        self.room = room
+        self.username = username
+        self.name = name
+        self.queue: asyncio.Queue | None = None
+
+
+class _Signal:
+    __slots__ = ("name", "value", "expires")
+
+    def __init__(self, name: str, value: Any, expires: float):
+        self.name = name
+        self.value = value
+        self.expires = expires
+
+
+def _normalize_value(kind: str, value: Any) -> Any:
+    """The value to store, or None to reject the signal."""
+
+    if kind == "typing":
+        return bool(value)
+    if kind == "presence":
+        return True
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    return value if len(str(value)) <= MAX_VALUE_LENGTH else None
+
+
+class SignalHub:
+    """Per-room signals with a TTL, fanned out to the room's open connections."""
+
+    def __init__(self, ttls: dict[str, float] | None = None, sweep_seconds: float = SWEEP_SECONDS):
+        self.ttls = dict(SIGNAL_TTLS if ttls is None else ttls)
+        self.sweep_seconds = sweep_seconds
+        # Reflex client token -> where that client is and who it is.
+        self._members: dict[str, _Member] = {}
+        self._rooms: dict[str, set[str]] = {}
+        # Room -> (kind, username) -> live signal.
+        self._signals: dict[str, dict[tuple[str, str], _Signal]] = {}
+        # Client token -> monotonic time of its last presence ping.
+        self._seen: dict[str, float] = {}
+        # Clients reported absent, and those among them that pinged again since.
+        self._absent: set[str] = set()
+        self._returned: set[str] = set()
+        self._on_presence: Callable[[list[str], list[str]], Awaitable[Any]] | None = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def bind(self, on_presence: Callable[[list[str], list[str]], Awaitable[Any]]):
+        self._on_presence = on_presence
+
+    def enter(self, client_token: str, room: str, username: str, name: str):
+        """Register a client in ``room`` (or move it there) and mark it present."""
+
+        member = self._members.get(client_token)
+        moved = member is not None and member.room != room
+        if moved:
+            self._detach_room(client_token, member)
+        if member is None:
+            member = self._members[client_token] = _Member(room, username, name)
+        member.room, member.username, member.name = room, username, name
+        self._rooms.setdefault(room, set()).add(client_token)
+        self.publish(client_token, "presence", True)
+        if moved:
+            # An open connection follows the client to its new room.
+            self._put(member, self._reset_message(member))
+
+    def leave(self, client_token: str):
+        member = self._members.pop(client_token, None)
+        self._seen.pop(client_token, None)
+        self._absent.discard(client_token)
+        self._returned.discard(client_token)
+        if member is not None:
+            self._detach_room(client_token, member)
+
+    def is_present(self, client_token: str) -> bool:
+        seen = self._seen.get(client_token)
+        return seen is not None and time.monotonic() - seen <= self.ttls["presence"]
+
+    def publish(self, client_token: str, kind: str, value: Any) -> bool:
+        """Set a signal for this client's user in its room; False if rejected."""
+
+        member = self._members.get(client_token)
+        ttl = self.ttls.get(kind)
+        if member is None or ttl is None:
+            return False
+        value = _normalize_value(kind, value)
+        if value is None:
+            return False
+        now = time.monotonic()
+        if kind == "presence":
+            self._seen[client_token] = now
+            if client_token in self._absent:
+                self._absent.discard(client_token)
+                self._returned.add(client_token)
+        self.published += 1
+        signals = self._signals.setdefault(member.room, {})
+        key = (kind, member.username)
+        if value is False:
+            if signals.pop(key, None) is not None:
+                self._broadcast(member.room, {"op": "clear", "kind": kind, "user": member.username})
+            return True
+        current = signals.get(key)
+        if current is not None and current.value == value:
+            current.expires = now + ttl
+            return True
+        signals[key] = _Signal(member.name, value, now + ttl)
+        self._broadcast(member.room, self._set_message(kind, member.username, signals[key]))
+        return True
+
+    def attach(self, client_token: str) -> asyncio.Queue | None:
+        """Open a connection's outbound queue, primed with the room's live signals."""
+
+        member = self._members.get(client_token)
+        if member is None:
+            return None
+        member.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._put(member, self._reset_message(member))
+        return member.queue
+
+    def detach(self, client_token: str, queue: asyncio.Queue):
+        member = self._members.get(client_token)
+        if member is not None and member.queue is queue:
+            member.queue = None
+
+    def expire(self, now: float | None = None) -> int:
+        """Drop signals past their TTL and tell their rooms."""
+
+        now = time.monotonic() if now is None else now
+        count = 0
+        for room, signals in list(self._signals.items()):
+            for key in [key for key, signal in signals.items() if signal.expires <= now]:
+                del signals[key]
+                count += 1
+                self._broadcast(room, {"op": "clear", "kind": key[0], "user": key[1]})
+            if not signals:
+                del self._signals[room]
+        self.expired += count
+        return count
+
+    def presence_changes(self, now: float | None = None) -> tuple[list[str], list[str]]:
+        """Clients whose presence lapsed, and those that came back, since the last call."""
+
+        now = time.monotonic() if now is None else now
+        ttl = self.ttls["presence"]
+        lapsed = [
+            token for token, seen in self._seen.items() if now - seen > ttl and token not in self._absent
+        ]
+        self._absent.update(lapsed)
+        returned, self._returned = list(self._returned), set()
+        return lapsed, returned
+
+    def _detach_room(self, client_token: str, member: _Member):
+        tokens = self._rooms.get(member.room)
+        if tokens is None:
+            return
+        tokens.discard(client_token)
+        if not tokens:
+            del self._rooms[member.room]
+            self._signals.pop(member.room, None)
+            return
+        if any(self._members[token].username == member.username for token in tokens):
+            return
+        # The user's last client here is gone, so are their signals.
+        signals = self._signals.get(member.room, {})
+        for key in [key for key in signals if key[1] == member.username]:
+            del signals[key]
+            self._broadcast(member.room, {"op": "clear", "kind": key[0], "user": key[1]})
+
+    def _set_message(self, kind: str, username: str, signal: _Signal) -> dict[str, Any]:
+        return {"op": "set", "kind": kind, "user": username, "name": signal.name, "value": signal.value}
+
+    def _reset_message(self, member: _Member) -> dict[str, Any]:
+        signals = self._signals.get(member.room, {})
+        return {
+            "op": "reset",
+            "room": member.room,
+            "you": member.username,
+            "signals": [self._set_message(kind, user, signal) for (kind, user), signal in signals.items()],
+        }
+
+    def _broadcast(self, room: str, message: dict[str, Any]):
+        for token in self._rooms.get(room, ()):
+            self._put(self._members[token], message)
+
+    def _put(self, member: _Member, message: dict[str, Any]):
+        if member.queue is None:
+            return
+        try:
+            member.queue.put_nowait(message)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "members": len(self._members),
+            "connections": sum(1 for member in self._members.values() if member.queue is not None),
+            "live_signals": sum(len(signals) for signals in self._signals.values()),
+            "signals_published": self.published,
+            "signals_delivered": self.delivered,
+            "signals_dropped": self.dropped,
+            "signals_expired": self.expired,
+        }
+
+    async def run(self):
+        """Lifespan task: expire signals and report presence changes every ``sweep_seconds``."""
+
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                self.expire()
+                lapsed, returned = self.presence_changes()
+                if (lapsed or returned) and self._on_presence is not None:
+                    await self._on_presence(lapsed, returned)
+            except Exception:
+                logging.exception("Signal expiry failed")
+
+
+signal_hub = SignalHub()
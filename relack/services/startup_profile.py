@@ -0,0 +1,160 @@
+"""Opt-in startup profiling (``RELACK_PROFILE_STARTUP=1``).
+
+Installed from ``rxconfig.py`` so it sees the app's imports from the start.
+It records per-module import time and time-to-first-connection, logs a
+report, and appends one JSON line per run to ``RELACK_STARTUP_PROFILE_LOG``
+so before/after runs can be compared.
+"""
+
+import importlib.abc
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+ENABLED = os.getenv("RELACK_PROFILE_STARTUP", "").lower() in {"1", "true", "yes"}
+PROFILE_LOG = Path(os.getenv("RELACK_STARTUP_PROFILE_LOG", ".relack_startup.jsonl"))
+TOP_MODULES = 25
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, profiler: "StartupProfiler", loader: importlib.abc.Loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class StartupProfiler(importlib.abc.MetaPathFinder):
+    """Times module execution on import (self time excludes nested imports)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.self_ms: dict[str, float] = {}
+        self.marks: dict[str, float] = {}
+        self._stack: list[list[float]] = []  # [start, time spent in child imports]
+        self._finding: set[str] = set()
+        self.reported = False
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(self, spec.loader)
+        return spec
+
+    def _enter(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.self_ms[name] = (elapsed - children) * 1000
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def mark(self, name: str):
+        """Record the first time ``name`` happens, in ms since profiling started."""
+
+        self.marks.setdefault(name, (time.perf_counter() - self.started) * 1000)
+
+    def report(self) -> dict:
+        top = sorted(self.self_ms.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]
+        return {
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid": os.getpid(),
+            "modules": len(self.self_ms),
+            "import_ms": round(sum(self.self_ms.values()), 1),
+            "marks_ms": {name: round(value, 1) for name, value in self.marks.items()},
+            "top_modules_ms": {name: round(value, 1) for name, value in top},
+        }
+
+    def finish(self):
+        """Log the report and append it to ``PROFILE_LOG`` (once per process)."""
+
+        if self.reported:
+            return
+        self.reported = True
+        sys.meta_path[:] = [finder for finder in sys.meta_path if finder is not self]
+        report = self.report()
+        logging.warning(
+            "Startup profile: %d modules, %.0f ms importing, marks %s; slowest: %s",
+            report["modules"],
+            report["import_ms"],
+            report["marks_ms"],
+            ", ".join(f"{name} {ms}ms" for name, ms in list(report["top_modules_ms"].items())[:10]),
+        )
+        try:
+            with PROFILE_LOG.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(report) + "\n")
+        except OSError:
+            logging.exception("Could not write startup profile to %s", PROFILE_LOG)
+
+
+_profiler: StartupProfiler | None = None
+
+
+def install():
+    """Start profiling if enabled; safe to call more than once."""
+
+    global _profiler
+    if ENABLED and _profiler is None:
+        _profiler = StartupProfiler()
+        sys.meta_path.insert(0, _profiler)
+
+
+def mark(name: str):
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+def first_connection():
+    """Called on each accepted socket connection; the first one ends profiling."""
+
+    if _profiler is not None and not _profiler.reported:
+        _profiler.mark("first_connection")
+        _profiler.finish()
+
+
+def lifespan():
+    """Lifespan task: mark server start and watch for the first accepted connection."""
+
+    if _profiler is None:
+        return
+    mark("lifespan_started")
+    from reflex.utils.prerequisites import get_app  # noqa: WPS433
+
+    namespace = get_app().app.event_namespace
+    on_connect = namespace.on_connect
+
+    async def profiled_on_connect(sid: str, environ: dict, *_):
+        result = await on_connect(sid, environ)
+        first_connection()
+        return result
+
+    namespace.on_connect = profiled_on_connect
@@ -0,0 +1,18 @@
+from typing import Any, Iterable
+
+
+def paginate(matches: Iterable[Any], offset: int, limit: int) -> tuple[list[Any], int]:
+    """Collect ``matches[offset:offset + limit]`` while counting every match."""
+
+    page: list[Any] = []
+    total = 0
+    for item in matches:
+        if offset <= total < offset + limit:
+            page.append(item)
+        total += 1
+    return page, total
+
+
+def contains_text(text: str, *fields: str) -> bool:
+    return any(text in field.lower() for field in fields)
+
@@ -0,0 +1,197 @@
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# Unknown key IDs trigger at most one cert refetch per this many seconds, so
+# junk tokens cannot make us hammer Google's cert endpoint.
+FORCED_REFRESH_INTERVAL = 60.0
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def cache_ttl_from_headers(headers: Any, default_ttl: float) -> float:
+    """Derive a cert cache lifetime from Cache-Control / Age response headers."""
+
+    headers = {str(k).lower(): str(v) for k, v in dict(headers or {}).items()}
+    cache_control = headers.get("cache-control", "")
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    if not match:
+        return default_ttl
+    ttl = float(match.group(1))
+    try:
+        ttl -= float(headers.get("age", 0))
+    except ValueError:
+        pass
+    return max(ttl, 0.0)
+
+
+def token_key_id(token: str) -> str:
+    """The ``kid`` from a JWT's (unverified) header; raises ValueError if it is malformed."""
+
+    header = token.split(".", 1)[0]
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Malformed token header") from exc
+    if not isinstance(decoded, dict):
+        raise ValueError("Malformed token header")
+    key_id = decoded.get("kid", "")
+    return key_id if isinstance(key_id, str) else ""
+
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens without blocking the event loop.
+
+    Signing certs are cached for as long as the cert endpoint allows, and
+    verified claims are cached per token until the token expires. Any network
+    fetch runs in the default thread pool. ``google.auth`` is imported on first
+    use rather than at startup. A token signed with a key we do not know forces
+    a refetch at most once per ``forced_refresh_interval`` seconds; if the key
+    is still unknown the token is rejected.
+    """
+
+    def __init__(
+        self,
+        certs_url: str = GOOGLE_CERTS_URL,
+        fetch: Callable[..., Any] | None = None,
+        default_ttl: float = 300.0,
+        max_cached_tokens: int = 1024,
+        clock: Callable[[], float] = time.time,
+        forced_refresh_interval: float = FORCED_REFRESH_INTERVAL,
+    ):
+        self.certs_url = certs_url
+        # ``fetch`` follows the google.auth transport interface:
+        # fetch(url, method="GET") -> response with .status, .headers, .data
+        self._fetch = fetch
+        self.default_ttl = default_ttl
+        self.max_cached_tokens = max_cached_tokens
+        self._clock = clock
+        self.forced_refresh_interval = forced_refresh_interval
+        self._forced_refresh_at: float | None = None
+        self._certs: dict[str, str] = {}
+        self._certs_expire_at: float = 0.0
+        self._certs_lock = asyncio.Lock()
+        self._results: OrderedDict[tuple[str, str], tuple[dict[str, Any], float]] = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    def _fetch_certs_blocking(self) -> tuple[dict[str, str], float]:
+        from google.auth import exceptions  # noqa: WPS433
+        from google.auth.transport import requests  # noqa: WPS433
+
+        fetch = self._fetch or requests.Request()
+        response = fetch(self.certs_url, method="GET")
+        if response.status != 200:
+            raise exceptions.TransportError(f"Could not fetch certificates at {self.certs_url}")
+        certs = json.loads(response.data.decode("utf-8"))
+        return certs, cache_ttl_from_headers(response.headers, self.default_ttl)
+
+    def _certs_fresh(self) -> bool:
+        return bool(self._certs) and self._clock() < self._certs_expire_at
+
+    async def get_certs(self, force_refresh: bool = False) -> dict[str, str]:
+        """Return the cached signing certs, refreshing them off-loop when stale."""
+
+        if not force_refresh and self._certs_fresh():
+            return self._certs
+        async with self._certs_lock:
+            # Another coroutine may have refreshed while we waited.
+            if not force_refresh and self._certs_fresh():
+                return self._certs
+            certs, ttl = await asyncio.to_thread(self._fetch_certs_blocking)
+            self._certs = certs
+            self._certs_expire_at = self._clock() + ttl
+            return certs
+
+    def _decode(
+        self, token: str, certs: dict[str, str], audience: str, clock_skew_in_seconds: int
+    ) -> dict[str, Any]:
+        from google.auth import exceptions, jwt  # noqa: WPS433
+
+        claims = jwt.decode(
+            token,
+            certs=certs,
+            audience=audience or None,
+            clock_skew_in_seconds=clock_skew_in_seconds,
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise exceptions.InvalidValue(
+                f"Wrong issuer. 'iss' should be one of {GOOGLE_ISSUERS} but is {claims.get('iss')!r}"
+            )
+        return dict(claims)
+
+    def _remember(self, key: tuple[str, str], claims: dict[str, Any]):
+        expires_at = float(claims.get("exp", 0))
+        with self._results_lock:
+            self._results[key] = (claims, expires_at)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_cached_tokens:
+                self._results.popitem(last=False)
+
+    def cached(self, token: str, audience: str) -> dict[str, Any] | None:
+        """Return previously verified claims for ``token`` if it has not expired."""
+
+        key = (token, audience)
+        with self._results_lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._results[key]
+                return None
+            self._results.move_to_end(key)
+            return claims
+
+    def verify_if_certs_cached(
+        self, token: str, audience: str, clock_skew_in_seconds: int = 0
+    ) -> dict[str, Any] | None:
+        """Synchronous verification that never touches the network.
+
+        Returns ``None`` when neither the claims nor fresh certs are cached;
+        callers in sync contexts (computed vars) should treat that as "unknown".
+        """
+
+        claims = self.cached(token, audience)
+        if claims is not None or not self._certs_fresh():
+            return claims
+        claims = self._decode(token, self._certs, audience, clock_skew_in_seconds)
+        self._remember((token, audience), claims)
+        return claims
+
+    async def verify(
+        self, token: str, audience: str, clock_skew_in_seconds: int = 0
+    ) -> dict[str, Any]:
+        """Verify ``token`` and return its claims; raises ValueError on bad tokens."""
+
+        claims = self.cached(token, audience)
+        if claims is not None:
+            return claims
+        key_id = token_key_id(token)
+        certs = await self.get_certs()
+        if key_id and key_id not in certs:
+            now = self._clock()
+            last = self._forced_refresh_at
+            if last is None or now - last >= self.forced_refresh_interval:
+                # Google may have rotated keys before our cached copy expired.
+                self._forced_refresh_at = now
+                logging.info("Unknown signing key id %s; refreshing Google certs", key_id)
+                certs = await self.get_certs(force_refresh=True)
+            if key_id not in certs:
+                raise ValueError(f"Unknown signing key id {key_id!r}")
+        claims = self._decode(token, certs, audience, clock_skew_in_seconds)
+        self._remember((token, audience), claims)
+        return claims
+
+
+google_token_verifier = GoogleTokenVerifier()
@@ -2,6 +2,9 @@ import reflex as rx
 import os
 from relack.states.shared_state import GlobalLobbyState
 from relack.states.permission_state import PermissionState
+from relack.states.admin_table_state import AdminTableState, TABLES
+from relack.states.metrics_state import MetricsState
+from relack.states.retention_state import RetentionState
 
 class AdminState(rx.State):
     passcode_input: str = ""
@@ -9,6 +12,17 @@ class AdminState(rx.State):
     is_settings_menu_open: bool = False
     active_settings_anchor: str = "data-maintenance"
     active_tab: str = "users"
+    # Snapshot JSON for export/import lives on the admin's session, not the shared lobby.
+    export_payload: str = ""
+    import_payload: str = ""
+
+    @rx.var
+    def has_export_payload(self) -> bool:
+        return bool(self.export_payload)
+
+    @rx.event
+    def set_import_payload(self, value: str):
+        self.import_payload = value
 
     @rx.event
     def set_passcode_input(self, value: str):
@@ -16,8 +30,15 @@ class AdminState(rx.State):
         self.passcode_input = value
 
     @rx.event
-    def set_active_tab(self, value: str):
+    async def set_active_tab(self, value: str):
         self.active_tab = value
+        if value in TABLES:
+            # Tables are fetched on demand; refresh the one being shown.
+            table_state = await self.get_state(AdminTableState)
+            await table_state.refresh(value)
+        elif value == "analytics":
+            metrics_state = await self.get_state(MetricsState)
+            await metrics_state.load_metrics()
 
     async def check_passcode(self):
         expected = os.getenv("ADMIN_PASSCODE")
@@ -31,6 +52,10 @@ class AdminState(rx.State):
             # Sync permissions UI from shared snapshot
             permission_state = await self.get_state(PermissionState)
             await permission_state.sync_from_lobby()
+            table_state = await self.get_state(AdminTableState)
+            await table_state.refresh_all()
+            retention_state = await self.get_state(RetentionState)
+            await retention_state.load_storage()
             return rx.toast("Admin access granted.")
         else:
             return rx.toast("Invalid Passcode")
@@ -38,6 +63,8 @@ class AdminState(rx.State):
     def logout(self):
         self.is_authenticated = False
         self.passcode_input = ""
+        self.export_payload = ""
+        self.import_payload = ""
         self.active_tab = "users"
 
     @rx.event
@@ -0,0 +1,127 @@
+import reflex as rx
+from relack.models import AdminRoomRow, AdminUserRow, ChatMessageLog
+from relack.services.profile_directory import profile_directory
+
+PAGE_SIZE = 50
+TABLES = ("users", "rooms", "messages")
+
+
+class AdminTableState(rx.State):
+    """Server-side paging, sorting, and filtering for the admin dashboard tables.
+
+    Only the current page of each table is sent to the browser. Users are
+    queried from ``profile_directory``, rooms and messages from the shared
+    lobby (see ``GlobalLobbyState._query_*``). Every handler requires an
+    authenticated admin.
+    """
+
+    user_rows: list[AdminUserRow] = []
+    users_total: int = 0
+    users_page: int = 0
+    users_sort: str = "created_at"
+    users_desc: bool = True
+    users_filter: str = ""
+
+    room_rows: list[AdminRoomRow] = []
+    rooms_total: int = 0
+    rooms_page: int = 0
+    rooms_sort: str = "activity"
+    rooms_desc: bool = True
+    rooms_filter: str = ""
+
+    message_rows: list[ChatMessageLog] = []
+    messages_total: int = 0
+    messages_page: int = 0
+    messages_sort: str = "time"
+    messages_desc: bool = True
+    messages_filter: str = ""
+
+    @rx.var
+    def users_page_count(self) -> int:
+        return max((self.users_total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+
+    @rx.var
+    def rooms_page_count(self) -> int:
+        return max((self.rooms_total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+
+    @rx.var
+    def messages_page_count(self) -> int:
+        return max((self.messages_total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+
+    async def _is_admin(self) -> bool:
+        from relack.states.admin_state import AdminState  # noqa: WPS433
+
+        admin_state = await self.get_state(AdminState)
+        return bool(admin_state.is_authenticated)
+
+    async def _query(self, table: str):
+        from relack.states.shared_state import GlobalLobbyState  # noqa: WPS433
+
+        rows_attr = {"users": "user_rows", "rooms": "room_rows", "messages": "message_rows"}[table]
+        page = getattr(self, f"{table}_page")
+        args = (
+            getattr(self, f"{table}_sort"),
+            getattr(self, f"{table}_desc"),
+            getattr(self, f"{table}_filter"),
+            page * PAGE_SIZE,
+            PAGE_SIZE,
+        )
+        if table == "users":
+            # On disk; queried in a worker thread.
+            profiles, total = await profile_directory.query(*args)
+            rows = [AdminUserRow.from_profile(profile) for profile in profiles]
+        else:
+            lobby = await self.get_state(GlobalLobbyState)
+            run = lobby._query_rooms if table == "rooms" else lobby._query_messages
+            rows, total = run(*args)
+        if not rows and page > 0 and total:
+            # The data shrank under us; jump to the last page that has rows.
+            setattr(self, f"{table}_page", (total - 1) // PAGE_SIZE)
+            return await self._query(table)
+        setattr(self, rows_attr, rows)
+        setattr(self, f"{table}_total", total)
+
+    @rx.event
+    async def refresh(self, table: str):
+        if table not in TABLES or not await self._is_admin():
+            return
+        await self._query(table)
+
+    @rx.event
+    async def refresh_all(self):
+        if not await self._is_admin():
+            return
+        for table in TABLES:
+            await self._query(table)
+
+    @rx.event
+    async def set_filter(self, table: str, value: str):
+        if table not in TABLES or not await self._is_admin():
+            return
+        setattr(self, f"{table}_filter", value)
+        setattr(self, f"{table}_page", 0)
+        await self._query(table)
+
+    @rx.event
+    async def sort_by(self, table: str, column: str):
+        """Sort by ``column``; choosing the current column again flips the direction."""
+
+        if table not in TABLES or not await self._is_admin():
+            return
+        if getattr(self, f"{table}_sort") == column:
+            setattr(self, f"{table}_desc", not getattr(self, f"{table}_desc"))
+        else:
+            setattr(self, f"{table}_sort", column)
+            setattr(self, f"{table}_desc", column != "username" and column != "name")
+        setattr(self, f"{table}_page", 0)
+        await self._query(table)
+
+    @rx.event
+    async def change_page(self, table: str, delta: int):
+        if table not in TABLES or not await self._is_admin():
+            return
+        page = getattr(self, f"{table}_page") + delta
+        page_count = getattr(self, f"{table}_page_count")
+        if 0 <= page < page_count:
+            setattr(self, f"{table}_page", page)
+            await self._query(table)
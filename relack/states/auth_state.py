@@ -2,15 +2,12 @@ import reflex as rx
 from relack.models import UserProfile
 from reflex_google_auth import GoogleAuthState
 import logging
-from faker import Faker
 import datetime
 import random
 import string
-from google.oauth2.id_token import verify_oauth2_token
-from google.auth.transport import requests
 from reflex_google_auth.state import TokenCredential
-
-fake = Faker()
+from relack.services.profile_directory import profile_directory
+from relack.services.token_verifier import google_token_verifier
 
 
 class AuthState(GoogleAuthState):
@@ -23,15 +20,15 @@ class AuthState(GoogleAuthState):
 
     @rx.var(cache=True)
     def tokeninfo(self) -> TokenCredential:
+        # Computed vars run synchronously, so only use claims/certs that are
+        # already cached; verification itself happens in on_success_google_auth.
         try:
-            return TokenCredential(
-                verify_oauth2_token(
-                    self.id_token,
-                    requests.Request(),
-                    self.client_id,
-                    clock_skew_in_seconds=60
-                )
+            claims = google_token_verifier.verify_if_certs_cached(
+                self.id_token,
+                self.client_id,
+                clock_skew_in_seconds=60,
             )
+            return TokenCredential(claims or {})
         except Exception as exc:
             if self.token_response_json:
                 print(f"Error verifying token: {exc!r}")
@@ -74,11 +71,10 @@ class AuthState(GoogleAuthState):
                 yield rx.toast("Login failed: No credential received")
                 return
 
-            # Verify the token
+            # Verify the token (certs are cached and fetched off the event loop)
             # Note: We might need to handle clock skew if the server time is behind
-            id_info = verify_oauth2_token(
-                token, 
-                requests.Request(), 
+            id_info = await google_token_verifier.verify(
+                token,
                 self.client_id,
                 clock_skew_in_seconds=10 # Allow some clock skew
             )
@@ -90,12 +86,7 @@ class AuthState(GoogleAuthState):
                 return
 
             # Try to preserve existing profile fields (e.g., bio) from storage or lobby
-            existing_profile = self.user
-            from relack.states.shared_state import GlobalLobbyState
-            lobby_state = await self.get_state(GlobalLobbyState)
-            lobby_linked = await lobby_state._link_to("global-lobby")
-            if email in lobby_linked._known_profiles:
-                existing_profile = lobby_linked._known_profiles[email]
+            existing_profile = profile_directory.get(email) or self.user
 
             profile = UserProfile(
                 username=email,
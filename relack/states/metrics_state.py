@@ -0,0 +1,65 @@
+import reflex as rx
+from typing import Any
+from relack.services.broadcast import message_frames
+from relack.services.metrics import RESOLUTIONS, activity_metrics
+from relack.services.outbound import outbound_budget
+from relack.services.rate_limit import rate_limiter
+from relack.services.response_cache import api_cache
+from relack.services.room_flush import room_flush
+from relack.services.signals import signal_hub
+
+_UNITS = {"1s": "s", "1m": "m", "1h": "h"}
+
+
+class MetricsState(rx.State):
+    """Admin analytics: chart data pulled from the in-process activity metrics."""
+
+    resolution: str = "1m"
+    chart_rows: list[dict[str, Any]] = []
+    top_rooms: list[dict[str, Any]] = []
+    summary: dict[str, int] = {}
+    rate_limits: dict[str, int] = {}
+    outbound: dict[str, int] = {}
+    flush: dict[str, float] = {}
+    signals: dict[str, int] = {}
+    read_api: dict[str, int] = {}
+    slow_sessions: list[dict[str, Any]] = []
+
+    async def _is_admin(self) -> bool:
+        from relack.states.admin_state import AdminState  # noqa: WPS433
+
+        admin_state = await self.get_state(AdminState)
+        return bool(admin_state.is_authenticated)
+
+    @rx.event
+    async def load_metrics(self):
+        if not await self._is_admin():
+            return
+        series = activity_metrics.series(self.resolution)
+        size = len(series["messages"])
+        unit = _UNITS[self.resolution]
+        self.chart_rows = [
+            {
+                "label": f"-{size - 1 - index}{unit}" if index < size - 1 else "now",
+                **{name: values[index] for name, values in series.items()},
+            }
+            for index in range(size)
+        ]
+        self.top_rooms = activity_metrics.top_rooms(self.resolution, k=5)
+        self.summary = activity_metrics.summary(self.resolution)
+        self.rate_limits = rate_limiter.stats()
+        self.outbound = {**outbound_budget.stats(), **message_frames.stats()}
+        self.flush = room_flush.stats()
+        self.signals = signal_hub.stats()
+        self.read_api = api_cache.stats()
+        self.slow_sessions = [
+            {"session": client_token[:8], "depth": depth, "bytes": pending_bytes}
+            for client_token, depth, pending_bytes in outbound_budget.queue_depths()
+        ]
+
+    @rx.event
+    async def set_resolution(self, value: str | list[str]):
+        if not isinstance(value, str) or value not in {name for name, _, _ in RESOLUTIONS}:
+            return
+        self.resolution = value
+        await self.load_metrics()
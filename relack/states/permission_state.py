@@ -17,6 +17,12 @@ class PermissionState(rx.State):
     google_can_create_room: bool = False
     google_can_mention_users: bool = False
     google_can_view_profiles: bool = False
+    guest_messages_per_minute: int = 30
+    google_messages_per_minute: int = 60
+    guest_rooms_per_hour: int = 3
+    google_rooms_per_hour: int = 10
+    guest_joins_per_minute: int = 20
+    google_joins_per_minute: int = 30
 
     def _to_config(self) -> PermissionConfig:
         return PermissionConfig(
@@ -28,6 +34,12 @@ class PermissionState(rx.State):
             google_can_create_room=self.google_can_create_room,
             google_can_mention_users=self.google_can_mention_users,
             google_can_view_profiles=self.google_can_view_profiles,
+            guest_messages_per_minute=self.guest_messages_per_minute,
+            google_messages_per_minute=self.google_messages_per_minute,
+            guest_rooms_per_hour=self.guest_rooms_per_hour,
+            google_rooms_per_hour=self.google_rooms_per_hour,
+            guest_joins_per_minute=self.guest_joins_per_minute,
+            google_joins_per_minute=self.google_joins_per_minute,
         )
 
     async def _update_lobby_permissions(self):
@@ -45,6 +57,12 @@ class PermissionState(rx.State):
         self.google_can_create_room = config.google_can_create_room
         self.google_can_mention_users = config.google_can_mention_users
         self.google_can_view_profiles = config.google_can_view_profiles
+        self.guest_messages_per_minute = config.guest_messages_per_minute
+        self.google_messages_per_minute = config.google_messages_per_minute
+        self.guest_rooms_per_hour = config.guest_rooms_per_hour
+        self.google_rooms_per_hour = config.google_rooms_per_hour
+        self.guest_joins_per_minute = config.guest_joins_per_minute
+        self.google_joins_per_minute = config.google_joins_per_minute
 
     @rx.event
     async def sync_from_lobby(self):
@@ -94,6 +112,38 @@ class PermissionState(rx.State):
         self.google_can_view_profiles = value
         await self._update_lobby_permissions()
 
+    async def _set_rate_limit(self, field: str, value: str):
+        try:
+            limit = int(value or 0)
+        except ValueError:
+            return
+        setattr(self, field, max(limit, 0))
+        await self._update_lobby_permissions()
+
+    @rx.event
+    async def set_guest_messages_per_minute(self, value: str):
+        await self._set_rate_limit("guest_messages_per_minute", value)
+
+    @rx.event
+    async def set_google_messages_per_minute(self, value: str):
+        await self._set_rate_limit("google_messages_per_minute", value)
+
+    @rx.event
+    async def set_guest_rooms_per_hour(self, value: str):
+        await self._set_rate_limit("guest_rooms_per_hour", value)
+
+    @rx.event
+    async def set_google_rooms_per_hour(self, value: str):
+        await self._set_rate_limit("google_rooms_per_hour", value)
+
+    @rx.event
+    async def set_guest_joins_per_minute(self, value: str):
+        await self._set_rate_limit("guest_joins_per_minute", value)
+
+    @rx.event
+    async def set_google_joins_per_minute(self, value: str):
+        await self._set_rate_limit("google_joins_per_minute", value)
+
     @rx.event
     async def save_permissions(self):
         await self._update_lobby_permissions()
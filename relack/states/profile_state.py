@@ -1,8 +1,8 @@
 import reflex as rx
 from typing import Optional
 from relack.models import UserProfile
+from relack.services.profile_directory import profile_directory
 from relack.states.auth_state import AuthState
-from relack.states.shared_state import GlobalLobbyState
 
 
 class ProfileState(rx.State):
@@ -30,13 +30,8 @@ class ProfileState(rx.State):
         if auth.user and auth.user.username == username:
             self.current_profile = auth.user
         else:
-            # Check global lobby
-            lobby = await self.get_state(GlobalLobbyState)
-            lobby_linked = await lobby._link_to("global-lobby")
-            if username in lobby_linked._known_profiles:
-                self.current_profile = lobby_linked._known_profiles[username]
-            else:
-                self.current_profile = None
+            # Look it up in the profile directory (no lobby lock needed)
+            self.current_profile = profile_directory.get(username)
         
         # Initialize edit fields if profile found
         if self.current_profile:
@@ -56,10 +51,8 @@ class ProfileState(rx.State):
             self.is_loading = False
             return
 
-        lobby = await self.get_state(GlobalLobbyState)
-        lobby_linked = await lobby._link_to("global-lobby")
-        if username in lobby_linked._known_profiles:
-            self.current_profile = lobby_linked._known_profiles[username]
+        self.current_profile = profile_directory.get(username)
+        if self.current_profile:
             self.edited_nickname = self.current_profile.nickname
             self.edited_bio = self.current_profile.bio
 
@@ -109,10 +102,8 @@ class ProfileState(rx.State):
         # Update Local Profile State
         self.current_profile = auth.user
         
-        # Update Global Lobby
-        lobby = await self.get_state(GlobalLobbyState)
-        lobby_linked = await lobby._link_to("global-lobby")
-        lobby_linked._known_profiles[auth.user.username] = auth.user
+        # Update the profile directory (rooms pick it up on their next heartbeat)
+        profile_directory.put(auth.user)
         
         self.is_editing = False
         return rx.toast("Profile updated successfully!")
\ No newline at end of file
@@ -0,0 +1,112 @@
+import reflex as rx
+from relack.models import RetentionPolicy, RoomStorageInfo
+from relack.services.retention import retention_compactor
+
+
+class RetentionState(rx.State):
+    """Admin editor for per-room retention policies stored on the shared lobby."""
+
+    editing_room: str = ""
+    max_count: str = "200"
+    max_age_hours: str = "0"
+    max_kb: str = "0"
+    archive_expired: bool = True
+    # Loaded on demand rather than computed on the shared lobby, which would
+    # recompute and push it to every chat client on each compaction.
+    storage_rows: list[RoomStorageInfo] = []
+
+    async def _lobby(self):
+        from relack.states.shared_state import GlobalLobbyState  # noqa: WPS433
+
+        return await self.get_state(GlobalLobbyState)
+
+    async def _is_admin(self) -> bool:
+        from relack.states.admin_state import AdminState  # noqa: WPS433
+
+        admin_state = await self.get_state(AdminState)
+        return bool(admin_state.is_authenticated)
+
+    @rx.event
+    async def load_storage(self):
+        lobby = await self._lobby()
+        self.storage_rows = lobby._room_storage_rows()
+
+    @rx.event
+    async def edit_room(self, room_name: str):
+        lobby = await self._lobby()
+        policy = lobby._retention_policy(room_name)
+        self.editing_room = room_name
+        self.max_count = str(policy.max_count)
+        self.max_age_hours = str(policy.max_age_hours)
+        self.max_kb = str(policy.max_bytes // 1024)
+        self.archive_expired = policy.archive_expired
+
+    @rx.event
+    def cancel_edit(self):
+        self.editing_room = ""
+
+    @rx.event
+    def set_max_count(self, value: str):
+        self.max_count = value
+
+    @rx.event
+    def set_max_age_hours(self, value: str):
+        self.max_age_hours = value
+
+    @rx.event
+    def set_max_kb(self, value: str):
+        self.max_kb = value
+
+    @rx.event
+    def set_archive_expired(self, value: bool):
+        self.archive_expired = value
+
+    @rx.event
+    async def save_policy(self):
+        if not await self._is_admin():
+            return rx.toast("Admin privileges required.")
+        if not self.editing_room:
+            return
+        try:
+            policy = RetentionPolicy(
+                max_count=int(self.max_count or 0),
+                max_age_hours=int(self.max_age_hours or 0),
+                max_bytes=int(self.max_kb or 0) * 1024,
+                archive_expired=self.archive_expired,
+            )
+        except ValueError:
+            return rx.toast("Limits must be whole numbers.")
+        if min(policy.max_count, policy.max_age_hours, policy.max_bytes) < 0:
+            return rx.toast("Limits cannot be negative.")
+        lobby = await self._lobby()
+        lobby._retention_policies[self.editing_room] = policy
+        room_name, self.editing_room = self.editing_room, ""
+        self.storage_rows = lobby._room_storage_rows()
+        return rx.toast(f"Retention policy saved for {'all rooms' if room_name == '*' else room_name}.")
+
+    @rx.event
+    async def clear_policy(self, room_name: str):
+        """Drop a room's custom policy so it falls back to the default."""
+
+        if not await self._is_admin():
+            return rx.toast("Admin privileges required.")
+        lobby = await self._lobby()
+        lobby._retention_policies.pop(room_name, None)
+        if self.editing_room == room_name:
+            self.editing_room = ""
+        self.storage_rows = lobby._room_storage_rows()
+
+    @rx.event(background=True)
+    async def compact_now(self):
+        """Run a compaction pass immediately (outside this session's state lock)."""
+
+        async with self:
+            if not await self._is_admin():
+                return rx.toast("Admin privileges required.")
+        await retention_compactor.run_once()
+        stats = retention_compactor.stats()
+        async with self:
+            await self.load_storage()
+        return rx.toast(
+            f"Compaction done: {stats['archived_total']} archived, {stats['dropped_total']} dropped so far."
+        )
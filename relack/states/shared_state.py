@@ -1,15 +1,64 @@
 import reflex as rx
 import json
 import datetime as dt
-from relack.models import RoomInfo, ChatMessage, UserProfile, ChatMessageLog, PermissionConfig
+from relack.models import (
+    RoomInfo,
+    ChatMessage,
+    StoredMessage,
+    UserProfile,
+    ChatMessageLog,
+    PermissionConfig,
+    RetentionPolicy,
+    RoomStorageInfo,
+    AdminRoomRow,
+)
 from relack.states.permission_state import PermissionState
+from relack.states.retention_state import RetentionState
 from relack.states.auth_state import AuthState
-import datetime
-import uuid
+from relack.services.avatars import prerender_avatars
+from relack.services.broadcast import message_frames
+from relack.services.guest_gc import guest_collector
+from relack.services.message_archive import message_archive
+from relack.services.metrics import activity_metrics
+from relack.services.outbound import outbound_budget
+from relack.services.presence import presence
+from relack.services.profile_directory import profile_directory
+from relack.services.rate_limit import limits_for, rate_limiter, throttle_message
+from relack.services.room_residency import room_residency
+from relack.services.send_dedupe import normalize_key, send_dedupe
+from relack.services.signals import signal_hub
+from relack.services.table_index import contains_text, paginate
+from relack.services.retention import ArchiveBatch, expired_prefix, message_bytes, retention_compactor
+from relack.services.ids import MAX_WORKER_ID, SnowflakeGenerator, message_ids, now_ms
+from reflex.istate.manager import get_state_manager
+from reflex.event import Event
+from reflex.istate.shared import _do_update_other_tokens
+from reflex.state import BaseState, _substate_key
+from reflex.utils.prerequisites import get_app
+import bisect
+import heapq
 import logging
+import sys
+import time
 from typing import Any
 
 
+def _rate_limit(event: str, client_token: str, user: UserProfile, permissions: PermissionConfig):
+    """Return a toast if ``user`` (on this client) is over the ``event`` rate for their role."""
+
+    spec = limits_for(permissions, user.is_guest)[event]
+    retry_after = rate_limiter.check(
+        event,
+        spec,
+        f"client:{client_token}",
+        f"user:{user.username}",
+        role="guest" if user.is_guest else "google",
+    )
+    if retry_after:
+        return rx.toast(throttle_message(event, retry_after))
+    return None
+
+
 class GlobalLobbyState(rx.SharedState):
     """
     Manages the global list of rooms and active user counts.
@@ -17,35 +66,68 @@ class GlobalLobbyState(rx.SharedState):
     """
 
     _rooms: dict[str, RoomInfo] = {}
-    _known_profiles: dict[str, UserProfile] = {}
-    _user_locations: dict[str, str] = {}
-    _messages_by_room: dict[str, list[ChatMessage]] = {}
+    # Bumped when rooms are created or deleted and when all data is cleared or
+    # imported; the read API (relack.api.read) derives its ETags from it.
+    _rooms_version: int = 0
+    # Profiles (and their last activity) live in relack.services.profile_directory.
+    # Mirrors presence.version so room counts and unread badges follow joins and leaves.
+    _presence_version: int = 0
+    _messages_by_room: dict[str, list[StoredMessage]] = {}
     _permissions: PermissionConfig = PermissionConfig()
-    export_payload: str = ""
-    import_payload: str = ""
-
-    @rx.var
+    # Room name -> policy; "*" overrides the default for rooms without their own.
+    _retention_policies: dict[str, RetentionPolicy] = {}
+    # Room name -> (hot message count, approx bytes, archived so far); refreshed by compaction.
+    _room_usage: dict[str, tuple[int, int, int]] = {}
+    # Unread tracking: per-room message sequence (messages ever sent, unaffected by
+    # retention) and per-user read cursors (username -> room -> last read sequence).
+    _room_seq: dict[str, int] = {}
+    _read_cursors: dict[str, dict[str, int]] = {}
+    _client_users: dict[str, str] = {}
+
+    @rx.var(deps=["_presence_version"])
     def room_list(self) -> list[RoomInfo]:
-        return list(self._rooms.values())
-
-    @rx.var
-    def all_profiles(self) -> list[UserProfile]:
-        return list(self._known_profiles.values())
-
-    @rx.var
-    def recent_message_logs(self) -> list[ChatMessageLog]:
-        """Flatten recent messages for admin viewing (capped per room)."""
+        return [
+            room.model_copy(update={"participant_count": presence.participant_count(_room_token(name))})
+            for name, room in self._rooms.items()
+        ]
 
-        logs: list[ChatMessageLog] = []
-        for room_name, messages in self._messages_by_room.items():
-            for msg in messages:
-                logs.append(ChatMessageLog(room_name=room_name, message=msg))
-        # Keep the most recent 200 entries overall to avoid huge tables
-        return logs[-200:]
+    @rx.var(deps=["_presence_version"])
+    def unread_counts(self) -> dict[str, int]:
+        """Unread messages per room for this client's user (excluding the room being viewed)."""
 
-    @rx.var
-    def has_export_payload(self) -> bool:
-        return bool(self.export_payload)
+        client_token = self.router.session.client_token
+        cursors = self._read_cursors.get(self._client_users.get(client_token, ""), {})
+        current_room = presence.room_of(client_token)
+        unread: dict[str, int] = {}
+        for room_name, seq in self._room_seq.items():
+            count = seq - cursors.get(room_name, 0)
+            if count > 0 and room_name != current_room:
+                unread[room_name] = count
+        return unread
+
+    def _room_storage_rows(self) -> list[RoomStorageInfo]:
+        """Per-room memory use and retention policy for the admin dashboard."""
+
+        rows = [
+            RoomStorageInfo(
+                room_name="*",
+                policy_summary=self._retention_policy("*").summary(),
+                has_custom_policy="*" in self._retention_policies,
+            )
+        ]
+        for room_name in sorted({*self._rooms, *self._room_usage}):
+            count, size, archived = self._room_usage.get(room_name, (0, 0, 0))
+            rows.append(
+                RoomStorageInfo(
+                    room_name=room_name,
+                    message_count=count,
+                    memory_kb=round(size / 1024, 1),
+                    archived_count=archived,
+                    policy_summary=self._retention_policy(room_name).summary(),
+                    has_custom_policy=room_name in self._retention_policies,
+                )
+            )
+        return rows
 
     @rx.event
     async def join_lobby(self):
@@ -53,9 +135,13 @@ class GlobalLobbyState(rx.SharedState):
         new_state = await self._link_to("global-lobby")
         auth = await self.get_state(AuthState)
         if auth.user:
-            new_state._known_profiles[auth.user.username] = auth.user
-        if not hasattr(new_state, "_user_locations"):
-            new_state._user_locations = {}
+            username = auth.user.username
+            profile_directory.put(auth.user, active_ms=now_ms())
+            new_state._client_users[self.router.session.client_token] = username
+            if username not in new_state._read_cursors:
+                # First visit: existing history does not count as unread.
+                new_state._read_cursors[username] = dict(new_state._room_seq)
+            prerender_avatars([auth.user.avatar_seed or username])
         if not new_state._rooms:
             new_state._rooms = {
                 "General": RoomInfo(
@@ -72,14 +158,11 @@ class GlobalLobbyState(rx.SharedState):
                     name="Random", description="Anything goes!", participant_count=0
                 ),
             }
+            new_state._rooms_version += 1
         if not new_state._messages_by_room:
             new_state._messages_by_room = {}
         if not new_state._permissions:
             new_state._permissions = PermissionConfig()
-        if not new_state.export_payload:
-            new_state.export_payload = ""
-        if not new_state.import_payload:
-            new_state.import_payload = ""
 
     @rx.event
     async def create_room(self, room_name: str, description: str):
@@ -90,12 +173,15 @@ class GlobalLobbyState(rx.SharedState):
             return rx.toast("You must be logged in to create a room.")
         if room_name in self._rooms:
             return rx.toast("Room already exists")
+        if throttled := _rate_limit("create_room", self.router.session.client_token, auth.user, self._permissions):
+            return throttled
         self._rooms[room_name] = RoomInfo(
             name=room_name,
             description=description,
             participant_count=0,
             created_by=auth.user.username,
         )
+        self._rooms_version += 1
         return rx.toast(f"Room '{room_name}' created!")
 
     @rx.event
@@ -109,21 +195,164 @@ class GlobalLobbyState(rx.SharedState):
         if room.created_by != auth.user.username:
             return rx.toast("You can only delete rooms you created.")
         del self._rooms[room_name]
+        self._rooms_version += 1
+        activity_metrics.forget_room(room_name)
+        send_dedupe.forget_room(room_name)
         return rx.toast(f"Room '{room_name}' deleted.")
 
+    def _query_rooms(
+        self, sort: str, descending: bool, text: str, offset: int, limit: int
+    ) -> tuple[list[AdminRoomRow], int]:
+        rows = []
+        text = text.strip().lower()
+        for room_name, room in self._rooms.items():
+            if text and not contains_text(text, room_name, room.description, room.created_by):
+                continue
+            history = message_archive.pending(room_name) or self._messages_by_room.get(room_name)
+            rows.append(
+                AdminRoomRow(
+                    name=room_name,
+                    description=room.description,
+                    created_by=room.created_by,
+                    message_count=self._room_seq.get(room_name, 0),
+                    last_activity=history[-1].timestamp if history else 0,
+                )
+            )
+        sort_keys = {
+            "name": lambda row: row.name.lower(),
+            "message_count": lambda row: row.message_count,
+            "activity": lambda row: row.last_activity,
+        }
+        rows.sort(key=sort_keys.get(sort, sort_keys["activity"]), reverse=descending)
+        return rows[offset : offset + limit], len(rows)
+
+    def _query_messages(
+        self, sort: str, descending: bool, text: str, offset: int, limit: int
+    ) -> tuple[list[ChatMessageLog], int]:
+        """Page through hot history across rooms (newest first by default)."""
+
+        text = text.strip().lower()
+        per_room = [
+            [(room_name, msg) for msg in (reversed(msgs) if descending else msgs)]
+            for room_name, msgs in self._messages_by_room.items()
+        ]
+        if sort == "room":
+            entries = sorted(
+                (entry for room_entries in per_room for entry in room_entries),
+                key=lambda entry: (entry[0].lower(), entry[1].id),
+                reverse=descending,
+            )
+        else:
+            # Each room is already in ID (= send time) order; merge instead of sorting.
+            entries = heapq.merge(*per_room, key=lambda entry: entry[1].id, reverse=descending)
+        if text:
+            entries = (
+                entry for entry in entries if contains_text(text, entry[0], entry[1].sender, entry[1].content)
+            )
+        page, total = paginate(entries, offset, limit)
+        logs = []
+        profiles = profile_directory.get_many(msg.sender for _, msg in page)
+        for room_name, msg in page:
+            profile = profiles.get(msg.sender)
+            display_name = (profile.nickname if profile else "") or msg.sender
+            logs.append(ChatMessageLog(room_name=room_name, message=msg.to_chat_message(display_name)))
+        return logs, total
+
+    def _store_messages(self, batch: list[tuple[str, StoredMessage]]):
+        """Append archived messages; retention is enforced later by the compactor."""
+
+        last_post: dict[str, int] = {}
+        for room_name, message in batch:
+            room_name = sys.intern(room_name)
+            self._messages_by_room.setdefault(room_name, []).append(message)
+            last_post[message.sender] = max(last_post.get(message.sender, 0), message.timestamp)
+        # Written to disk later by profile_directory.run, not under the lobby lock.
+        profile_directory.note_activity(last_post)
+
+    def _forget_guests(self, candidates: list[str]) -> list[str]:
+        """Forget idle guests' read cursors, skipping anyone online; returns the usernames forgotten."""
+
+        online = set(self._client_users.values())
+        expired = [
+            username for username in candidates if username not in online and not presence.is_online(username)
+        ]
+        for username in expired:
+            self._read_cursors.pop(username, None)
+        return expired
+
+    def _retention_policy(self, room_name: str) -> RetentionPolicy:
+        return (
+            self._retention_policies.get(room_name)
+            or self._retention_policies.get("*")
+            or RetentionPolicy()
+        )
+
+    def _apply_retention(self, now: int) -> tuple[ArchiveBatch, int, dict[str, int]]:
+        """Trim hot history to each room's policy and refresh ``_room_usage``.
+
+        Returns the expired messages to archive (by room), how many were dropped,
+        and per trimmed room the ID of the newest message that expired.
+        """
+
+        to_archive: ArchiveBatch = {}
+        dropped = 0
+        expired_through: dict[str, int] = {}
+        usage: dict[str, tuple[int, int, int]] = {}
+        for room_name, messages in list(self._messages_by_room.items()):
+            messages = list(messages)
+            policy = self._retention_policy(room_name)
+            cut = expired_prefix(messages, policy, now)
+            archived = self._room_usage.get(room_name, (0, 0, 0))[2]
+            if cut:
+                if policy.archive_expired:
+                    to_archive[room_name] = [msg.to_payload() for msg in messages[:cut]]
+                    archived += cut
+                else:
+                    dropped += cut
+                expired_through[room_name] = messages[cut - 1].id
+                messages = messages[cut:]
+                self._messages_by_room[room_name] = messages
+            usage[room_name] = (len(messages), sum(message_bytes(msg) for msg in messages), archived)
+        self._room_usage = usage
+        return to_archive, dropped, expired_through
+
+    def _room_history(self, room_name: str) -> list[StoredMessage]:
+        """Archived messages for a room, including ones still in the write-behind buffer."""
+
+        return [*self._messages_by_room.get(room_name, []), *message_archive.pending(room_name)]
+
+    def _presence_changed(self):
+        self._presence_version = presence.version
+
+    def _next_seq(self, room_name: str) -> int:
+        seq = self._room_seq.get(room_name, 0) + 1
+        self._room_seq[room_name] = seq
+        return seq
+
+    def _mark_read(self, username: str, room_name: str):
+        """Advance ``username``'s cursor for ``room_name`` to the latest sequence.
+
+        Only writes when the cursor moves, so idle calls do not dirty the lobby.
+        """
+
+        seq = self._room_seq.get(room_name, 0)
+        cursors = self._read_cursors.get(username)
+        if cursors is None:
+            self._read_cursors[username] = {room_name: seq}
+        elif cursors.get(room_name, 0) < seq:
+            cursors[room_name] = seq
+
     @rx.event
-    async def record_message(self, room_name: str, message: ChatMessage):
-        """Store a message snapshot for admin view; keeps last 200 per room."""
+    async def record_message(self, room_name: str, message: StoredMessage):
+        """Append a message to the shared history; the compactor trims it to the room's retention policy."""
 
         target = self
         if not self._linked_to:
             target = await self._link_to("global-lobby")
 
-        room_msgs = target._messages_by_room.setdefault(room_name, [])
-        room_msgs.append(message)
-        # Cap per-room history to avoid unbounded growth
-        if len(room_msgs) > 200:
-            room_msgs[:] = room_msgs[-200:]
+        # Flush anything buffered first so per-room order is preserved.
+        message_archive.drain_into(target._store_messages)
+        target._store_messages([(room_name, message)])
 
     @rx.event
     async def clear_all_data(self):
@@ -138,6 +367,8 @@ class GlobalLobbyState(rx.SharedState):
         if not is_admin and (not auth.user or auth.user.is_guest):
             yield rx.toast("Admin privileges required.")
             return
+        for room_name in self._rooms:
+            activity_metrics.forget_room(room_name)
         self._rooms = {
             "General": RoomInfo(
                 name="General", description="The main hangout spot", participant_count=0
@@ -151,24 +382,35 @@ class GlobalLobbyState(rx.SharedState):
                 name="Random", description="Anything goes!", participant_count=0
             ),
         }
-        self._known_profiles = {}
+        await profile_directory.clear()
+        self._rooms_version += 1
         self._messages_by_room = {}
+        self._room_usage = {}
+        self._room_seq = {}
+        self._read_cursors = {}
+        message_archive.clear()
+        room_residency.invalidate()
+        message_frames.clear()
         self._permissions = PermissionConfig()
+        self._retention_policies = {}
         room_state = await self.get_state(RoomState)
         yield RoomState.reset_room_state
+        yield RetentionState.load_storage
         yield rx.toast("Database cleared successfully!")
         return
 
-    def _snapshot(self) -> dict[str, Any]:
+    async def _snapshot(self) -> dict[str, Any]:
         """Return current lobby snapshot for export."""
 
+        profiles = await profile_directory.load_all()
         return {
             "rooms": [room.dict() for room in self._rooms.values()],
-            "profiles": [profile.dict() for profile in self._known_profiles.values()],
+            "profiles": [profile.dict() for profile in profiles],
             "messages_by_room": {
-                room: [msg.dict() for msg in msgs] for room, msgs in self._messages_by_room.items()
+                room: [msg.to_payload() for msg in msgs] for room, msgs in self._messages_by_room.items()
             },
             "permissions": self._permissions.dict(),
+            "retention": {room: policy.dict() for room, policy in self._retention_policies.items()},
         }
 
     @rx.event
@@ -178,8 +420,13 @@ class GlobalLobbyState(rx.SharedState):
         target = self
         if not self._linked_to:
             target = await self._link_to("global-lobby")
-        snapshot = target._snapshot()
-        target.export_payload = json.dumps(snapshot, indent=2)
+        snapshot = await target._snapshot()
+        # Kept on the admin's own session: a payload on the shared lobby would be
+        # pushed to every connected chat client.
+        from relack.states.admin_state import AdminState  # noqa: WPS433
+
+        admin_state = await self.get_state(AdminState)
+        admin_state.export_payload = json.dumps(snapshot, indent=2)
         return rx.toast("Export ready. Copy the JSON below.")
 
     @rx.event
@@ -189,17 +436,16 @@ class GlobalLobbyState(rx.SharedState):
         target = self
         if not self._linked_to:
             target = await self._link_to("global-lobby")
-        snapshot = target._snapshot()
+        snapshot = await target._snapshot()
         payload = json.dumps(snapshot, indent=2)
         stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
         filename = f"relack-{stamp}.json"
         # Set export_payload as well for UI visibility
-        target.export_payload = payload
-        return rx.download(data=payload, filename=filename)
+        from relack.states.admin_state import AdminState  # noqa: WPS433
 
-    @rx.event
-    def set_import_payload(self, value: str):
-        self.import_payload = value
+        admin_state = await self.get_state(AdminState)
+        admin_state.export_payload = payload
+        return rx.download(data=payload, filename=filename)
 
     @rx.event
     async def import_data(self, payload: str):
@@ -215,16 +461,29 @@ class GlobalLobbyState(rx.SharedState):
         profiles_raw = data.get("profiles", [])
         messages_raw = data.get("messages_by_room", {})
         permissions_raw = data.get("permissions")
+        retention_raw = data.get("retention", {})
 
+        previous_rooms = list(self._rooms)
         try:
             self._rooms = {room["name"]: RoomInfo(**room) for room in rooms_raw}
-            self._known_profiles = {
-                profile["username"]: UserProfile(**profile) for profile in profiles_raw
-            }
-            reconstructed: dict[str, list[ChatMessage]] = {}
-            for room_name, msgs in messages_raw.items():
-                reconstructed[room_name] = [ChatMessage(**msg) for msg in msgs]
+            self._rooms_version += 1
+            profiles = [UserProfile(**profile) for profile in profiles_raw]
+            reconstructed: dict[str, list[StoredMessage]] = {}
+            for room_name, msgs in _upgrade_legacy_messages(messages_raw).items():
+                reconstructed[sys.intern(room_name)] = [StoredMessage.from_payload(msg) for msg in msgs]
             self._messages_by_room = reconstructed
+            self._room_usage = {}
+            room_residency.invalidate()
+            message_frames.clear()
+            self._room_seq = {room: len(msgs) for room, msgs in reconstructed.items()}
+            # Imported history counts as read for everyone.
+            self._read_cursors = {
+                username: dict(self._room_seq) for username in set(self._client_users.values())
+            }
+            message_archive.clear()
+            self._retention_policies = {
+                room: RetentionPolicy(**policy) for room, policy in retention_raw.items()
+            }
             if permissions_raw:
                 self._permissions = PermissionConfig(**permissions_raw)
             else:
@@ -233,12 +492,19 @@ class GlobalLobbyState(rx.SharedState):
             yield rx.toast("Import failed: schema mismatch")
             return
 
+        for room_name in previous_rooms:
+            activity_metrics.forget_room(room_name)
+        # Imported profiles start their guest expiry clock now.
+        await profile_directory.replace_all(profiles)
+        prerender_avatars(profile.avatar_seed or profile.username for profile in profiles)
+
         # Clear active room sessions; admins are not joined to rooms.
         room_state = await self.get_state(RoomState)
         yield RoomState.reset_room_state
         # Sync permission UI to imported snapshot
         permission_state = await self.get_state(PermissionState)
         await permission_state.sync_from_lobby()
+        yield RetentionState.load_storage
         yield rx.toast("Import completed.")
 
     @rx.event
@@ -260,65 +526,210 @@ class GlobalLobbyState(rx.SharedState):
             yield action
 
 
-class TabSessionState(rx.State):
-    """Per-tab session storage for room counts and selection."""
+def _legacy_timestamps(values: list[Any], now: dt.datetime) -> list[int]:
+    """Epoch milliseconds for one room's message timestamps, in file order.
 
-    all_room_counts_json: str = rx.SessionStorage("{}", name="relack_all_room_count")
-    all_room_read_counts_json: str = rx.SessionStorage("{}", name="relack_all_room_read_count")
-    last_room_name: str = rx.SessionStorage("", name="relack_last_room")
-    curr_room_name: str = rx.SessionStorage("", name="relack_curr_room")
+    Old "HH:MM" values carry no date. Walking back from the newest message,
+    each is read as the latest occurrence of that local time not after the
+    message that follows it, so the result never decreases.
+    """
 
-    @rx.var
-    def unread_counts(self) -> dict[str, int]:
+    upper = now
+    result: list[int] = []
+    for value in reversed(values):
+        if isinstance(value, int):
+            result.append(value)
+            upper = min(upper, dt.datetime.fromtimestamp(value / 1000))
+            continue
         try:
-            total_counts = json.loads(self.all_room_counts_json or "{}")
-            read_counts = json.loads(self.all_room_read_counts_json or "{}")
-        except Exception:
-            return {}
+            clock = dt.datetime.strptime(str(value), "%H:%M").time()
+        except ValueError:
+            result.append(int(upper.timestamp() * 1000))
+            continue
+        when = dt.datetime.combine(upper.date(), clock)
+        if when > upper:
+            when -= dt.timedelta(days=1)
+        result.append(int(when.timestamp() * 1000))
+        upper = when
+    return result[::-1]
+
+
+def _upgrade_legacy_messages(
+    messages_by_room: dict[str, list[dict[str, Any]]],
+) -> dict[str, list[dict[str, Any]]]:
+    """Convert pre-snowflake snapshot messages (uuid id, "HH:MM" timestamp).
+
+    Missing IDs come from a generator on the reserved last worker ID, so they
+    never collide with live message IDs. They are handed out in timestamp
+    order across rooms, and within a room in file order: each message's ID
+    time is at least that of the message before it, so IDs stay sorted.
+    """
+
+    now = dt.datetime.now()
+    upgraded: dict[str, list[dict[str, Any]]] = {}
+    needs_id: list[tuple[int, str, int]] = []
+    for room_name, msgs in messages_by_room.items():
+        timestamps = _legacy_timestamps([msg.get("timestamp") for msg in msgs], now)
+        upgraded[room_name] = [{**msg, "timestamp": ts} for msg, ts in zip(msgs, timestamps)]
+        id_ms = 0
+        for index, msg in enumerate(upgraded[room_name]):
+            id_ms = max(id_ms, msg["timestamp"])
+            if not isinstance(msg.get("id"), int):
+                needs_id.append((id_ms, room_name, index))
+    migration_ids = SnowflakeGenerator(worker_id=MAX_WORKER_ID)
+    for id_ms, room_name, index in sorted(needs_id):
+        upgraded[room_name][index]["id"] = migration_ids.next_id(at_ms=id_ms)
+    return upgraded
+
+
+async def _flush_message_archive():
+    """Move one batch from the write-behind buffer into the shared lobby."""
+
+    async with get_state_manager().modify_state(
+        _substate_key("global-lobby", GlobalLobbyState)
+    ) as root_state:
+        lobby = await root_state.get_state(GlobalLobbyState)
+        if not message_archive.drain_into(lobby._store_messages, message_archive.max_batch_size):
+            return
+        linked_clients = set(lobby._linked_from)
+    # Push the archived batch to every client linked to the lobby (e.g. admin logs).
+    _do_update_other_tokens(
+        affected_tokens=linked_clients,
+        previous_dirty_vars={GlobalLobbyState.get_full_name(): {"_messages_by_room"}},
+        state_type=GlobalLobbyState,
+    )
+
+
+message_archive.bind(_flush_message_archive)
+
+
+async def _compact_lobby_history() -> tuple[ArchiveBatch, int]:
+    """Apply retention policies to the shared lobby history (one compaction pass)."""
+
+    async with get_state_manager().modify_state(
+        _substate_key("global-lobby", GlobalLobbyState)
+    ) as root_state:
+        lobby = await root_state.get_state(GlobalLobbyState)
+        # Fold buffered messages in first so they are subject to the same limits.
+        drained = message_archive.drain_into(lobby._store_messages)
+        to_archive, dropped, expired_through = lobby._apply_retention(now_ms())
+        linked_clients = set(lobby._linked_from)
+    # _room_usage only feeds the admin storage table (loaded on demand), so an
+    # idle pass notifies nobody.
+    if drained or to_archive or dropped:
+        _do_update_other_tokens(
+            affected_tokens=linked_clients,
+            previous_dirty_vars={GlobalLobbyState.get_full_name(): {"_messages_by_room"}},
+            state_type=GlobalLobbyState,
+        )
+    # Resident rooms keep their own copy of the history; trim it the same way.
+    for room_name, last_expired_id in expired_through.items():
+        token = _room_token(room_name)
+        if not room_residency.needs_hydration(token):
+            await _trim_resident_room(token, last_expired_id)
+    return to_archive, dropped
+
+
+retention_compactor.bind(_compact_lobby_history)
+
+
+async def _trim_resident_room(token: str, last_expired_id: int):
+    """Drop messages up to ``last_expired_id`` from a resident room and notify its members."""
+
+    async with get_state_manager().modify_state(_substate_key(token, RoomState)) as root_state:
+        room = await root_state.get_state(RoomState)
+        cut = bisect.bisect_right(room._messages, last_expired_id, key=lambda msg: msg.id)
+        if not cut:
+            return
+        room_residency.shrink(token, sum(message_bytes(msg) for msg in room._messages[:cut]))
+        room._messages = room._messages[cut:]
+        linked_clients = set(room._linked_from)
+    _do_update_other_tokens(
+        affected_tokens=linked_clients,
+        previous_dirty_vars={RoomState.get_full_name(): {"_messages"}},
+        state_type=RoomState,
+    )
+
+
+async def _forget_guest_profiles(candidates: list[str]) -> int:
+    """Drop one batch of idle guest profiles; only the online check holds the lobby's lock."""
+
+    async with get_state_manager().modify_state(
+        _substate_key("global-lobby", GlobalLobbyState)
+    ) as root_state:
+        lobby = await root_state.get_state(GlobalLobbyState)
+        expired = lobby._forget_guests(candidates)
+    return await profile_directory.delete_many(expired)
+
+
+guest_collector.bind(_forget_guest_profiles)
+
 
-        diff = {}
-        for room, count in total_counts.items():
-            read = read_counts.get(room, 0)
-            val = count - read
-            if val > 0:
-                diff[room] = val
-        return diff
+async def read_lobby() -> GlobalLobbyState:
+    """The shared lobby for read-only use, without taking its lock.
+
+    Callers must not modify it or await between reads that need to agree.
+    """
+
+    root_state = await get_state_manager().get_state(_substate_key("global-lobby", GlobalLobbyState))
+    return await root_state.get_state(GlobalLobbyState)
+
+
+def _room_token(room_name: str) -> str:
+    return f"room-{room_name.replace(' ', '-').replace('_', '-').lower()}"
+
+
+class TabSessionState(rx.State):
+    """Per-tab session storage for room selection."""
+
+    last_room_name: str = rx.SessionStorage("", name="relack_last_room")
+    curr_room_name: str = rx.SessionStorage("", name="relack_curr_room")
 
     @rx.event
     def reset_tab_session(self):
-        self.all_room_counts_json = "{}"
-        self.all_room_read_counts_json = "{}"
         self.last_room_name = ""
         self.curr_room_name = ""
 
-    @rx.event
-    def seed_read_counts(self, message_counts: dict[str, int]):
-        try:
-            read_counts = json.loads(self.all_room_read_counts_json or "{}")
-        except Exception:
-            read_counts = {}
-        if read_counts:
+
+def _mark_tree_dirty(state: BaseState):
+    state.dirty_vars.update(state.base_vars)
+    state.dirty_vars.update(state.computed_vars)
+    state._mark_dirty()
+    for substate in state.substates.values():
+        _mark_tree_dirty(substate)
+
+
+class ConnectionState(rx.State):
+    """Per-tab connection housekeeping (see ``relack.services.outbound``)."""
+
+    @rx.event(background=True)
+    async def resync(self, from_seq: int):
+        """Replace the updates collapsed since ``from_seq`` with one full-state delta."""
+
+        client_token = self.router.session.client_token
+        if not outbound_budget.resynced(client_token, from_seq):
             return
-        safe_counts = message_counts or {}
-        updated = False
-        for room_name, total in safe_counts.items():
-            prior = read_counts.get(room_name, 0)
-            if total > prior:
-                read_counts[room_name] = total
-                updated = True
-        if updated:
-            self.all_room_read_counts_json = json.dumps(read_counts)
+        # Empty previous_dirty_vars: send the snapshot to this client only rather
+        # than re-broadcasting the linked room and lobby states to every member.
+        async with get_app().app.modify_state(
+            _substate_key(client_token, rx.State), previous_dirty_vars={}
+        ) as root_state:
+            _mark_tree_dirty(root_state)
 
-    @rx.event
-    def mark_room_read(self, room_name: str, current_total: int):
-        try:
-            read_counts = json.loads(self.all_room_read_counts_json or "{}")
-        except Exception:
-            read_counts = {}
-        existing = read_counts.get(room_name, 0)
-        if current_total > existing:
-            read_counts[room_name] = current_total
-            self.all_room_read_counts_json = json.dumps(read_counts)
+
+def _resync_notice(client_token: str, from_seq: int) -> Event:
+    return Event(
+        token=client_token,
+        name=f"{ConnectionState.get_full_name()}.resync",
+        payload={"from_seq": from_seq},
+    )
+
+
+outbound_budget.bind(_resync_notice)
+
+
+# Messages a client receives on join; older history is fetched a page at a time.
+HISTORY_PAGE_SIZE = 100
 
 
 class RoomState(rx.SharedState):
@@ -327,18 +738,20 @@ class RoomState(rx.SharedState):
     This state will be linked to a specific room token (e.g., 'room-general').
     """
 
-    _active_users: dict[str, str] = {}
-    _active_user_profiles: dict[str, UserProfile] = {}
-    _active_user_last_seen: dict[str, float] = {}
-    _messages: list[ChatMessage] = []
-    _current_room_by_client: dict[str, str] = {}
-    _message_counts_by_room: dict[str, int] = {}
+    _messages: list[StoredMessage] = []
+    # Membership lives in relack.services.presence; this mirrors its version so
+    # the vars below are recomputed when someone joins or leaves.
+    _presence_version: int = 0
+    # Client token -> how many of the newest messages that client has loaded.
+    _history_limit_by_client: dict[str, int] = {}
     _room_creator_map: dict[str, str] = {}
-    _known_profiles_snapshot: dict[str, UserProfile] = {}
+    # Mirrors profile_directory.version so display names follow profile edits.
+    _profiles_version: int = 0
+    # False until history is loaded into this room instance (and again after eviction).
+    _hydrated: bool = False
     current_message: str = ""
     is_sidebar_open: bool = True
     is_user_list_open: bool = False
-    STALE_WINDOW_SECONDS: int = 180
 
     @rx.event
     def toggle_sidebar(self):
@@ -348,50 +761,80 @@ class RoomState(rx.SharedState):
     def toggle_user_list(self):
         self.is_user_list_open = not self.is_user_list_open
 
-    @rx.var
+    @rx.var(deps=["_presence_version"])
     def in_room(self) -> bool:
-        client_token = self.router.session.client_token
-        return bool(self._current_room_by_client.get(client_token))
+        return bool(presence.room_of(self.router.session.client_token))
 
-    @rx.var
+    @rx.var(deps=["_presence_version"])
     def room_name(self) -> str:
+        return presence.room_of(self.router.session.client_token)
+
+    def _presence_changed(self):
+        self._presence_version = presence.version
+
+    def _profiles_changed(self):
+        self._profiles_version = profile_directory.version
+
+    def _history_limit(self) -> int:
         client_token = self.router.session.client_token
-        return self._current_room_by_client.get(client_token, "")
+        return self._history_limit_by_client.get(client_token, HISTORY_PAGE_SIZE)
 
     @rx.var
     def messages(self) -> list[ChatMessage]:
-        return self._messages
+        # Only the newest page(s) this client has loaded; the list is virtualized
+        # client-side, and display names resolve through display_name_map.
+        window = self._messages[-self._history_limit() :]
+        if not window:
+            return []
+        # Members viewing the same window share one frame, so fan-out encodes it once.
+        return message_frames.get(
+            (self._linked_to, window[0].id, window[-1].id, len(window)),
+            lambda: [msg.to_chat_message() for msg in window],
+        )
 
     @rx.var
+    def has_older_messages(self) -> bool:
+        return len(self._messages) > self._history_limit()
+
+    @rx.event
+    def load_older_messages(self):
+        """Extend this client's history window by one page (scrolling near the top)."""
+        if not self.has_older_messages:
+            return
+        client_token = self.router.session.client_token
+        self._history_limit_by_client[client_token] = self._history_limit() + HISTORY_PAGE_SIZE
+
+    @rx.var(deps=["_presence_version"])
     def users(self) -> list[str]:
-        return list(self._active_users.values())
+        return [profile.username for profile in presence.members(self._linked_to)]
 
-    @rx.var
+    @rx.var(deps=["_presence_version"])
     def online_users_list(self) -> list[UserProfile]:
-        # Deduplicate by username and filter out stale sessions.
-        now_ts = datetime.datetime.utcnow().timestamp()
-        unique: dict[str, UserProfile] = {}
-        for token, profile in self._active_user_profiles.items():
-            last_seen = self._active_user_last_seen.get(token, now_ts)
-            if now_ts - last_seen > self.STALE_WINDOW_SECONDS:
-                continue
-            if profile.username not in unique:
-                unique[profile.username] = profile
-        return list(unique.values())
+        # One entry per user; sessions whose presence expired are pruned from the index.
+        return presence.members(self._linked_to)
 
-    @rx.var
+    @rx.var(deps=["_presence_version", "_profiles_version"])
     def display_name_map(self) -> dict[str, str]:
-        # Map canonical username/email to preferred display nickname.
+        # Map canonical username/email to preferred display nickname, covering
+        # everyone in the room history (not just users currently online).
         mapping: dict[str, str] = {}
-        for profile in self._active_user_profiles.values():
+        senders = {msg.sender for msg in self._messages}
+        profiles = profile_directory.get_many(senders)
+        for sender in senders:
+            profile = profiles.get(sender)
+            mapping[sender] = (profile.nickname if profile else "") or sender
+        for profile in presence.members(self._linked_to):
             mapping[profile.username] = profile.nickname or profile.username
         return mapping
 
-    @rx.var
+    @rx.var(deps=["_presence_version", "_profiles_version"])
     def avatar_seed_map(self) -> dict[str, str]:
         # Use stored avatar seed per user; fall back to username/email if missing.
+        members = presence.members(self._linked_to)
+        stored = profile_directory.get_many(profile.username for profile in members)
         mapping: dict[str, str] = {}
-        for profile in self._active_user_profiles.values():
+        for member in members:
+            profile = stored.get(member.username, member)
             mapping[profile.username] = profile.avatar_seed or profile.username
         return mapping
 
@@ -399,111 +842,144 @@ class RoomState(rx.SharedState):
     def room_creator_username(self) -> str:
         return self._room_creator_map.get(self.room_name, "")
 
-    @rx.var
+    @rx.var(deps=["_profiles_version"])
     def room_creator_display(self) -> str:
         username = self.room_creator_username
         if not username:
             return ""
-        profile = self._known_profiles_snapshot.get(username)
+        profile = profile_directory.get(username)
         if profile and profile.nickname:
             return profile.nickname
         return username
 
-    async def _prune_stale_clients(self, now_ts: float | None = None):
-        """Remove clients that have not sent a heartbeat recently."""
-        now_val = now_ts or datetime.datetime.utcnow().timestamp()
+    async def _prune_stale_clients(self) -> int:
+        """Mark clients whose presence pings (``signal_hub``) expired as idle; returns how many."""
         stale_tokens = [
-            token
-            for token, ts in self._active_user_last_seen.items()
-            if now_val - ts > self.STALE_WINDOW_SECONDS
+            token for token in presence.active_sessions_in(self._linked_to) if not signal_hub.is_present(token)
         ]
         if not stale_tokens:
-            return
+            return 0
+        room_name = presence.room_of(stale_tokens[0])
         for token in stale_tokens:
-            self._active_user_last_seen.pop(token, None)
-            self._active_users.pop(token, None)
-            self._active_user_profiles.pop(token, None)
+            presence.mark_idle(token)
+        activity_metrics.record("leaves", room_name, len(stale_tokens))
+        activity_metrics.set_active_users(room_name, self._member_count())
+        self._presence_changed()
+        return len(stale_tokens)
+
+    def _member_count(self) -> int:
+        return presence.participant_count(self._linked_to)
+
+    async def _hydrate(self, token: str, room_name: str, lobby: "GlobalLobbyState"):
+        """Load history into this room on first use, or restore it after eviction."""
+
+        started = time.perf_counter()
+        was_evicted = room_residency.is_evicted(token)
+        messages: list[StoredMessage] = []
+        history = lobby._room_history(room_name)
+        if was_evicted:
+            snapshot = await room_residency.load(token)
+            messages = list(snapshot.get("messages", []))
+            # Retention may have expired part of the snapshot since eviction; the
+            # lobby keeps every retained message, so the room starts at its oldest.
+            cut = bisect.bisect_left(messages, history[0].id, key=lambda msg: msg.id) if history else len(messages)
+            del messages[:cut]
+        # The lobby holds everything archived since the snapshot (or the whole hot history).
+        last_id = messages[-1].id if messages else 0
+        messages.extend(msg for msg in history if msg.id > last_id)
+        self._messages = messages
+        self._hydrated = True
+        room_residency.mark_resident(token, sum(message_bytes(msg) for msg in messages))
+        if was_evicted:
+            room_residency.record_rehydration(started)
 
     @rx.event
     async def heartbeat(self):
-        """Refresh presence for this client, sync message counts, and prune stale sessions."""
-        # Sync per-room message counts from lobby snapshot so unread badges stay current even when not in that room.
+        """Refresh presence for this client, keep the viewed room read, and prune stale sessions."""
         lobby = await self.get_state(GlobalLobbyState)
         if not lobby._linked_to:
             lobby = await lobby._link_to("global-lobby")
-        self._message_counts_by_room = {room: len(msgs) for room, msgs in lobby._messages_by_room.items()}
         self._room_creator_map = {room: info.created_by for room, info in lobby._rooms.items()}
-        self._known_profiles_snapshot = dict(lobby._known_profiles)
-        tab_state = await self.get_state(TabSessionState)
-        tab_state.all_room_counts_json = json.dumps(self._message_counts_by_room)
+        self._profiles_changed()
 
+        # Refresh this client's presence (in memory, see signal_hub) before pruning;
+        # this also re-registers its signal channel, e.g. after a backend restart.
+        client_token = self.router.session.client_token
+        if profile := presence.profile_of(client_token):
+            signal_hub.enter(client_token, self.room_name, profile.username, profile.nickname or profile.username)
+            if presence.mark_active(client_token):
+                self._presence_changed()
+                lobby._presence_changed()
         # Always prune stale clients to keep online status accurate
-        now_ts = datetime.datetime.utcnow().timestamp()
-        await self._prune_stale_clients(now_ts)
+        if await self._prune_stale_clients():
+            lobby._presence_changed()
 
         # Presence refresh only if currently in a room.
         if not self.room_name:
+            tab_state = await self.get_state(TabSessionState)
             tab_state.curr_room_name = ""
             return
-        client_token = self.router.session.client_token
-        self._active_user_last_seen[client_token] = now_ts
+        room_residency.touch(_room_token(self.room_name), members=self._member_count())
+        # The room on screen is being read; no-op unless new messages arrived.
+        lobby._mark_read(presence.username_of(client_token), self.room_name)
 
     @rx.event
     async def on_disconnect(self):
         """Cleanup presence when the client disconnects (e.g., tab closed)."""
         client_token = self.router.session.client_token
-        
-        # 1. Try to identify room from local context
-        room_name = self.room_name
-        
-        # 2. If not found locally, check global registry
         lobby = await self.get_state(GlobalLobbyState)
         if not lobby._linked_to:
             lobby = await lobby._link_to("global-lobby")
-            
-        if not room_name and hasattr(lobby, "_user_locations"):
-            room_name = lobby._user_locations.get(client_token, "")
-            
-        # 3. Clean up global registry
-        if hasattr(lobby, "_user_locations"):
-            lobby._user_locations.pop(client_token, None)
+        lobby._client_users.pop(client_token, None)
 
+        # The presence index knows the room even if this state is not linked to it.
+        room_name = presence.leave(client_token)
+        signal_hub.leave(client_token)
         if not room_name:
             return
+        lobby._presence_changed()
 
-        # 4. Link to the correct room state instance and remove user
-        safe_token = f"room-{room_name.replace(' ', '-').replace('_', '-').lower()}"
+        # Link to the room's state to drop this client's entries and notify members.
+        safe_token = _room_token(room_name)
         target_state = await self._link_to(safe_token)
-        
-        target_state._active_user_last_seen.pop(client_token, None)
-        target_state._active_users.pop(client_token, None)
-        target_state._active_user_profiles.pop(client_token, None)
-        target_state._current_room_by_client.pop(client_token, None)
+        activity_metrics.record("leaves", room_name)
+        activity_metrics.set_active_users(room_name, target_state._member_count())
+        target_state._history_limit_by_client.pop(client_token, None)
+        target_state._presence_changed()
+        room_residency.touch(safe_token, members=target_state._member_count())
         
         tab_state = await self.get_state(TabSessionState)
         tab_state.curr_room_name = ""
 
     @rx.event
-    async def rejoin_last_room(self):
-        """Rejoin the last room stored locally, if not already in a room."""
+    async def bootstrap(self):
+        """Prepare the dashboard in a single event (and a single state update).
+
+        Links the lobby (which seeds read cursors on first visit), and either
+        rejoins the tab's last room or registers presence, instead of chaining
+        separate events.
+        """
+        lobby = await self.get_state(GlobalLobbyState)
+        await lobby.join_lobby()
         tab_state = await self.get_state(TabSessionState)
-        if self.room_name or not tab_state.last_room_name:
-            return
+
         auth = await self.get_state(AuthState)
-        if not auth.user:
+        if auth.user and not self.room_name and tab_state.last_room_name:
+            # handle_join_room syncs counts and presence for the rejoined room.
+            await self.handle_join_room(tab_state.last_room_name)
             return
-        yield RoomState.handle_join_room(tab_state.last_room_name)
+        await self.heartbeat()
 
     @rx.event
     async def reset_room_state(self):
         """Clears local room state during a global reset."""
-        self._active_users = {}
-        self._active_user_profiles = {}
+        if self._linked_to:
+            for client_token in presence.clear_room(self._linked_to):
+                signal_hub.leave(client_token)
+        self._presence_changed()
         self._messages = []
-        self._current_room_by_client = {}
-        self._message_counts_by_room = {}
+        self._history_limit_by_client = {}
         self._room_creator_map = {}
-        self._known_profiles_snapshot = {}
         self.current_message = ""
         tab_state = await self.get_state(TabSessionState)
         tab_state.reset_tab_session()
@@ -517,73 +993,64 @@ class RoomState(rx.SharedState):
         # Optimization: If already in this room, just mark as read/refresh and return
         # This prevents unnecessary unlink/link cycles which can cause UI state flicker or "No room selected"
         if self.room_name == room_name:
-            await self.mark_room_read_to_current(room_name)
             await self.heartbeat()
             return
+        lobby = await self.get_state(GlobalLobbyState)
+        if throttled := _rate_limit("join_room", self.router.session.client_token, auth.user, lobby._permissions):
+            return throttled
 
         # Set curr_room_name immediately to prevent UI unselect during re-join
         tab_state = await self.get_state(TabSessionState)
         tab_state.curr_room_name = room_name
         if self.room_name:
             await self._internal_leave_room(clear_tab_state=False)
-        safe_token = f"room-{room_name.replace(' ', '-').replace('_', '-').lower()}"
+        safe_token = _room_token(room_name)
         new_room_state = await self._link_to(safe_token)
         client_token = self.router.session.client_token
-        new_room_state._current_room_by_client[client_token] = room_name
+        presence.join(client_token, safe_token, room_name, auth.user)
         tab_state.last_room_name = room_name
         # Load existing history for this room from lobby snapshot (if any)
-        lobby = await self.get_state(GlobalLobbyState)
         if not lobby._linked_to:
             lobby_linked = await lobby._link_to("global-lobby")
         else:
             lobby_linked = lobby
+        lobby_linked._presence_changed()
+        new_room_state._presence_changed()
 
-        # Update global user location tracking
-        if not hasattr(lobby_linked, "_user_locations"):
-            lobby_linked._user_locations = {}
-        lobby_linked._user_locations[client_token] = room_name
-
-        prior_msgs = lobby_linked._messages_by_room.get(room_name, [])
-        new_room_state._messages = list(prior_msgs)
-        new_room_state._message_counts_by_room = {
-            room: len(msgs) for room, msgs in lobby_linked._messages_by_room.items()
-        }
+        # Resident rooms keep their history live; only cold rooms are (re)hydrated.
+        if room_residency.needs_hydration(safe_token) or not new_room_state._hydrated:
+            await new_room_state._hydrate(safe_token, room_name, lobby_linked)
         new_room_state._room_creator_map = {room: info.created_by for room, info in lobby_linked._rooms.items()}
-        new_room_state._known_profiles_snapshot = dict(lobby_linked._known_profiles)
-        tab_state.all_room_counts_json = json.dumps(new_room_state._message_counts_by_room)
+        new_room_state._profiles_changed()
 
         username = auth.user.username
-        new_room_state._active_users[client_token] = username
-        new_room_state._active_user_profiles[client_token] = auth.user
-        new_room_state._active_user_last_seen[client_token] = datetime.datetime.utcnow().timestamp()
+        signal_hub.enter(client_token, room_name, username, auth.user.nickname or username)
+        room_residency.touch(safe_token, members=new_room_state._member_count())
+        activity_metrics.record("joins", room_name)
+        activity_metrics.set_active_users(room_name, new_room_state._member_count())
 
-        # Refresh counts/presence after linking to ensure unread map is up to date immediately.
+        # Refresh presence and mark this room read for the user (on every tab/device).
         await new_room_state.heartbeat()
 
-        # Mark only this room as read at its current total.
-        await new_room_state.mark_room_read_to_current(room_name)
-
     async def _internal_leave_room(self, clear_tab_state: bool):
         client_token = self.router.session.client_token
-        current_room = self._current_room_by_client.get(client_token, "")
-        
-        # Always clean up global location tracking
+        current_room = self.room_name
+        if not current_room:
+            return
         lobby = await self.get_state(GlobalLobbyState)
         if not lobby._linked_to:
             lobby = await lobby._link_to("global-lobby")
-        if hasattr(lobby, "_user_locations"):
-            lobby._user_locations.pop(client_token, None)
-
-        if not current_room:
-            return
-            
-        if client_token in self._active_users:
-            del self._active_users[client_token]
-        if client_token in self._active_user_profiles:
-            del self._active_user_profiles[client_token]
-        if client_token in self._active_user_last_seen:
-            del self._active_user_last_seen[client_token]
-        self._current_room_by_client.pop(client_token, None)
+        # Messages seen while in the room stay read after leaving it.
+        lobby._mark_read(presence.username_of(client_token), current_room)
+
+        presence.leave(client_token)
+        signal_hub.leave(client_token)
+        activity_metrics.record("leaves", current_room)
+        activity_metrics.set_active_users(current_room, self._member_count())
+        self._presence_changed()
+        lobby._presence_changed()
+        self._history_limit_by_client.pop(client_token, None)
+        room_residency.touch(_room_token(current_room), members=self._member_count())
         tab_state = await self.get_state(TabSessionState)
         if clear_tab_state:
             tab_state.curr_room_name = ""
@@ -597,41 +1064,103 @@ class RoomState(rx.SharedState):
         await self._internal_leave_room(clear_tab_state=True)
 
     @rx.event
-    async def send_message(self, form_data: dict[str, Any]):
+    async def send_message(self, form_data: dict[str, Any], client_key: str = ""):
+        """Post a message; ``client_key`` makes replays of the same submit a no-op."""
+
         message_text = form_data.get("message", "").strip()
         if not message_text:
             return
         client_token = self.router.session.client_token
-        sender = self._active_users.get(client_token, "Unknown")
-        profile = self._active_user_profiles.get(client_token)
-        display_name = sender
-        if profile:
-            display_name = profile.nickname or profile.username
-
-        msg = ChatMessage(
-            id=str(uuid.uuid4()),
+        sender = presence.username_of(client_token) or "Unknown"
+        client_key = normalize_key(client_key)
+        # Checked before rate limiting so retries never spend the sender's budget.
+        if send_dedupe.is_duplicate(self.room_name, sender, client_key):
+            return
+        lobby = await self.get_state(GlobalLobbyState)
+        auth = await self.get_state(AuthState)
+        if auth.user and (throttled := _rate_limit("send_message", client_token, auth.user, lobby._permissions)):
+            return throttled
+        send_dedupe.remember(self.room_name, sender, client_key)
+
+        sent_at = now_ms()
+        msg = StoredMessage.create(
+            id=message_ids.next_id(at_ms=sent_at),
             sender=sender,
-            display_name=display_name,
             content=message_text,
-            timestamp=datetime.datetime.now().strftime("%H:%M"),
-            is_system=False,
+            timestamp=sent_at,
         )
         self._messages.append(msg)
-        self._message_counts_by_room[self.room_name] = len(self._messages)
-        tab_state = await self.get_state(TabSessionState)
-        tab_state.all_room_counts_json = json.dumps(self._message_counts_by_room)
-        lobby = await self.get_state(GlobalLobbyState)
-        await lobby.record_message(self.room_name, msg)
+        room_residency.touch(_room_token(self.room_name), added_bytes=message_bytes(msg))
+        activity_metrics.record("messages", self.room_name)
+        lobby._next_seq(self.room_name)
+        lobby._mark_read(sender, self.room_name)
+        # Archive via the write-behind buffer; when it is full (or not running),
+        # fall back to writing inline while we already hold the lobby lock.
+        if not message_archive.offer(self.room_name, msg):
+            await lobby.record_message(self.room_name, msg)
         self.current_message = ""
 
-    @rx.event
-    async def seed_all_room_read_counts(self):
-        """Initialize read counts to current totals (used on initial dashboard entry)."""
-        tab_state = await self.get_state(TabSessionState)
-        tab_state.seed_read_counts(self._message_counts_by_room)
 
-    async def mark_room_read_to_current(self, room_name: str):
-        """Set read count for a specific room to its current total, without decreasing."""
-        tab_state = await self.get_state(TabSessionState)
-        current_total = self._message_counts_by_room.get(room_name, 0)
-        tab_state.mark_room_read(room_name, current_total)
\ No newline at end of file
+async def _evict_room(token: str) -> bool:
+    """Snapshot an idle room's history to disk and empty its resident RoomState."""
+
+    async with get_state_manager().modify_state(_substate_key(token, RoomState)) as root_state:
+        room = await root_state.get_state(RoomState)
+        await room._prune_stale_clients()
+        if members := presence.participant_count(token):
+            room_residency.touch(token, members=members)
+            return False
+        await room_residency.save(token, {"messages": list(room._messages)})
+        room._messages = []
+        room._room_creator_map = {}
+        room._history_limit_by_client = {}
+        # Idle sessions still showing the room are sent back to the room list.
+        for client_token in presence.clear_room(token):
+            signal_hub.leave(client_token)
+        room._presence_changed()
+        room._hydrated = False
+    return True
+
+
+room_residency.bind(_evict_room)
+
+
+async def _apply_signal_presence(lapsed: list[str], returned: list[str]):
+    """Mark sessions idle or active as their presence pings (``signal_hub``) stop or resume.
+
+    Each affected room bumps its presence version and notifies its members,
+    then the lobby does the same for the room list's counts.
+    """
+
+    rooms = {presence.room_token_of(token) for token in lapsed}
+    for client_token in returned:
+        if presence.mark_active(client_token):
+            rooms.add(presence.room_token_of(client_token))
+    rooms.discard("")
+    if not rooms:
+        return
+    for token in rooms:
+        async with get_state_manager().modify_state(_substate_key(token, RoomState)) as root_state:
+            room = await root_state.get_state(RoomState)
+            await room._prune_stale_clients()
+            room._presence_changed()
+            linked_clients = set(room._linked_from)
+        _do_update_other_tokens(
+            affected_tokens=linked_clients,
+            previous_dirty_vars={RoomState.get_full_name(): {"_presence_version"}},
+            state_type=RoomState,
+        )
+    async with get_state_manager().modify_state(
+        _substate_key("global-lobby", GlobalLobbyState)
+    ) as root_state:
+        lobby = await root_state.get_state(GlobalLobbyState)
+        lobby._presence_changed()
+        linked_clients = set(lobby._linked_from)
+    _do_update_other_tokens(
+        affected_tokens=linked_clients,
+        previous_dirty_vars={GlobalLobbyState.get_full_name(): {"_presence_version"}},
+        state_type=GlobalLobbyState,
+    )
+
+
+signal_hub.bind(_apply_signal_presence)
@@ -1,6 +1,10 @@
-import reflex as rx
-import os
-from dotenv import load_dotenv
+from relack.services import startup_profile
+
+startup_profile.install()
+
+import reflex as rx  # noqa: E402
+import os  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
 
 load_dotenv()
 
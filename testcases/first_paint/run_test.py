@@ -0,0 +1,77 @@
+from playwright.sync_api import sync_playwright
+import json
+import os
+import statistics
+import sys
+import time
+from urllib.parse import urlparse
+
+# Point at a production build for meaningful numbers, e.g.
+#   reflex run --env prod  (frontend on :3000, backend on :8000)
+BASE_URL = os.environ.get("RELACK_BASE_URL", "http://localhost:3000")
+RUNS = int(os.environ.get("RELACK_FCP_RUNS", "5"))
+THIRD_PARTY_HOSTS = ("fonts.googleapis.com", "fonts.gstatic.com")
+
+FCP_SCRIPT = """
+() => new Promise((resolve) => {
+    const existing = performance.getEntriesByName("first-contentful-paint")[0];
+    if (existing) return resolve(existing.startTime);
+    new PerformanceObserver((list, observer) => {
+        const entry = list.getEntriesByName("first-contentful-paint")[0];
+        if (entry) { observer.disconnect(); resolve(entry.startTime); }
+    }).observe({ type: "paint", buffered: true });
+})
+"""
+
+
+def run():
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        samples = []
+        third_party = set()
+        try:
+            for attempt in range(RUNS):
+                # Fresh context per run so every sample is a cold-cache first paint.
+                context = browser.new_context()
+                page = context.new_page()
+                page.on(
+                    "request",
+                    lambda request: third_party.add(request.url)
+                    if urlparse(request.url).hostname in THIRD_PARTY_HOSTS
+                    else None,
+                )
+                page.goto(BASE_URL, timeout=60000, wait_until="load")
+                fcp_ms = page.evaluate(FCP_SCRIPT)
+                print(f"Run {attempt + 1}/{RUNS}: first-contentful-paint {fcp_ms:.0f} ms")
+                samples.append(fcp_ms)
+                context.close()
+        except Exception as e:
+            print(f"First paint measurement failed: {e}")
+            browser.close()
+            sys.exit(1)
+        browser.close()
+
+    result = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": BASE_URL,
+        "runs": RUNS,
+        "fcp_median_ms": round(statistics.median(samples), 1),
+        "fcp_min_ms": round(min(samples), 1),
+        "third_party_font_requests": sorted(third_party),
+    }
+    # Append so successive runs (e.g. before/after a change) can be compared.
+    with open(os.path.join(output_dir, "first_paint.jsonl"), "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(result) + "\n")
+    print(json.dumps(result, indent=2))
+
+    if third_party:
+        print("Error: page still requests fonts from a third-party host")
+        sys.exit(1)
+    print("All tests passed!")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,156 @@
+from playwright.sync_api import sync_playwright, expect
+from dotenv import load_dotenv
+import json
+import os
+import statistics
+import sys
+import time
+
+load_dotenv()
+
+# Point at a production build for meaningful numbers, e.g.
+#   reflex run --env prod  (frontend on :3000, backend on :8000)
+BASE_URL = os.environ.get("RELACK_BASE_URL", "http://localhost:3000")
+MESSAGE_COUNT = int(os.environ.get("RELACK_BENCH_MESSAGES", "10000"))
+ROOM_NAME = "Bench Room"
+SCROLL_STEP_PX = 400
+# Rows mounted at once must stay around one viewport plus overscan, not the history size.
+MAX_MOUNTED_ROWS = 200
+
+ROW_SELECTOR = "[data-row-key]"
+
+# Scroll the message list from top to bottom one step per frame, recording frame intervals.
+SCROLL_AND_SAMPLE = """
+(step) => new Promise((resolve) => {
+    const scroller = document.querySelector("[data-row-key]").closest(".overflow-y-auto");
+    const frames = [];
+    let mountedMax = 0;
+    let last = performance.now();
+    scroller.scrollTop = 0;
+    const tick = (now) => {
+        frames.push(now - last);
+        last = now;
+        mountedMax = Math.max(mountedMax, scroller.querySelectorAll("[data-row-key]").length);
+        if (scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 1) {
+            resolve({ frames: frames.slice(1), mountedMax, domNodes: document.getElementsByTagName("*").length });
+            return;
+        }
+        scroller.scrollTop += step;
+        requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+})
+"""
+
+
+def build_snapshot(path: str):
+    base_ms = int(time.time() * 1000) - MESSAGE_COUNT * 1000
+    senders = ["bench_alice", "bench_bob", "bench_carol"]
+    messages = [
+        {
+            # Snowflake-shaped ids (time in the high bits) keep send order.
+            "id": ((base_ms + i * 1000) << 22) + i,
+            "sender": senders[i % len(senders)],
+            "content": f"Benchmark message {i}: " + "lorem ipsum dolor sit amet " * (1 + i % 6),
+            "timestamp": base_ms + i * 1000,
+            "is_system": False,
+        }
+        for i in range(MESSAGE_COUNT)
+    ]
+    snapshot = {
+        "rooms": [{"name": ROOM_NAME, "description": "Virtualized list benchmark", "created_by": "System"}],
+        "profiles": [],
+        "messages_by_room": {ROOM_NAME: messages},
+        # Unlimited retention so the compactor keeps every message hot.
+        "retention": {ROOM_NAME: {"max_count": 0, "max_age_hours": 0, "max_bytes": 0}},
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(snapshot, handle)
+    return messages[0]["id"]
+
+
+def import_snapshot(browser, path: str):
+    admin_passcode = os.getenv("ADMIN_PASSCODE")
+    if not admin_passcode:
+        print("Error: ADMIN_PASSCODE not found in .env file.")
+        sys.exit(1)
+    context = browser.new_context()
+    page = context.new_page()
+    page.goto(BASE_URL, timeout=60000)
+    page.get_by_role("link", name="Administrator Settings").click()
+    page.get_by_placeholder("Enter Admin Passcode").fill(admin_passcode)
+    page.get_by_role("button", name="Login").click()
+    expect(page.get_by_role("heading", name="Admin Dashboard")).to_be_visible()
+    page.get_by_role("tab", name="Settings").click()
+    page.get_by_role("button", name="Data Maintenance").click()
+    page.locator("input[type=file]").set_input_files(path)
+    expect(page.get_by_text("Import completed.")).to_be_visible(timeout=60000)
+    context.close()
+
+
+def load_full_history(page, first_id: int):
+    """Scroll to the top until the oldest message is mounted (one page per request)."""
+
+    oldest = page.locator(f'[data-row-key$="{first_id}"]')
+    for _ in range(MESSAGE_COUNT // 50):
+        if oldest.count():
+            return
+        page.evaluate(f'document.querySelector("{ROW_SELECTOR}").closest(".overflow-y-auto").scrollTop = 0')
+        page.wait_for_timeout(250)
+    raise AssertionError("oldest message never loaded")
+
+
+def run():
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    os.makedirs(output_dir, exist_ok=True)
+    snapshot_path = os.path.join(output_dir, "bench_snapshot.json")
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        try:
+            print(f"Importing a room with {MESSAGE_COUNT} messages...")
+            first_id = build_snapshot(snapshot_path)
+            import_snapshot(browser, snapshot_path)
+
+            page = browser.new_page()
+            page.goto(BASE_URL, timeout=60000)
+            page.get_by_placeholder("CoolPanda99").fill("ListBench")
+            page.get_by_role("button", name="Continue as Guest").click()
+            page.get_by_role("button", name=ROOM_NAME).click()
+            page.wait_for_selector(ROW_SELECTOR, timeout=30000)
+
+            started = time.perf_counter()
+            load_full_history(page, first_id)
+            print(f"Loaded full history in {time.perf_counter() - started:.1f} s")
+
+            sample = page.evaluate(SCROLL_AND_SAMPLE, SCROLL_STEP_PX)
+        except Exception as e:
+            print(f"Message list benchmark failed: {e}")
+            browser.close()
+            sys.exit(1)
+        browser.close()
+
+    frames = sorted(sample["frames"])
+    result = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "messages": MESSAGE_COUNT,
+        "frames": len(frames),
+        "frame_p50_ms": round(statistics.median(frames), 1),
+        "frame_p95_ms": round(frames[int(len(frames) * 0.95)], 1),
+        "frame_max_ms": round(frames[-1], 1),
+        "mounted_rows_max": sample["mountedMax"],
+        "dom_nodes": sample["domNodes"],
+    }
+    # Append so successive runs (e.g. before/after a change) can be compared.
+    with open(os.path.join(output_dir, "message_list.jsonl"), "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(result) + "\n")
+    print(json.dumps(result, indent=2))
+
+    if result["mounted_rows_max"] > MAX_MOUNTED_ROWS:
+        print(f"Error: {result['mounted_rows_max']} rows mounted at once (limit {MAX_MOUNTED_ROWS})")
+        sys.exit(1)
+    print("All tests passed!")
+
+
+if __name__ == "__main__":
+    run()